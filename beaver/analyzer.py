@@ -4,9 +4,16 @@ This script analyzes existing .bvr files and provides recommendations.
 """
 
 import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from importlib import metadata
 from pathlib import Path
-from textx import metamodel_from_file
-from beaver.calc import *
+from typing import Iterator, List, Optional, Tuple
+from beaver.cache import cache_dir
+from beaver.checkpoint import write_atomic
+from beaver.language import get_metamodel, grammar_fingerprint
+from beaver.calc import FEATURE_PROCESSORS
+from beaver.river_index import RiverIndex, load_river_index
 from beaver.validator import ModelValidator, ValidationLevel
 import json
 import sys
@@ -15,8 +22,8 @@ import sys
 class ModelAnalyzer:
     """Analyzes Beaver model files and provides improvement suggestions."""
     
-    def __init__(self):
-        self.validator = ModelValidator()
+    def __init__(self, river_index: Optional[RiverIndex] = None):
+        self.validator = ModelValidator(river_index)
         self.analysis_results = {}
     
     def analyze_file(self, file_path: str) -> dict:
@@ -30,18 +37,8 @@ class ModelAnalyzer:
             dict: Analysis results
         """
         try:
-            # Load grammar and parse file
-            processors = {
-                'Data': data_action,
-                'Assignment': assignment_action,
-                'Expression': expression_action,
-                'Term': term_action,
-                'Factor': factor_action,
-                'Operand': operand_action,
-            }
-            
-            ml_mm = metamodel_from_file('beaver/grammar/pipeline.tx')
-            ml_mm.register_obj_processors(processors)
+            # Load grammar and parse file. The grammar is only loaded for the first file
+            ml_mm = get_metamodel(FEATURE_PROCESSORS)
             config = ml_mm.model_from_file(file_path)
             
             analysis = {
@@ -155,7 +152,7 @@ class ModelAnalyzer:
         if hasattr(data, 'features') and data.features:
             data_info['has_features'] = True
             
-            if hasattr(data.features, 'assignments') and data.features.assignments:
+            if getattr(data, 'feature_program', None) is not None:
                 data_info['feature_engineering'] = True
         
         if hasattr(data, 'preprocessors') and data.preprocessors:
@@ -239,34 +236,142 @@ class ModelAnalyzer:
         return suggestions
 
 
-def analyze_directory(directory: str, output_format: str = 'text'):
-    """Analyze all .bvr files in a directory."""
-    analyzer = ModelAnalyzer()
+class AnalysisCache:
+    """
+    Results of previous analyses, stored in the Beaver cache directory.
+    
+    A result is reused while the content of the file, the grammar and the 
+    installed River version are the same as when it was analyzed.
+    """
+    
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path if path is not None else cache_dir() / 'analysis-cache.json'
+        self.hits = 0
+        self._salt = f"{grammar_fingerprint()}:{metadata.version('river')}"
+        self._entries = {}
+        if self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                self._entries = {}
+    
+    def key(self, file_path: Path) -> str:
+        digest = hashlib.sha256(self._salt.encode())
+        digest.update(file_path.read_bytes())
+        return digest.hexdigest()
+    
+    def get(self, file_path: Path) -> Optional[dict]:
+        entry = self._entries.get(str(file_path.resolve()))
+        if entry is None or entry['hash'] != self.key(file_path):
+            return None
+        self.hits += 1
+        return entry['result']
+    
+    def put(self, file_path: Path, result: dict):
+        # Parse errors may come from a file that is being edited, they are always re-analyzed
+        if result.get('status') == 'success':
+            self._entries[str(file_path.resolve())] = {'hash': self.key(file_path), 'result': result}
+    
+    def save(self):
+        try:
+            write_atomic(str(self.path), json.dumps(self._entries).encode('utf-8'))
+        except OSError:
+            pass
+
+
+# Analyzer of a worker process, created when the worker starts
+_worker_analyzer = None
+
+
+def _start_worker(river_index: RiverIndex):
+    global _worker_analyzer
+    _worker_analyzer = ModelAnalyzer(river_index)
+
+
+def _analyze_in_worker(file_path: str) -> Tuple[str, dict]:
+    return file_path, _worker_analyzer.analyze_file(file_path)
+
+
+def _analyze_files(files: List[Path], workers: int, progress) -> Iterator[Tuple[Path, dict]]:
+    """Analyze files and yield (file, result) as soon as each one is done."""
+    if workers <= 1 or len(files) < 2:
+        analyzer = ModelAnalyzer()
+        for file_path in files:
+            print(f"📄 Analyzing {file_path.name}...", file=progress)
+            yield file_path, analyzer.analyze_file(str(file_path))
+        return
+    
+    # The index is built (or loaded) once here, with a cold cache every worker would build it
+    river_index = load_river_index()
+    paths = {str(file_path): file_path for file_path in files}
+    with ProcessPoolExecutor(max_workers=min(workers, len(files)), initializer=_start_worker,
+                             initargs=(river_index,)) as pool:
+        futures = [pool.submit(_analyze_in_worker, path) for path in paths]
+        for future in as_completed(futures):
+            path, result = future.result()
+            print(f"📄 Analyzed {paths[path].name}", file=progress)
+            yield paths[path], result
+
+
+def analyze_directory(directory: str, output_format: str = 'text', workers: int = 1, incremental: bool = False):
+    """
+    Analyze all .bvr files in a directory.
+    
+    Args:
+        directory: Directory containing the .bvr files
+        output_format: 'text', 'json' or 'jsonl'. With 'jsonl' one JSON object 
+            per file is printed as soon as the file is analyzed, progress goes to stderr
+        workers: Number of processes that analyze files in parallel
+        incremental: Reuse the results of files that did not change since their last analysis
+    """
     directory_path = Path(directory)
+    # JSON lines are meant to be piped, so the progress messages must not mix with them
+    progress = sys.stderr if output_format == 'jsonl' else sys.stdout
     
     if not directory_path.exists():
-        print(f"❌ Directory not found: {directory}")
+        print(f"❌ Directory not found: {directory}", file=progress)
         return
     
     bvr_files = list(directory_path.glob('*.bvr'))
     
     if not bvr_files:
-        print(f"❌ No .bvr files found in {directory}")
+        print(f"❌ No .bvr files found in {directory}", file=progress)
         return
     
-    print(f"🔍 Analyzing {len(bvr_files)} .bvr files in {directory}...")
+    print(f"🔍 Analyzing {len(bvr_files)} .bvr files in {directory}...", file=progress)
     
     all_results = {}
     
-    for file_path in bvr_files:
-        print(f"📄 Analyzing {file_path.name}...")
-        result = analyzer.analyze_file(str(file_path))
+    def emit(file_path: Path, result: dict):
         all_results[file_path.name] = result
+        if output_format == 'jsonl':
+            print(json.dumps({'file': file_path.name, 'result': result}), flush=True)
     
-    # Output results
+    cache = AnalysisCache() if incremental else None
+    pending = []
+    for file_path in bvr_files:
+        cached = cache.get(file_path) if cache else None
+        if cached is not None:
+            emit(file_path, cached)
+        else:
+            pending.append(file_path)
+    
+    if cache:
+        print(f"♻️  {cache.hits} unchanged files reused from the cache", file=progress)
+    
+    for file_path, result in _analyze_files(pending, workers, progress):
+        emit(file_path, result)
+        if cache:
+            cache.put(file_path, result)
+    
+    if cache:
+        cache.save()
+    
+    # Output results in the order of the files
+    all_results = {file_path.name: all_results[file_path.name] for file_path in bvr_files}
     if output_format == 'json':
         print(json.dumps(all_results, indent=2))
-    else:
+    elif output_format == 'text':
         print_analysis_report(all_results)
 
 
@@ -326,19 +431,23 @@ def print_analysis_report(results: dict):
                 print(f"      • {suggestion}")
 
 
-def main():
-    """Main entry point for model analysis."""
+def main(argv=None) -> int:
+    """Main entry point for model analysis. Returns the exit code."""
     parser = argparse.ArgumentParser(description='Analyze Beaver model files')
     parser.add_argument('--directory', '-d', default='examples',
                        help='Directory containing .bvr files to analyze')
     parser.add_argument('--file', '-f', 
                        help='Analyze a specific .bvr file')
-    parser.add_argument('--output', '-o', choices=['text', 'json'], default='text',
-                       help='Output format')
+    parser.add_argument('--output', '-o', choices=['text', 'json', 'jsonl'], default='text',
+                       help='Output format (jsonl prints one line per file as soon as it is analyzed)')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                       help='Number of processes that analyze files in parallel')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Skip files that did not change since their last analysis')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose output')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if args.file:
         # Analyze single file
@@ -347,12 +456,16 @@ def main():
         
         if args.output == 'json':
             print(json.dumps({args.file: result}, indent=2))
+        elif args.output == 'jsonl':
+            print(json.dumps({'file': args.file, 'result': result}))
         else:
             print_analysis_report({args.file: result})
     else:
         # Analyze directory
-        analyze_directory(args.directory, args.output)
+        analyze_directory(args.directory, args.output, workers=args.workers, incremental=args.incremental)
+    
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
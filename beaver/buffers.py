@@ -0,0 +1,423 @@
+"""
+Bounded storage for the values a pipeline keeps for its dashboard.
+
+A long running pipeline cannot append every metric value and prediction to a
+Python list, memory would grow with every event. The buffers in this module
+have a fixed size:
+
+- RingBuffer keeps the most recent values in a numpy array.
+- DownsampledSeries keeps the most recent values at full resolution and folds
+  older values into coarser buckets, so the whole run can still be plotted.
+- PointSeries keeps the most recent (x, y) points of a series that is not
+  sampled at every event, e.g. a series received from another process.
+
+The dashboard does not read the buffers while the stream updates them. It reads
+snapshots (BufferSnapshot, SeriesSnapshot): read only copies that have the same
+reading methods as the buffers.
+"""
+
+import numbers
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+__all__ = ['RetentionPolicy', 'RingBuffer', 'DownsampledSeries', 'PointSeries', 'BufferSnapshot', 'SeriesSnapshot']
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    How many values a pipeline keeps in memory.
+
+    Parameters
+    ----------
+    recent_points : int
+        Number of most recent metric values kept at full resolution.
+    history_buckets : int
+        Number of buckets used for the downsampled history of each metric.
+        When they are full, neighbouring buckets are merged and each bucket
+        covers twice as many events.
+    stats_points : int
+        Number of most recent (y_true, y_predicted) values kept for the statistics plots.
+    sample_points : int
+        Size of the uniform sample of the whole stream drawn in the scatter plot of
+        a regressor (see beaver.summaries).
+    snapshot_interval : float
+        Seconds between two copies of the values for the dashboard (see Pipeline.snapshot).
+    """
+    recent_points: int = 10_000
+    history_buckets: int = 2_000
+    stats_points: int = 10_000
+    sample_points: int = 1_000
+    snapshot_interval: float = 1.0
+
+
+def _dtype_for(value) -> np.dtype:
+    """The narrowest numpy dtype that can store a value."""
+    if isinstance(value, (bool, np.bool_)):
+        return np.dtype(object)
+    if isinstance(value, numbers.Integral):
+        return np.dtype(np.int64)
+    if isinstance(value, numbers.Real):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+class RingBuffer:
+    """
+    Fixed size, numpy backed buffer that keeps the most recent values.
+
+    The dtype is picked from the first value (int, float or object for labels)
+    and widened if a value that does not fit arrives later.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of values that are kept.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"RingBuffer capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.total = 0
+        self._data = None
+        self._start = 0
+        self._size = 0
+
+    def append(self, value):
+        """Add a value, overwriting the oldest one if the buffer is full."""
+        self._ensure_dtype(value)
+
+        end = (self._start + self._size) % self.capacity
+        self._data[end] = value
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        self.total += 1
+
+    def to_numpy(self) -> np.ndarray:
+        """Return the values, oldest first, as a new array."""
+        if self._data is None:
+            return np.empty(0)
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._data[self._start:end].copy()
+        return np.concatenate((self._data[self._start:], self._data[:end - self.capacity]))
+
+    def tolist(self) -> list:
+        """Return the values, oldest first, as Python objects."""
+        return self.to_numpy().tolist()
+
+    def since(self, position: int) -> Optional[np.ndarray]:
+        """
+        Return the values from position (0 based, in the stream) on, oldest first.
+
+        None if some of them were already overwritten, or if position is past
+        the end of the stream (e.g. the buffer was created again).
+        """
+        if not self.total - self._size <= position <= self.total:
+            return None
+        count = self.total - position
+        if self._data is None or count == 0:
+            return np.empty(0)
+        start = (self._start + self._size - count) % self.capacity
+        end = start + count
+        if end <= self.capacity:
+            return self._data[start:end].copy()
+        return np.concatenate((self._data[start:], self._data[:end - self.capacity]))
+
+    def indices(self) -> np.ndarray:
+        """Return the position in the stream (0 based) of every stored value."""
+        return np.arange(self.total - self._size, self.total)
+
+    def __getitem__(self, index: int):
+        if not -self._size <= index < self._size:
+            raise IndexError("RingBuffer index out of range")
+        return self._data[(self._start + index % self._size) % self.capacity]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self.tolist()})"
+
+    def snapshot(self) -> 'BufferSnapshot':
+        """Return a read only copy of the buffer."""
+        return BufferSnapshot(_read_only(self.to_numpy()), self.total, self.capacity)
+
+    def _ensure_dtype(self, value):
+        required = _dtype_for(value)
+        if self._data is None:
+            self._data = np.empty(self.capacity, dtype=required)
+            return
+        current = self._data.dtype
+        if current == required or current == object:
+            return
+        if current == np.float64 and required == np.int64:
+            return
+        widened = np.float64 if {current, required} == {np.dtype(np.int64), np.dtype(np.float64)} else object
+        self._data = self._data.astype(widened)
+
+
+class DownsampledSeries:
+    """
+    Numeric series with a fixed memory footprint.
+
+    The most recent values are kept as they are. Values that leave the recent window
+    are averaged into buckets. When all the buckets are used, neighbouring buckets are
+    merged, so the history always spans the whole run with at most history_buckets points.
+
+    Parameters
+    ----------
+    recent_points : int
+        Number of values kept at full resolution.
+    history_buckets : int
+        Maximum number of buckets for older values.
+    """
+
+    def __init__(self, recent_points: int = 10_000, history_buckets: int = 2_000):
+        if history_buckets < 2:
+            raise ValueError(f"DownsampledSeries needs at least 2 history buckets, got {history_buckets}")
+        self.recent = RingBuffer(recent_points)
+        self.history_buckets = history_buckets
+        self.bucket_width = 1
+
+        self._history_x = np.empty(history_buckets, dtype=np.float64)
+        self._history_y = np.empty(history_buckets, dtype=np.float64)
+        self._history_size = 0
+
+        # Bucket that is being filled
+        self._pending_sum = 0.0
+        self._pending_count = 0
+        self._pending_first_x = 0
+
+    def append(self, value: Optional[float]):
+        """Add the latest value of the series."""
+        if len(self.recent) == self.recent.capacity:
+            self._fold(self.recent.total - self.recent.capacity, self.recent[0])
+        self.recent.append(np.nan if value is None else float(value))
+
+    def indices(self) -> np.ndarray:
+        """x values (event index) of the points returned by values()."""
+        return np.concatenate((self._history_x[:self._history_size], self.recent.indices()))
+
+    def values(self) -> np.ndarray:
+        """y values of the series: downsampled history followed by the recent values."""
+        return np.concatenate((self._history_y[:self._history_size], self.recent.to_numpy()))
+
+    def since(self, position: int) -> Optional[np.ndarray]:
+        """
+        Return the values from position (event index) on, see RingBuffer.since.
+
+        Only the recent values can be returned, None if some of them were already
+        folded into the history.
+        """
+        return self.recent.since(position)
+
+    @property
+    def total(self) -> int:
+        """Number of values appended so far."""
+        return self.recent.total
+
+    @property
+    def max_points(self) -> int:
+        """Maximum number of points returned by values()."""
+        return self.recent.capacity + self.history_buckets
+
+    def last(self) -> Optional[float]:
+        """Most recent value or None if the series is empty."""
+        return self.recent[-1] if len(self.recent) else None
+
+    def __len__(self) -> int:
+        return self._history_size + len(self.recent)
+
+    def snapshot(self) -> 'SeriesSnapshot':
+        """Return a read only copy of the series."""
+        recent = self.recent.snapshot()
+        return SeriesSnapshot(
+            x=_read_only(np.concatenate((self._history_x[:self._history_size], recent.indices()))),
+            y=_read_only(np.concatenate((self._history_y[:self._history_size], recent.data))),
+            recent=recent,
+            max_points=self.max_points)
+
+    def _fold(self, x: int, y: float):
+        """Move a value that leaves the recent window into the history buckets."""
+        if self._pending_count == 0:
+            self._pending_first_x = x
+        self._pending_sum += y
+        self._pending_count += 1
+
+        if self._pending_count < self.bucket_width:
+            return
+
+        if self._history_size == self.history_buckets:
+            self._merge_buckets()
+
+        # A bucket is drawn at the middle of the events it covers
+        self._history_x[self._history_size] = self._pending_first_x + (self._pending_count - 1) / 2
+        self._history_y[self._history_size] = self._pending_sum / self._pending_count
+        self._history_size += 1
+        self._pending_sum = 0.0
+        self._pending_count = 0
+
+    def _merge_buckets(self):
+        """Halve the number of buckets by merging neighbours. Each bucket now covers twice the events."""
+        size = self._history_size - self._history_size % 2
+        x = self._history_x[:size].reshape(-1, 2).mean(axis=1)
+        y = self._history_y[:size].reshape(-1, 2).mean(axis=1)
+        if self._history_size % 2:
+            # The odd bucket out is kept as the newest one
+            x = np.append(x, self._history_x[size])
+            y = np.append(y, self._history_y[size])
+        self._history_size = len(x)
+        self._history_x[:self._history_size] = x
+        self._history_y[:self._history_size] = y
+        self.bucket_width *= 2
+
+
+class PointSeries:
+    """
+    The most recent (x, y) points of a series whose x values are not consecutive.
+
+    The position of a point (see RingBuffer.since) is its number among the appended points.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of points that are kept.
+    """
+
+    def __init__(self, capacity: int):
+        self.x = RingBuffer(capacity)
+        self.y = RingBuffer(capacity)
+
+    def append(self, x: float, y):
+        self.x.append(x)
+        self.y.append(y)
+
+    @property
+    def total(self) -> int:
+        """Number of points appended so far."""
+        return self.y.total
+
+    def last_x(self) -> Optional[float]:
+        """x of the most recent point or None if the series is empty."""
+        return self.x[-1] if len(self.x) else None
+
+    def snapshot(self) -> 'SeriesSnapshot':
+        """Return a read only copy of the series. Its recent values know their x (positions)."""
+        x = _read_only(self.x.to_numpy())
+        y = _read_only(self.y.to_numpy())
+        recent = BufferSnapshot(y, self.y.total, self.y.capacity, positions=x)
+        return SeriesSnapshot(x=x, y=y, recent=recent, max_points=self.y.capacity)
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True, eq=False)
+class BufferSnapshot:
+    """
+    Read only copy of a RingBuffer (see RingBuffer.snapshot).
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        The values, oldest first.
+    total : int
+        Number of values appended to the buffer when the copy was made.
+    capacity : int
+        Capacity of the buffer.
+    positions : numpy.ndarray, optional
+        The position of every value if they are not the last positions of the stream,
+        e.g. for the values of a PointSeries.
+    """
+    data: np.ndarray
+    total: int
+    capacity: int
+    positions: Optional[np.ndarray] = None
+
+    def to_numpy(self) -> np.ndarray:
+        return self.data
+
+    def tolist(self) -> list:
+        return self.data.tolist()
+
+    def indices(self) -> np.ndarray:
+        if self.positions is not None:
+            return self.positions
+        return np.arange(self.total - len(self.data), self.total)
+
+    def since(self, position: int) -> Optional[np.ndarray]:
+        """See RingBuffer.since."""
+        first = self.total - len(self.data)
+        if not first <= position <= self.total:
+            return None
+        return self.data[position - first:]
+
+    def __getitem__(self, index: int):
+        return self.data[index]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+
+@dataclass(frozen=True, eq=False)
+class SeriesSnapshot:
+    """
+    Read only copy of a DownsampledSeries (see DownsampledSeries.snapshot).
+
+    Parameters
+    ----------
+    x, y : numpy.ndarray
+        The points returned by indices() and values() of the series.
+    recent : BufferSnapshot
+        The values kept at full resolution.
+    max_points : int
+        Maximum number of points of the series.
+    """
+    x: np.ndarray
+    y: np.ndarray
+    recent: BufferSnapshot
+    max_points: int
+
+    def indices(self) -> np.ndarray:
+        return self.x
+
+    def values(self) -> np.ndarray:
+        return self.y
+
+    def since(self, position: int) -> Optional[np.ndarray]:
+        """See DownsampledSeries.since."""
+        return self.recent.since(position)
+
+    def points_since(self, position: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """The (x, y) points of the values returned by since."""
+        values = self.recent.since(position)
+        if values is None:
+            return None
+        return self.x[len(self.x) - len(values):], values
+
+    @property
+    def total(self) -> int:
+        return self.recent.total
+
+    def last(self) -> Optional[float]:
+        return self.recent[-1] if len(self.recent) else None
+
+    def __len__(self) -> int:
+        return len(self.x)
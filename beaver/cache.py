@@ -0,0 +1,18 @@
+"""
+Location of the files Beaver caches between runs.
+
+The cache directory is $BEAVER_CACHE_DIR, or beaver/ inside $XDG_CACHE_HOME
+(default ~/.cache). Everything in it can be deleted, it is rebuilt on demand.
+"""
+
+import os
+from pathlib import Path
+
+__all__ = ['cache_dir']
+
+
+def cache_dir() -> Path:
+    """The directory of the Beaver caches. It is not created here."""
+    if os.environ.get('BEAVER_CACHE_DIR'):
+        return Path(os.environ['BEAVER_CACHE_DIR'])
+    return Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'beaver'
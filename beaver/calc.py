@@ -1,93 +1,64 @@
+"""
+textX object processors of the generated_features of a data block.
 
+The Assignment, Expression, Term, Factor and Operand rules of grammar/components.tx
+are replaced by the expression trees of beaver.expressions. The assignments of
+every data block are compiled into a FeatureProgram that is stored on the data
+block itself as ``data.feature_program`` (None without generated_features).
 
-__all__ = ["data_action",
-           "assignment_action", "expression_action", "term_action",
-           "factor_action", "operand_action", "flatten_nested_list", "outpout", "dict_flatten"]
+The processors keep no state between models, so several .bvr files can be
+parsed in the same process, one after the other or in threads.
+"""
 
+from beaver.expressions import Assignment, BinaryOp, Column, Negate, Number, compile_features
 
-outpout = {}
+__all__ = ["FEATURE_PROCESSORS", "data_action",
+           "assignment_action", "expression_action", "term_action",
+           "factor_action", "operand_action"]
 
 
 def data_action(data):
-
-    if data.features and data.features.assignments :
-        #print(data.features.assignments[0].variable)
-        outpout[data.name] = data.features.assignments
+    data.feature_program = compile_features(data.features.assignments) if data.features else None
 
 
 def assignment_action(assignment):
-    #print('hi')
-    functionvar = []
-    functionvar.append(assignment.variable)
-    functionvar.append('=')
-    functionvar.append(assignment.expression)
-    functionvar.append(';')
-    return functionvar
+    return Assignment(assignment.variable, assignment.expression)
 
 
-def expression_action(expression):
-    #print('hi')
-    ret = [expression.operands[0]]
+def _left_associative(operands, operators):
+    node = operands[0]
+    for operator, operand in zip(operators, operands[1:]):
+        node = BinaryOp(operator, node, operand)
+    return node
 
-    for operator, operand in zip(expression.operators,
-                                 expression.operands[1:]):
-        ret.append(operator)
-        ret.append(operand)
 
-    return ret
+def expression_action(expression):
+    return _left_associative(expression.operands, expression.operators)
 
 
 def term_action(term):
-    #print('hi')
-    ret = [term.operands[0]]
-
-    for operator, operand in zip(term.operators,
-                                 term.operands[1:]):
-
-        ret.append(operator)
-        ret.append(operand)
-
-    return ret
+    return _left_associative(term.operands, term.operators)
 
 
 def factor_action(factor):
-    #print('hi')
-    value = factor.op
-    return -value if factor.sign == '-' else value
+    return Negate(factor.op) if factor.sign == '-' else factor.op
 
 
 def operand_action(operand):
-    #print('hi')
-    if operand.op_num is not None and operand.op_num != 0:
-        return operand.op_num
-    elif operand.op_id:
-
-        return operand.op_id
-
-    else:
-
+    if operand.op_expr is not None:
         return operand.op_expr
-
-
-def dict_flatten(dict_list: dict):
-    result_dict = {}
-    for key, item in dict_list.items():
-
-        result_dict[key] = flatten_nested_list(item)
-    return result_dict
-
-
-def flatten_nested_list(nested_list, depth=0):
-    result = []
-    for item in nested_list:
-        if isinstance(item, list):  # If the item is a list, recursively flatten it
-            if depth >= 3:  # Add parentheses only if depth is greater than 3
-                result.append('(')  # Add opening parenthesis
-            result.extend(flatten_nested_list(
-                item, depth + 1))  # Increase depth
-            if depth >= 3:  # Add closing parenthesis only if depth is greater than 3
-                result.append(')')
-        else:  # If the item is not a list, add it directly
-            result.append(item)
-
-    return result
+    elif operand.op_id:
+        return Column(operand.op_id)
+    # An unset number is 0 as well, so it is checked last
+    return Number(operand.op_num)
+
+
+# The object processors to register on the metamodel (see beaver.language.get_metamodel)
+FEATURE_PROCESSORS = {
+    'Data': data_action,
+    'Assignment': assignment_action,
+    'Expression': expression_action,
+    'Term': term_action,
+    'Factor': factor_action,
+    'Operand': operand_action,
+}
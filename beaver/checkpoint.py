@@ -0,0 +1,193 @@
+"""
+Model checkpointing for Beaver pipelines.
+
+Saving the model after every message dominates the per-event latency of a pipeline.
+This module moves persistence off the hot path: the pipeline only tells the
+Checkpointer that an event was processed, and a background writer thread takes a
+snapshot of the model and writes it to disk atomically whenever the policy says so.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import dill
+
+__all__ = ['CheckpointPolicy', 'Checkpointer', 'write_atomic']
+
+logger = logging.getLogger(__name__)
+
+
+def write_atomic(path: str, payload: bytes):
+    """
+    Write a file through a temporary file and a rename, so that readers
+    never see a partially written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(payload)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+@dataclass
+class CheckpointPolicy:
+    """
+    When a pipeline model should be written to disk.
+
+    Every trigger is optional and they can be combined. A checkpoint is requested
+    as soon as one of them fires.
+
+    Parameters
+    ----------
+    every_n_events : int, optional
+        Save the model every n processed events.
+    every_seconds : float, optional
+        Save the model at most every t seconds while events are flowing.
+    on_shutdown : bool
+        Save the model when the pipeline is closed.
+    on_improvement : str, optional
+        Name of a metric (e.g. 'Accuracy'). Save the model each time this metric
+        reaches a new best value.
+    path : str, optional
+        Destination file. Defaults to '<pipeline name>.pkl'.
+    """
+    every_n_events: Optional[int] = None
+    every_seconds: Optional[float] = 60.0
+    on_shutdown: bool = True
+    on_improvement: Optional[str] = None
+    path: Optional[str] = None
+
+
+class Checkpointer:
+    """
+    Background, policy driven model writer.
+
+    Parameters
+    ----------
+    policy : CheckpointPolicy
+        The checkpoint triggers.
+    path : str
+        The file the model is written to.
+    get_model : callable
+        Returns the object that should be serialized.
+    lock : threading.Lock
+        Lock held by the pipeline while it mutates the model. The writer holds it
+        while serializing so that it never pickles a half updated model.
+    bigger_is_better : bool
+        Direction of the improvement metric, if any.
+    """
+
+    def __init__(
+        self,
+        policy: CheckpointPolicy,
+        path: str,
+        get_model: Callable[[], object],
+        lock: threading.Lock,
+        bigger_is_better: bool = True
+        ):
+
+        self.policy = policy
+        self.path = path
+        self.get_model = get_model
+        self.lock = lock
+        self.bigger_is_better = bigger_is_better
+
+        self.events_since_checkpoint = 0
+        self.last_checkpoint_time = time.monotonic()
+        self.best_value = None
+        self.checkpoints_written = 0
+
+        self._requested = threading.Event()
+        self._closed = False
+        self._writer = None
+        self._io_lock = threading.Lock()
+
+    def notify(self, latest_metrics: Optional[dict] = None):
+        """
+        Record a processed event and request a checkpoint if a trigger fires.
+
+        This is called on the hot path so it only does counter and clock checks.
+        The best value of the improvement metric is tracked on every call, also when
+        another trigger fires, and at most one checkpoint is requested.
+        """
+        self.events_since_checkpoint += 1
+        policy = self.policy
+
+        fired = bool(policy.every_n_events) and self.events_since_checkpoint >= policy.every_n_events
+        if policy.every_seconds is not None and \
+                time.monotonic() - self.last_checkpoint_time >= policy.every_seconds:
+            fired = True
+        if policy.on_improvement and latest_metrics and policy.on_improvement in latest_metrics:
+            value = latest_metrics[policy.on_improvement]
+            if self._is_improvement(value):
+                self.best_value = value
+                fired = True
+
+        if fired:
+            self.request()
+
+    def request(self):
+        """Ask the background writer for a checkpoint. Pending requests are coalesced."""
+        if self._closed:
+            return
+        self.events_since_checkpoint = 0
+        self.last_checkpoint_time = time.monotonic()
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._run, name=f'checkpoint-{os.path.basename(self.path)}', daemon=True)
+            self._writer.start()
+        self._requested.set()
+
+    def close(self):
+        """Stop the writer and, if the policy asks for it, write a final checkpoint."""
+        if self._closed:
+            return
+        self._closed = True
+        self._requested.set()
+        if self._writer is not None:
+            self._writer.join()
+        if self.policy.on_shutdown:
+            self.write()
+
+    def write(self):
+        """Snapshot the model and write it atomically (temporary file + rename)."""
+        with self.lock:
+            payload = dill.dumps(self.get_model())
+
+        with self._io_lock:
+            write_atomic(self.path, payload)
+            self.checkpoints_written += 1
+
+    def _run(self):
+        while True:
+            self._requested.wait()
+            self._requested.clear()
+            if self._closed:
+                return
+            try:
+                self.write()
+            except Exception as exc:
+                logger.warning("Could not write checkpoint %s: %s", self.path, exc)
+
+    def _is_improvement(self, value) -> bool:
+        if value is None:
+            return False
+        if self.best_value is None:
+            return True
+        if self.bigger_is_better:
+            return value > self.best_value
+        return value < self.best_value
@@ -0,0 +1,468 @@
+"""
+Incremental updates of the live dashboard.
+
+Redrawing the figures of the dashboard on every tick of its dcc.Interval sends
+the whole history of every metric to the browser, so a refresh gets slower the
+longer a pipeline runs. Instead, a figure is drawn once and then only the
+points added since the previous tick are sent, through the extendData property
+of dcc.Graph.
+
+The browser keeps a cursor in a dcc.Store: how many values of every series it
+has already received. A figure is drawn from scratch only when there is no
+cursor yet (first load or reload of the page) or when the buffers of a pipeline
+dropped values that the browser has not received yet, e.g. with a slow refresh
+interval at a high message rate.
+
+Drawn figures are reduced to SCREEN_POINTS points per series with LTTB (see
+beaver.downsampling). The values sent afterwards are not reduced, so a figure
+is drawn again once SCREEN_POINTS values were appended to one of its traces.
+When the user zooms in, the visible range is drawn again from the values kept
+by the pipeline at the best resolution they have.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import plotly.graph_objs as go
+from river import base
+
+from beaver.buffers import BufferSnapshot, SeriesSnapshot
+from beaver.downsampling import downsample
+from beaver.errors import StatisticsWarning
+from beaver.summaries import ScatterSnapshot
+
+__all__ = ['SCREEN_POINTS', 'TraceExtension', 'PipelineSnapshot', 'PipelineView', 'stats_kind',
+           'metrics_cursor', 'extend_metrics', 'zoom_ranges']
+
+# Points of a series in a drawn figure, about the width of a plot in pixels
+SCREEN_POINTS = 1000
+
+
+@dataclass
+class TraceExtension:
+    """
+    New points of some traces of a figure.
+
+    Parameters
+    ----------
+    data : dict
+        For every attribute ('x', 'y') the list of new values of every trace.
+    traces : list of int
+        Indices of the extended traces in the figure.
+    max_points : list of int
+        Number of points every trace keeps in the browser. The oldest points are dropped.
+    """
+    data: Dict[str, List[list]]
+    traces: List[int]
+    max_points: List[int]
+
+    def to_dash(self) -> list:
+        """The value of the extendData property of a dcc.Graph."""
+        return [self.data, self.traces, {key: self.max_points for key in self.data}]
+
+
+@dataclass(frozen=True, eq=False)
+class PipelineSnapshot:
+    """
+    Immutable copy of the values of a pipeline that the dashboard shows (see PipelineView.snapshot).
+
+    Parameters
+    ----------
+    version : int
+        Number of updates of the values when the copy was made (twice the number of outputs).
+    timestamp : float
+        Time of the copy.
+    metrics : dict
+        The SeriesSnapshot of every metric.
+    y_true, y_pred : BufferSnapshot
+        The latest targets and predictions.
+    confusion_matrix : dict, optional
+        Counts of the confusion matrix of a classifier, by y_true and then by y_predicted.
+    classes : list
+        The sorted classes of the confusion matrix.
+    scatter : ScatterSnapshot, optional
+        The summaries of the (y_true, y_predicted) pairs of a regressor.
+    score_quantiles : dict, optional
+        Estimates of quantiles of the scores of an anomaly detector, by quantile.
+    cluster_counts : dict, optional
+        Counts of the latest predictions of a clusterer, by cluster. Without them
+        the counts are taken from y_pred.
+    """
+    version: int
+    timestamp: float
+    metrics: Dict[str, SeriesSnapshot]
+    y_true: BufferSnapshot
+    y_pred: BufferSnapshot
+    confusion_matrix: Optional[Dict] = None
+    classes: Tuple = ()
+    scatter: Optional[ScatterSnapshot] = None
+    score_quantiles: Optional[Dict[float, float]] = None
+    cluster_counts: Optional[Dict] = None
+
+
+def stats_kind(model) -> Optional[str]:
+    """
+    The statistics plot of a model: 'classifier' (confusion matrix), 'regressor'
+    (y_predicted against y_true), 'clusterer' (cluster counts), 'drift' (detections)
+    or 'anomaly' (scores). None if the dashboard has no statistics for the model.
+    """
+    if isinstance(model, base.Classifier):
+        return 'classifier'
+    if isinstance(model, base.Regressor):
+        return 'regressor'
+    if isinstance(model, base.Clusterer):
+        return 'clusterer'
+    if isinstance(model, base.DriftDetector):
+        return 'drift'
+    if isinstance(model, (base.AnomalyDetector, base.SupervisedAnomalyDetector)):
+        return 'anomaly'
+    return None
+
+
+class PipelineView:
+    """
+    The figures of a pipeline on the dashboard.
+
+    They are drawn from the snapshots of the pipeline only, so the same code draws
+    a Pipeline of the running application and a pipeline whose values are received
+    from another process (see beaver.telemetry). A subclass has a name, a
+    stats_kind (see stats_kind) and a snapshot method that returns the latest
+    PipelineSnapshot.
+    """
+    name: str
+    stats_kind: Optional[str] = None
+
+    def snapshot(self) -> PipelineSnapshot:
+        raise NotImplementedError
+
+    def add_metrics_traces(self, fig, row=1, col=1, max_points: Optional[int] = None, x_range: Optional[Tuple[float, float]] = None):
+        """
+        Add line plot traces for each metric into the given figure.
+        
+        Parameters
+        ----------
+        fig : plotly.graph_objs.Figure
+            The figure object to add traces to.
+        row : int
+            Row index of the subplot.
+        col : int
+            Column index of the subplot.
+        max_points : int, optional
+            Reduce every metric to at most max_points points with LTTB (see beaver.downsampling).
+        x_range : tuple, optional
+            Only the points within this range of iterations are drawn, e.g. when the
+            plot is zoomed in. They are downsampled only if there are more than max_points.
+        """
+        for metric_name, values in self.snapshot().metrics.items():
+            x, y = values.indices(), values.values()
+            if max_points is not None or x_range is not None:
+                x, y = downsample(x, y, max_points or len(x), x_range)
+            
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=y,
+                mode="lines",
+                name=f"{self.name} - {metric_name}",
+                #hoverinfo="y+name",
+                hovertemplate=f"{self.name} - {metric_name}"+"<br>Value:%{y}<br>Iteration:%{x}<extra></extra>"
+            ), row=row, col=col)
+        
+    def add_stats_traces(self,traces): #fig, row=1, col=1) : 
+        snapshot = self.snapshot()
+        
+        layout_updates = {}
+        
+        if self.stats_kind == 'classifier':
+            # Get unique labels from the actual predictions and true values
+            unique_labels = list(snapshot.classes)
+            
+            # Only create confusion matrix if we have data
+            if unique_labels:
+                # Read the counts of the incremental confusion matrix.
+                # .get is used because indexing the defaultdicts would add entries
+                cm_data = snapshot.confusion_matrix
+                cm = [
+                    [int(cm_data.get(y_true, {}).get(y_pred, 0)) for y_pred in unique_labels]
+                    for y_true in unique_labels
+                ]
+                
+                traces.append(go.Heatmap(
+                            z = cm,
+                            x=unique_labels,  # predicted (x-axis)
+                            y=unique_labels,  # true (y-axis)
+                            colorscale='Viridis',
+                            name=f"{self.name} Confusion Matrix",
+                            colorbar=dict(
+                                title='Count',
+                                #len=0.5,  # 50% of the plot height
+                                #xanchor='left'
+                                ),
+                            hovertemplate='y_true: %{y}<br>y_predicted: %{x}<br>Count: %{z}<extra></extra>'
+                    )
+                )
+                
+                # Return layout updates to fix axis ticks
+                layout_updates = {
+                    'xaxis': {
+                        'tickmode': 'array',
+                        'tickvals': unique_labels,
+                        'ticktext': [str(label) for label in unique_labels]
+                    },
+                    'yaxis': {
+                        'tickmode': 'array',
+                        'tickvals': unique_labels,
+                        'ticktext': [str(label) for label in unique_labels]
+                    }
+                }
+            
+        elif self.stats_kind == 'regressor':
+            # Drawn from the summaries of the whole stream, the cost does not grow with it
+            scatter = snapshot.scatter
+            if scatter is not None and scatter.total:
+                if scatter.density is not None:
+                    # Empty cells are left transparent
+                    density = np.where(scatter.density.z > 0, scatter.density.z, np.nan)
+                    traces.append(go.Heatmap(
+                                x=scatter.density.x,
+                                y=scatter.density.y,
+                                z=density,
+                                colorscale='Blues',
+                                name=f"{self.name} Density",
+                                colorbar=dict(title='Count'),
+                                hovertemplate='y_true: %{x}<br>y_predicted: %{y}<br>Count: %{z}<extra></extra>'
+                        )
+                    )
+                traces.append(go.Scatter(
+                            x=scatter.x,
+                            y=scatter.y,
+                            mode='markers',
+                            marker=dict(size=5, opacity=0.6),
+                            name=f"{self.name} Predictions (sample of {scatter.total})",
+                            hovertemplate='y_true: %{x}<br>y_predicted: %{y}<extra></extra>'
+                    )#, row=row, col=col
+                )
+                # Optionally, add a y=x reference line
+                traces.append(
+                    go.Scatter(
+                        x=[scatter.low, scatter.high],
+                        y=[scatter.low, scatter.high],
+                        mode='lines',
+                        line=dict(color='red', dash='dash'),
+                        name='Ideal: y = x',
+                        showlegend=True
+                    ),
+                    #row=row, col=col
+                )
+                
+                # Add axis titles for regressor
+                layout_updates = {
+                    'xaxis': {'title': 'y_true'},
+                    'yaxis': {'title': 'y_predicted'}
+                }
+        elif self.stats_kind == 'clusterer':
+            # Count occurrences of each cluster label in y_pred_list
+            cluster_counts = snapshot.cluster_counts if snapshot.cluster_counts is not None \
+                else Counter(snapshot.y_pred)
+            clusters = list(cluster_counts.keys())
+            #print(cluster_counts)
+            counts = list(cluster_counts.values())
+
+            traces.append(
+                go.Bar(
+                    x=clusters,
+                    y=counts,
+                    name=f"{self.name} Cluster Counts",
+                    #marker=dict(color='orange'),
+                    hovertemplate='Cluster: %{x}<br>Count: %{y}<extra></extra>'
+                )
+            )
+        elif self.stats_kind == 'drift':
+            
+            traces.append(
+                go.Scatter(
+                    x=snapshot.y_pred.tolist(),
+                    mode='markers',
+                    #marker=dict(color='red', size=10, symbol='x'),
+                    name='Drift Detected',
+                    hovertemplate='Drift detected at index: %{x}<extra></extra>'
+                )
+            )
+        
+        elif self.stats_kind == 'anomaly':
+            # LTTB keeps the peaks of the scores
+            x, scores = downsample(snapshot.y_pred.indices(), snapshot.y_pred.to_numpy(), SCREEN_POINTS)
+            traces.append(go.Scatter(
+                x=x,
+                y=scores,
+                mode='markers',
+                #marker=dict(color='blue', size=6, opacity=0.7),
+                name=f"{self.name} anomaly scores",
+                hovertemplate='Index: %{x}<br>Score: %{y}<extra></extra>'
+                )#, row=row, col=col
+            )
+            # Quantiles of the scores of the whole stream, as horizontal lines across the plot
+            quantiles = snapshot.score_quantiles or {}
+            layout_updates = {
+                'shapes': [
+                    dict(type='line', xref='paper', x0=0, x1=1, y0=value, y1=value,
+                         line=dict(color='red', dash='dot', width=1))
+                    for value in quantiles.values()
+                ],
+                'annotations': [
+                    dict(xref='paper', x=1, xanchor='right', y=value, yanchor='bottom', showarrow=False,
+                         text=f"p{quantile * 100:g}", font=dict(size=10, color='red'))
+                    for quantile, value in quantiles.items()
+                ],
+                'xaxis': {'title': 'Index'},
+                'yaxis': {'title': 'Score'}
+            }
+            
+        else : 
+            StatisticsWarning()
+        
+        return layout_updates
+
+    def stats_cursor(self) -> dict:
+        """
+        Cursor of a statistics figure that was just drawn with add_stats_traces.
+
+        It counts the predictions the browser has received and, for anomaly detectors, 
+        the scores appended since the figure was drawn and the quantile lines it shows 
+        (see extend_stats_traces).
+        """
+        snapshot = self.snapshot()
+        cursor = {'y_true': snapshot.y_true.total, 'y_pred': snapshot.y_pred.total}
+        if self.stats_kind == 'anomaly':
+            cursor['extended'] = 0
+            cursor['quantiles'] = list((snapshot.score_quantiles or {}).values())
+        return cursor
+
+    def extend_stats_traces(self, cursor: dict) -> Tuple[Optional[TraceExtension], Optional[dict]]:
+        """
+        The points of the statistics figure that the browser has not received yet.
+
+        The new predictions are appended to the plots of drift detectors and anomaly 
+        detectors. The confusion matrix, the cluster counts and the summaries of a 
+        regressor do not grow with the predictions, these figures are drawn again when 
+        there are new ones. The scores of an anomaly detector are drawn again once 
+        SCREEN_POINTS were appended or when a quantile line moved by more than 1%.
+
+        Returns the extension (None if nothing changed) and the new cursor. The cursor is 
+        None if the figure has to be drawn again (see beaver.dashboard).
+        """
+        snapshot = self.snapshot()
+        position = cursor['y_pred']
+        y_pred = snapshot.y_pred.since(position)
+        if y_pred is None:
+            return None, None
+        if not len(y_pred):
+            return None, cursor
+
+        if self.stats_kind in ('classifier', 'regressor', 'clusterer'):
+            return None, None
+
+        elif self.stats_kind == 'drift':
+            data = {'x': [y_pred.tolist()]}
+            new_cursor = {**cursor, 'y_pred': position + len(y_pred)}
+
+        elif self.stats_kind == 'anomaly':
+            extended = cursor.get('extended', 0) + len(y_pred)
+            quantiles = list((snapshot.score_quantiles or {}).values())
+            drawn = cursor.get('quantiles', [])
+            if extended > SCREEN_POINTS or len(quantiles) != len(drawn) or any(
+                    abs(value - old) > 0.01 * abs(old) for value, old in zip(quantiles, drawn)):
+                return None, None
+            x = snapshot.y_pred.indices()[len(snapshot.y_pred) - len(y_pred):]
+            data = {'x': [x.tolist()], 'y': [y_pred.tolist()]}
+            new_cursor = {**cursor, 'y_pred': position + len(y_pred), 'extended': extended}
+
+        else:
+            return None, cursor
+
+        return TraceExtension(data, [0], [snapshot.y_pred.capacity]), new_cursor
+
+
+def _metric_series(pipelines: Sequence):
+    """The (key, series) of every metric trace, in the order add_metrics_traces adds them."""
+    for pipeline in pipelines:
+        for metric_name, series in pipeline.snapshot().metrics.items():
+            yield f'{pipeline.name}/{metric_name}', series
+
+
+def metrics_cursor(pipelines: Sequence) -> dict:
+    """Cursor of a metrics figure that was just drawn with add_metrics_traces."""
+    return {'positions': {key: series.total for key, series in _metric_series(pipelines)}, 'extended': 0}
+
+
+def extend_metrics(pipelines: Sequence, cursor: dict,
+                   max_extension: int = SCREEN_POINTS) -> Tuple[Optional[TraceExtension], Optional[dict]]:
+    """
+    The metric values of the pipelines that the browser has not received yet.
+
+    The figure has one trace per metric of every pipeline, in the order of
+    add_metrics_traces (see the live graph of the dashboard).
+
+    Returns the extension (None if there is no new value) and the new cursor.
+    The cursor is None if the figure has to be drawn again, also once more than
+    max_extension values were appended to a trace since it was drawn.
+    """
+    positions = cursor['positions']
+    data, traces, max_points = {'x': [], 'y': []}, [], []
+    new_positions, extended = {}, cursor['extended']
+    for trace, (key, series) in enumerate(_metric_series(pipelines)):
+        position = positions.get(key)
+        points = series.points_since(position) if position is not None else None
+        if points is None:
+            return None, None
+
+        # The cursor moves by the values that were read, a value appended meanwhile is sent next time
+        x, values = points
+        new_positions[key] = position + len(values)
+        if len(values):
+            data['x'].append(x.tolist())
+            data['y'].append(values.tolist())
+            traces.append(trace)
+            max_points.append(series.max_points)
+            extended = max(extended, cursor['extended'] + len(values))
+
+    if len(new_positions) != len(positions) or extended > max_extension:
+        return None, None
+    new_cursor = {'positions': new_positions, 'extended': extended}
+    return (TraceExtension(data, traces, max_points) if traces else None), new_cursor
+
+
+def _axis_name(row: int) -> str:
+    return 'xaxis' if row == 1 else f'xaxis{row}'
+
+
+def zoom_ranges(relayout_data: Optional[dict], rows: int, zoom: Optional[dict] = None) -> Dict[str, List[float]]:
+    """
+    The x ranges of the zoomed in subplots after a relayout event of a figure.
+
+    Parameters
+    ----------
+    relayout_data : dict
+        The relayoutData property of the dcc.Graph.
+    rows : int
+        Number of subplots, one per row.
+    zoom : dict, optional
+        The ranges before the event.
+
+    Returns
+    -------
+    dict
+        The [start, end] range of every zoomed in row (as a string, the keys of JSON objects).
+        A row that shows its whole x axis has no range.
+    """
+    zoom = dict(zoom or {})
+    for row in range(1, rows + 1 if relayout_data else 1):
+        axis = _axis_name(row)
+        if relayout_data.get(f'{axis}.autorange'):
+            zoom.pop(str(row), None)
+        elif f'{axis}.range[0]' in relayout_data and f'{axis}.range[1]' in relayout_data:
+            zoom[str(row)] = [relayout_data[f'{axis}.range[0]'], relayout_data[f'{axis}.range[1]']]
+        elif f'{axis}.range' in relayout_data:
+            zoom[str(row)] = list(relayout_data[f'{axis}.range'])
+    return zoom
@@ -0,0 +1,181 @@
+"""
+Aggregated delivery reports of a Kafka producer.
+
+Printing every delivered message makes the console the bottleneck of a producer.
+A DeliveryReporter is passed as the on_delivery callback of produce. It only
+updates counters and keeps a sample of the latencies, and every interval seconds
+it hands a DeliveryReport (delivered, failed, bytes, latency percentiles) to
+its sinks. A sink is any callable that takes a DeliveryReport:
+
+- print_sink prints one line per report,
+- LoggingSink logs the reports,
+- JsonLinesSink appends them to a file, e.g. to plot a load test afterwards.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+__all__ = ['DeliveryReport', 'DeliveryReporter', 'print_sink', 'LoggingSink', 'JsonLinesSink']
+
+Sink = Callable[['DeliveryReport'], None]
+
+
+@dataclass
+class DeliveryReport:
+    """
+    Deliveries of one reporting interval. The latencies are in milliseconds and
+    None if no message was delivered in the interval.
+    """
+    timestamp: float
+    seconds: float
+    delivered: int
+    failed: int
+    bytes: int
+    latency_p50: Optional[float] = None
+    latency_p95: Optional[float] = None
+    latency_p99: Optional[float] = None
+    latency_max: Optional[float] = None
+    errors: Dict[str, int] = field(default_factory=dict)
+    total_delivered: int = 0
+    total_failed: int = 0
+
+    @property
+    def rate(self) -> float:
+        """Delivered messages per second."""
+        return self.delivered / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        line = (f"{self.delivered} delivered ({self.rate:,.0f} msg/s, {self.bytes / 1e6:.2f} MB), "
+                f"{self.failed} failed")
+        if self.latency_p50 is not None:
+            line += (f", latency p50 {self.latency_p50:.1f} ms, p95 {self.latency_p95:.1f} ms, "
+                     f"p99 {self.latency_p99:.1f} ms, max {self.latency_max:.1f} ms")
+        if self.errors:
+            line += ", errors: " + ", ".join(f"{name} x{count}" for name, count in self.errors.items())
+        return line
+
+
+def print_sink(report: DeliveryReport):
+    print(f"📨 {report}")
+
+
+class LoggingSink:
+    """Log the reports, at warning level if messages failed."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger if logger is not None else logging.getLogger("quixstreams")
+
+    def __call__(self, report: DeliveryReport):
+        self.logger.log(logging.WARNING if report.failed else logging.INFO, str(report))
+
+
+class JsonLinesSink:
+    """Append every report to a file as a JSON line."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __call__(self, report: DeliveryReport):
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps({**asdict(report), 'rate': report.rate}) + '\n')
+
+
+class DeliveryReporter:
+    """
+    Delivery callback that aggregates the delivery reports of a producer.
+
+    The latency percentiles are computed from a uniform sample (reservoir sampling)
+    of at most max_samples latencies per interval, so the memory does not grow with
+    the rate. The maximum is exact.
+
+    Parameters
+    ----------
+    interval : float
+        Seconds between two reports. The check happens when a delivery is reported,
+        i.e. while the producer is polled.
+    sinks : list of callable, optional
+        Receivers of the reports. Default is print_sink.
+    max_samples : int
+        Latencies kept per interval for the percentiles.
+    """
+
+    def __init__(self, interval: float = 5.0, sinks: Optional[Sequence[Sink]] = None, max_samples: int = 10_000):
+        if interval <= 0:
+            raise ValueError(f"The report interval must be positive, got {interval}")
+        self.interval = interval
+        self.sinks: List[Sink] = list(sinks) if sinks is not None else [print_sink]
+        self.max_samples = max_samples
+        self.total_delivered = 0
+        self.total_failed = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        self._reset(time.time())
+
+    def __call__(self, err, msg):
+        with self._lock:
+            if err:
+                self._failed += 1
+                self._errors[err.name() if hasattr(err, 'name') else str(err)] += 1
+            else:
+                self._delivered += 1
+                value = msg.value()
+                self._bytes += len(value) if value else 0
+                latency = msg.latency()
+                if latency is not None:
+                    self._sample(latency * 1000.0)
+            due = time.time() - self._start >= self.interval
+        if due:
+            self.report()
+
+    def report(self) -> DeliveryReport:
+        """Send the report of the current interval to the sinks and start a new interval."""
+        now = time.time()
+        with self._lock:
+            self.total_delivered += self._delivered
+            self.total_failed += self._failed
+            report = DeliveryReport(
+                timestamp=now, seconds=now - self._start, delivered=self._delivered, failed=self._failed,
+                bytes=self._bytes, errors=dict(self._errors),
+                total_delivered=self.total_delivered, total_failed=self.total_failed)
+            if self._latencies:
+                report.latency_p50, report.latency_p95, report.latency_p99 = (
+                    float(value) for value in np.percentile(self._latencies, [50, 95, 99]))
+                report.latency_max = self._latency_max
+            self._reset(now)
+
+        for sink in self.sinks:
+            sink(report)
+        return report
+
+    def close(self) -> DeliveryReport:
+        """Report the last, partial interval. Call it after the producer was flushed."""
+        return self.report()
+
+    def _reset(self, now: float):
+        self._start = now
+        self._delivered = 0
+        self._failed = 0
+        self._bytes = 0
+        self._errors = Counter()
+        self._latencies = []
+        self._latency_max = None
+        self._seen = 0
+
+    def _sample(self, latency: float):
+        self._seen += 1
+        if self._latency_max is None or latency > self._latency_max:
+            self._latency_max = latency
+        if len(self._latencies) < self.max_samples:
+            self._latencies.append(latency)
+        else:
+            index = self._random.randrange(self._seen)
+            if index < self.max_samples:
+                self._latencies[index] = latency
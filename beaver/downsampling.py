@@ -0,0 +1,94 @@
+"""
+Downsampling of long series for plotting.
+
+A browser cannot draw a line of millions of points, and a screen cannot show
+more points than it has pixels anyway. Largest-Triangle-Three-Buckets (LTTB,
+Steinarsson 2013) reduces a series to a given number of points while keeping
+its visual shape: the series is cut into buckets and from every bucket the
+point that forms the largest triangle with the point kept from the previous
+bucket and the average of the next bucket is kept. Unlike averaging, peaks
+and drops of a metric survive.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+__all__ = ['lttb', 'downsample', 'visible_range']
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    Parameters
+    ----------
+    x, y : numpy.ndarray
+        The points, sorted by x. The values must not be NaN.
+    n_out : int
+        Number of points to keep, at least 3. The first and the last point are always kept.
+
+    Returns
+    -------
+    numpy.ndarray
+        The sorted indices of the kept points, all the indices if there are at most n_out points.
+    """
+    if n_out < 3:
+        raise ValueError(f"LTTB keeps at least 3 points, got {n_out}")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= n_out:
+        return np.arange(n)
+
+    # n_out - 2 buckets between the first and the last point
+    every = (n - 2) / (n_out - 2)
+    edges = (np.floor(np.arange(n_out - 1) * every) + 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    kept = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The third corner of the triangle is the average of the next bucket (the last point at the end)
+        next_start, next_end = (end, edges[bucket + 2]) if bucket + 2 < len(edges) else (n - 1, n)
+        next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+
+        areas = np.abs((x[kept] - next_x) * (y[start:end] - y[kept])
+                       - (x[kept] - x[start:end]) * (next_y - y[kept]))
+        kept = start + int(np.argmax(areas))
+        selected[bucket + 1] = kept
+    return selected
+
+
+def visible_range(x: np.ndarray, x_range: Tuple[float, float]) -> slice:
+    """
+    The slice of the sorted x values inside x_range, with one more point on each
+    side so that a line still reaches the edges of the plot.
+    """
+    start = max(int(np.searchsorted(x, x_range[0], side='left')) - 1, 0)
+    end = min(int(np.searchsorted(x, x_range[1], side='right')) + 1, len(x))
+    return slice(start, end)
+
+
+def downsample(x: np.ndarray, y: np.ndarray, n_out: int,
+               x_range: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    At most n_out points of a series, optionally restricted to the visible x_range.
+
+    NaN values (e.g. a metric that is not defined yet) are dropped when the series
+    has to be reduced, they would be drawn as gaps otherwise.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    if x_range is not None:
+        visible = visible_range(x, x_range)
+        x, y = x[visible], y[visible]
+    if len(x) <= n_out:
+        return x, y
+
+    finite = ~np.isnan(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    kept = lttb(x, y, n_out)
+    return x[kept], y[kept]
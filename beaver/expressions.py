@@ -0,0 +1,254 @@
+"""
+Compiler of the generated_features of a data block.
+
+The assignments of a data block (grammar/components.tx) are parsed into small
+expression trees (Number, Column, Negate, BinaryOp). compile_features turns the
+assignments of a data block into a FeatureProgram:
+
+- Constant subexpressions are folded, e.g. ``x * (2 + 1)`` becomes ``x * 3``.
+  Operations are never reordered, so the results are the same as without folding.
+- A feature that refers to a feature generated before it reuses its value.
+- Subexpressions and columns that are used more than once are computed once
+  and kept in a local variable (common subexpression elimination).
+
+The program is rendered as one function per data block. For a data block read by
+per message pipelines it updates a message in a single StreamingDataFrame.apply,
+instead of one dataframe operation per assignment. For a data block only read by
+micro-batch pipelines it computes the features of a whole window with numpy.
+"""
+
+import math
+import operator
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+__all__ = ['Number', 'Column', 'Negate', 'BinaryOp', 'Assignment', 'FeatureProgram', 'compile_features']
+
+_OPERATORS = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
+
+_PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+_UNARY_PRECEDENCE = 3
+
+
+@dataclass(frozen=True)
+class Number:
+    value: Union[int, float]
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+
+
+@dataclass(frozen=True)
+class Negate:
+    operand: 'Node'
+
+
+@dataclass(frozen=True)
+class BinaryOp:
+    operator: str
+    left: 'Node'
+    right: 'Node'
+
+
+Node = Union[Number, Column, Negate, BinaryOp]
+
+
+@dataclass(frozen=True)
+class Assignment:
+    """A generated feature: column = expression."""
+    variable: str
+    expression: Node
+
+
+def fold(node: Node) -> Node:
+    """Replace the operations on constants by their result."""
+    if isinstance(node, Negate):
+        operand = fold(node.operand)
+        if isinstance(operand, Number):
+            return Number(-operand.value)
+        return Negate(operand)
+    if isinstance(node, BinaryOp):
+        left, right = fold(node.left), fold(node.right)
+        if isinstance(left, Number) and isinstance(right, Number) \
+                and not (node.operator == '/' and right.value == 0):
+            # A division by zero is left to fail when the message is processed
+            value = _OPERATORS[node.operator](left.value, right.value)
+            if math.isfinite(value):
+                return Number(value)
+        return BinaryOp(node.operator, left, right)
+    return node
+
+
+def _substitute(node: Node, generated: Dict[str, Node]) -> Node:
+    """Replace the references to generated features by their expressions."""
+    if isinstance(node, Column):
+        return generated.get(node.name, node)
+    if isinstance(node, Negate):
+        return Negate(_substitute(node.operand, generated))
+    if isinstance(node, BinaryOp):
+        return BinaryOp(node.operator, _substitute(node.left, generated), _substitute(node.right, generated))
+    return node
+
+
+def _children(node: Node) -> List[Node]:
+    if isinstance(node, Negate):
+        return [node.operand]
+    if isinstance(node, BinaryOp):
+        return [node.left, node.right]
+    return []
+
+
+def _precedence(node: Node) -> int:
+    if isinstance(node, BinaryOp):
+        return _PRECEDENCE[node.operator]
+    if isinstance(node, Number) and node.value < 0:
+        return _UNARY_PRECEDENCE
+    if isinstance(node, Negate):
+        return _UNARY_PRECEDENCE
+    return _UNARY_PRECEDENCE + 1
+
+
+class FeatureProgram:
+    """
+    The generated features of a data block, compiled to straight line code.
+
+    Parameters
+    ----------
+    assignments : list of Assignment
+        The assignments in the order of the .bvr file. An assignment can use the
+        features generated before it.
+    """
+
+    def __init__(self, assignments: List[Assignment]):
+        self.assignments = list(assignments)
+
+        # Every output as an expression of the input columns only
+        generated = {}
+        self.outputs = []
+        for assignment in self.assignments:
+            expression = fold(_substitute(assignment.expression, generated))
+            generated[assignment.variable] = expression
+            self.outputs.append((assignment.variable, expression))
+
+        # Count the uses of every subexpression. The operands of an expression
+        # that is used more than once are computed with it, so they are only counted once
+        uses = {}
+
+        def count(node):
+            uses[node] = uses.get(node, 0) + 1
+            if uses[node] == 1:
+                for child in _children(node):
+                    count(child)
+
+        for _, expression in self.outputs:
+            count(expression)
+        self._shared = {node for node, used in uses.items() if used > 1 and not isinstance(node, Number)}
+
+        self.inputs = []
+        for _, expression in self.outputs:
+            self._collect_inputs(expression)
+
+    @property
+    def columns(self) -> List[str]:
+        """The generated columns, in order and without duplicates."""
+        return list(dict.fromkeys(variable for variable, _ in self.outputs))
+
+    def _collect_inputs(self, node: Node):
+        if isinstance(node, Column):
+            if node.name not in self.inputs:
+                self.inputs.append(node.name)
+        for child in _children(node):
+            self._collect_inputs(child)
+
+    def row_statements(self, row: str = 'row') -> List[str]:
+        """
+        Statements that add the generated features to the message dict ``row``.
+
+        Every column that is read more than once is looked up once and every shared
+        subexpression is evaluated once.
+        """
+        statements, names = [], {}
+
+        def column(name):
+            return f'{row}["{name}"]'
+
+        for variable, expression in self.outputs:
+            source = self._source(expression, names, statements, column)
+            statements.append(f'{column(variable)} = {source}')
+        return statements
+
+    def batch_statements(self, rows: str = 'rows', result: str = 'result') -> List[str]:
+        """
+        Statements that compute the generated features of a list of message dicts
+        ``rows`` with numpy and store the updated copies of the messages in ``result``.
+
+        The input columns are converted to float arrays, so a generated feature is
+        always a float. A division by zero gives inf or nan and a RuntimeWarning
+        instead of an exception.
+        """
+        statements, names = [], {}
+
+        def column(name):
+            return f'np.array([message["{name}"] for message in {rows}], dtype=float)'
+
+        # The value of a reassigned column is the last one
+        values = {}
+        for number, (variable, expression) in enumerate(self.outputs):
+            source = self._source(expression, names, statements, column)
+            if isinstance(expression, Number):
+                values[variable] = source
+            elif not self._reads_columns(expression):
+                # A constant that could not be folded
+                statements.append(f'_f{number} = {source}')
+                values[variable] = f'_f{number}'
+            else:
+                statements.append(f'_f{number} = ({source}).tolist()')
+                values[variable] = f'_f{number}[index]'
+
+        items = ', '.join(f'"{variable}": {value}' for variable, value in values.items())
+        statements.append(f'{result} = [{{**message, {items}}} for index, message in enumerate({rows})]')
+        return statements
+
+    def _reads_columns(self, node: Node) -> bool:
+        return isinstance(node, Column) or any(self._reads_columns(child) for child in _children(node))
+
+    def _source(self, node: Node, names: Dict[Node, str], statements: List[str], column) -> str:
+        """Python source of an expression. Shared subexpressions are assigned to locals the first time they are met."""
+        if node in names:
+            return names[node]
+
+        if isinstance(node, Number):
+            source = repr(node.value)
+        elif isinstance(node, Column):
+            source = column(node.name)
+        elif isinstance(node, Negate):
+            operand = self._source(node.operand, names, statements, column)
+            if _precedence(node.operand) < _UNARY_PRECEDENCE:
+                operand = f'({operand})'
+            source = f'-{operand}'
+        else:
+            left = self._source(node.left, names, statements, column)
+            right = self._source(node.right, names, statements, column)
+            precedence = _PRECEDENCE[node.operator]
+            # The operators are left associative, a right operand of the same precedence keeps its parentheses
+            if _precedence(node.left) < precedence and node.left not in names:
+                left = f'({left})'
+            if _precedence(node.right) <= precedence and node.right not in names:
+                right = f'({right})'
+            source = f'{left} {node.operator} {right}'
+
+        if node in self._shared:
+            local = f'_t{len(names)}'
+            statements.append(f'{local} = {source}')
+            names[node] = local
+            return local
+        return source
+
+
+def compile_features(assignments: Optional[List[Assignment]]) -> Optional[FeatureProgram]:
+    """Compile the assignments of a data block. Returns None if the data block generates no features."""
+    if not assignments:
+        return None
+    return FeatureProgram(assignments)
@@ -0,0 +1,103 @@
+"""
+Splitting of raw messages into features and target.
+
+The messages of a topic almost always have the same shape, so instead of
+flattening every message and filtering the target out with a dict comprehension,
+the FeatureExtractor learns the shape of the first message, builds an extraction
+plan for it and reuses the plan until a message with a different shape arrives.
+"""
+
+from typing import Any, Optional, Tuple
+
+from flatten_dict import flatten
+
+__all__ = ['FeatureExtractor']
+
+
+def _shape(message: dict) -> tuple:
+    """Keys of a nested message, used to detect when the plan has to be rebuilt."""
+    return tuple(
+        (key, _shape(value)) if isinstance(value, dict) else key
+        for key, value in message.items()
+    )
+
+
+class FeatureExtractor:
+    """
+    Split messages into a flat feature dict and the target value.
+
+    Nested keys are joined with underscores, like flatten(X, reducer='underscore').
+
+    Flat messages (the common case) take a fast path: the message is copied and the
+    target is popped. For nested messages the key paths of every feature are cached.
+
+    Parameters
+    ----------
+    y : str, optional
+        The (flattened) name of the target. If None, every key is a feature.
+    """
+
+    def __init__(self, y: Optional[str] = None):
+        self.y = y
+        self.plans_built = 0
+
+        self._signature = None
+        self._flat = True
+        # (path, flattened name) of every feature of a nested message
+        self._feature_paths = ()
+        self._target_path = None
+
+    def split(self, message: dict) -> Tuple[dict, Any]:
+        """
+        Return the features and the target of a message.
+
+        The target is None if the extractor has no target name.
+        """
+        if self._flat:
+            # A key of the plan may hold a nested dict from now on
+            if tuple(message) != self._signature or any(isinstance(value, dict) for value in message.values()):
+                self._build_plan(message)
+        elif _shape(message) != self._signature:
+            self._build_plan(message)
+
+        if self._flat:
+            X = dict(message)
+            y = X.pop(self.y) if self.y else None
+            return X, y
+
+        X = {key: _lookup(message, path) for path, key in self._feature_paths}
+        y = _lookup(message, self._target_path) if self._target_path else None
+        return X, y
+
+    def _build_plan(self, message: dict):
+        self.plans_built += 1
+        self._flat = not any(isinstance(value, dict) for value in message.values())
+
+        if self._flat:
+            if self.y and self.y not in message:
+                raise KeyError(self.y)
+            self._signature = tuple(message)
+            self._feature_paths = ()
+            self._target_path = None
+            return
+
+        self._signature = _shape(message)
+        self._feature_paths = []
+        self._target_path = None
+        for path in flatten(message):
+            key = '_'.join(str(part) for part in path)
+            if key == self.y:
+                self._target_path = path
+            else:
+                self._feature_paths.append((path, key))
+        self._feature_paths = tuple(self._feature_paths)
+
+        if self.y and self._target_path is None:
+            raise KeyError(self.y)
+
+
+def _lookup(message: dict, path: tuple):
+    value = message
+    for part in path:
+        value = value[part]
+    return value
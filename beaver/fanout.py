@@ -0,0 +1,116 @@
+"""
+Single pass fan-out of a data block to the pipelines that read it.
+
+When several pipelines use the same data block, applying every pipeline to the
+streaming dataframe on its own means each message is flattened, split and
+preprocessed once per pipeline. The shared preprocessor is even updated once
+per pipeline. A FanOut does this work once per message and hands the prepared
+features to every pipeline.
+"""
+
+import threading
+from typing import List, Optional
+
+from river import compose
+
+from beaver.extraction import FeatureExtractor
+
+__all__ = ['FanOut', 'preprocess']
+
+
+def _learn_step(step, x: dict, y=None) -> dict:
+    """
+    Update a step of a River pipeline with a message and return the message transformed,
+    in the order of compose.Pipeline.learn_one: an unsupervised step learns before it
+    transforms the message, a supervised one after. The transformers of a union are
+    handled one by one, a nested pipeline as a whole.
+    """
+    if isinstance(step, compose.TransformerUnion):
+        transformers = list(step.transformers.values())
+        for transformer in transformers:
+            if not transformer._supervised:
+                transformer.learn_one(x)
+        x_next = step.transform_one(x)
+        for transformer in transformers:
+            if transformer._supervised:
+                transformer.learn_one(x, y)
+        return x_next
+
+    if step._supervised:
+        x_next = step.transform_one(x)
+        step.learn_one(x, y)
+        return x_next
+    step.learn_one(x)
+    return step.transform_one(x)
+
+
+def preprocess(preprocessor, X: dict, y=None):
+    """
+    Run a River transformer on a message like a River pipeline does.
+
+    The features used for the prediction are transformed before the transformer
+    learns from the message. The features used for learning are those that
+    compose.Pipeline(preprocessor, model).learn_one passes to the model: an
+    unsupervised preprocessor transforms the message after it learned from it,
+    a supervised one before.
+
+    Returns
+    -------
+    tuple
+        (features for predict, features for learn)
+    """
+    x_predict = preprocessor.transform_one(X)
+    x_learn = _learn_step(preprocessor, X, y)
+    return x_predict, x_learn
+
+
+class FanOut:
+    """
+    Dispatch each message of a data block to several pipelines.
+
+    The message is split into features and target once, the shared preprocessor is
+    run once and every pipeline trains and predicts on the result. The pipelines
+    should not contain the preprocessor in their model, it is passed to them with
+    the preprocessor parameter so that it is part of their checkpoints.
+
+    Parameters
+    ----------
+    pipelines : list of Pipeline
+        The pipelines that read the data block.
+    preprocessor : object, optional
+        The River transformer shared by the pipelines.
+    y : str, optional
+        The target of the data block.
+
+    Returns a dict with the output of every pipeline keyed by the pipeline name.
+    """
+
+    def __init__(self, pipelines: List, preprocessor=None, y: Optional[str] = None):
+        for pipeline in pipelines:
+            if pipeline.y != y:
+                raise ValueError(
+                    f"Pipeline {pipeline.name} has target {pipeline.y} but the fan-out has target {y}.")
+
+        self.pipelines = list(pipelines)
+        self.preprocessor = preprocessor
+        self.extractor = FeatureExtractor(y)
+
+        # The preprocessor is shared, so the pipelines share a lock with the fan-out.
+        # That way a checkpoint never serializes the preprocessor while it learns
+        self.lock = threading.RLock()
+        for pipeline in self.pipelines:
+            pipeline.share_lock(self.lock)
+
+    def __call__(self, message: dict) -> dict:
+        X, y = self.extractor.split(message)
+
+        if self.preprocessor is None:
+            x_predict = x_learn = X
+        else:
+            with self.lock:
+                x_predict, x_learn = preprocess(self.preprocessor, X, y)
+
+        return {
+            pipeline.name: pipeline.train_and_predict_prepared(X, y, x_predict, x_learn)
+            for pipeline in self.pipelines
+        }
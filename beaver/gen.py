@@ -1,8 +1,8 @@
 # %%
-from textx import metamodel_from_file
-from jinja2 import Environment, FileSystemLoader
+from beaver.language import get_metamodel
+from beaver.rendering import MAIN_TEMPLATE, get_environment
 import argparse
-from calc import * 
+from beaver.calc import FEATURE_PROCESSORS
 from textx.export import metamodel_export, PlantUmlRenderer
 
 # %%
@@ -22,34 +22,20 @@ def parse_command_line_arguments():
 # %%
 if __name__ == "__main__":
 
-    processors = {
-        'Data': data_action,
-        'Assignment': assignment_action,
-        'Expression': expression_action,
-        'Term': term_action,
-        'Factor': factor_action,
-        'Operand': operand_action,
-    }
-
     args = parse_command_line_arguments()
 
     # Load the DSL grammar
-    ml_mm = metamodel_from_file('grammar/pipeline.tx')
-    
-    ml_mm.register_obj_processors(processors)
+    ml_mm = get_metamodel(FEATURE_PROCESSORS)
 
     # Parse the DSL configuration file
     config = ml_mm.model_from_file(args.metamodel)
     #metamodel_export(ml_mm, 'metamodel.pu', renderer=PlantUmlRenderer())    
     # %%
     #Load Jinja2 template
-    env = Environment(loader=FileSystemLoader('.'))
-    template = env.get_template('templates/models.jinja')
+    env = get_environment()
+    template = env.get_template(MAIN_TEMPLATE)
 
-    flattened_dict = dict_flatten(outpout)
-    #print(flattened_dict)
-    generated_code = template.render(
-        file=config , assignments=flattened_dict)
+    generated_code = template.render(file=config)
     
     # Save the generated code to a file
     with open(args.generated_file_name, 'w') as f:
@@ -5,17 +5,21 @@ This script generates Python code from Beaver DSL files and performs comprehensi
 
 import argparse
 import ast
+import hashlib
+import json
 import sys
+from importlib import metadata
 from pathlib import Path
-from textx import metamodel_from_file
-from jinja2 import Environment, FileSystemLoader
-from beaver.calc import *
+from typing import Optional
+from beaver.cache import cache_dir
+from beaver.checkpoint import write_atomic
+from beaver.language import get_metamodel
+from beaver.rendering import MAIN_TEMPLATE, get_environment
+from beaver.calc import FEATURE_PROCESSORS
 from beaver.validator import validate_beaver_model, ModelValidator
-import subprocess
-import tempfile
 
 
-def parse_command_line_arguments():
+def parse_command_line_arguments(argv=None):
     parser = argparse.ArgumentParser(description='Enhanced Pipeline generator with validation')
     
     parser.add_argument('--metamodel', default='examples/model.bvr',
@@ -30,10 +34,12 @@ def parse_command_line_arguments():
                        help='Check Python syntax of generated code')
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be generated without writing files')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Parse, validate and render even if the file did not change')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose output')
     
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def validate_generated_syntax(code: str) -> tuple[bool, str]:
@@ -62,12 +68,12 @@ def validate_generated_syntax(code: str) -> tuple[bool, str]:
 
 def test_generated_code(code: str, file_path: str) -> tuple[bool, str]:
     """
-    Test if the generated code can be imported and basic functionality works.
+    Test if the generated code can be compiled to bytecode.
     What it does:
 
-    Creates temporary file: Writes generated code to a temp .py file
-    Compilation test: Uses py_compile to check if Python can compile it
-    Cleanup: Removes temporary file
+    Compilation test: Uses compile() like py_compile does, in this process
+    Unlike ast.parse this also catches errors that are only found by the compiler 
+    (e.g. 'return' outside function)
     Returns: Success boolean + message
     Args:
         code: Generated Python code
@@ -77,34 +83,70 @@ def test_generated_code(code: str, file_path: str) -> tuple[bool, str]:
         Tuple[bool, str]: (success, message)
     """
     try:
-        # Create a temporary file to test imports
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
-            temp_file.write(code)
-            temp_file_path = temp_file.name
-        
-        # Try to compile the file
-        result = subprocess.run(
-            [sys.executable, '-m', 'py_compile', temp_file_path],
-            capture_output=True,
-            text=True
-        )
-        
-        # Clean up
-        # Remove the temporary file
-        Path(temp_file_path).unlink()
-        
-        # If compilation was successful, return True
-        if result.returncode == 0:
-            return True, "Code compilation successful"
-        else:
-            return False, f"Compilation failed: {result.stderr}"
-            
+        compile(code, file_path, 'exec')
+        return True, "Code compilation successful"
+    except SyntaxError as e:
+        return False, f"Compilation failed: {e.msg} ({file_path}, line {e.lineno})"
     except Exception as e:
         return False, f"Testing failed: {str(e)}"
 
 
+class GenerationCache:
+    """
+    Results of previous generations of a .bvr file.
+    
+    An entry holds the validation report, the generated code and the statistics 
+    of a file. It is keyed by the hash of the .bvr file, of the Beaver sources 
+    (grammar, templates and code) and of the installed River version, so any change 
+    to one of them makes it a miss. Entries are JSON files in the Beaver cache directory.
+    """
+    
+    def __init__(self, input_file: str):
+        digest = hashlib.sha256(generation_fingerprint().encode())
+        digest.update(Path(input_file).read_bytes())
+        self.path = cache_dir() / 'generated' / f'{digest.hexdigest()}.json'
+        self.hits = []
+    
+    def load(self) -> dict:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+    
+    def save(self, entry: dict):
+        try:
+            write_atomic(str(self.path), json.dumps(entry).encode('utf-8'))
+        except OSError:
+            pass
+
+
+_generation_fingerprint = None
+
+
+def generation_fingerprint() -> str:
+    """Hash of everything besides the .bvr file that the generated code depends on."""
+    global _generation_fingerprint
+    if _generation_fingerprint is None:
+        package_dir = Path(__file__).resolve().parent
+        digest = hashlib.sha256(metadata.version('river').encode())
+        for pattern in ('*.py', 'grammar/*.tx', 'templates/*.jinja'):
+            for source in sorted(package_dir.glob(pattern)):
+                digest.update(source.name.encode())
+                digest.update(source.read_bytes())
+        _generation_fingerprint = digest.hexdigest()
+    return _generation_fingerprint
+
+
 def generate_code_with_validation(args):
-    """Main function to generate code with comprehensive validation."""
+    """
+    Main function to generate code with comprehensive validation.
+    
+    Unless --no-cache is given, the validation report and the generated code of an 
+    unchanged .bvr file are taken from the GenerationCache, so the file is not even parsed.
+    The output file is only written when its content changes.
+    """
     
     if args.verbose:
         print(f"🚀 Starting Beaver code generation...")
@@ -112,36 +154,49 @@ def generate_code_with_validation(args):
         print(f"📄 Output file: {args.generated_file_name}")
     
     try:
-        # Define processors for DSL parsing
-        processors = {
-            'Data': data_action,
-            'Assignment': assignment_action,
-            'Expression': expression_action,
-            'Term': term_action,
-            'Factor': factor_action,
-            'Operand': operand_action,
-        }
+        cache = None if args.no_cache else GenerationCache(args.metamodel)
+        entry = cache.load() if cache else {}
+        parsed = []
         
-        # Load the DSL grammar
-        if args.verbose:
-            print("📚 Loading DSL grammar...")
-        
-        ml_mm = metamodel_from_file('beaver/grammar/pipeline.tx')
-        ml_mm.register_obj_processors(processors)
-        
-        # Parse the DSL configuration file
-        if args.verbose:
-            print(f"🔍 Parsing configuration file: {args.metamodel}")
-        
-        config = ml_mm.model_from_file(args.metamodel)
+        def parse():
+            """Parse the .bvr file the first time the model is needed."""
+            if parsed:
+                return parsed[0]
+            
+            # Load the DSL grammar
+            if args.verbose:
+                print("📚 Loading DSL grammar...")
+            
+            ml_mm = get_metamodel(FEATURE_PROCESSORS)
+            
+            # Parse the DSL configuration file
+            if args.verbose:
+                print(f"🔍 Parsing configuration file: {args.metamodel}")
+            
+            config = ml_mm.model_from_file(args.metamodel)
+            
+            entry['statistics'] = {
+                'models': len(config.models) if hasattr(config, 'models') and config.models else 0,
+                'data': len(config.data) if hasattr(config, 'data') and config.data else 0,
+                'pipelines': len(config.pipelines) if hasattr(config, 'pipelines') and config.pipelines else 0,
+            }
+            parsed.append(config)
+            return config
         
         # Perform static validation
         if not args.skip_validation:
             if args.verbose:
                 print("🔍 Performing static validation...")
             
-            # Use the ModelValidator for validating the Model 
-            is_valid, validation_report = validate_beaver_model(config)
+            if 'valid' in entry:
+                is_valid, validation_report = entry['valid'], entry['validation_report']
+                cache.hits.append('validation')
+            else:
+                # Use the ModelValidator for validating the Model 
+                is_valid, validation_report = validate_beaver_model(parse())
+                entry['valid'], entry['validation_report'] = is_valid, validation_report
+                if cache:
+                    cache.save(entry)
             
             print("\n" + validation_report)
             
@@ -157,30 +212,37 @@ def generate_code_with_validation(args):
             print("✅ Validation complete. Exiting as requested.")
             return True
         
-        # Load Jinja2 template
-        if args.verbose:
-            print("🔧 Loading Jinja2 template...")
-        
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template('beaver/templates/models.jinja')
-        
-        # Prepare template data
-        # If DSL has feature engineering like:
-        # outpout gets populated during parsing:
-        flattened_dict = dict_flatten(outpout) if 'outpout' in globals() else {}
-        
-        # Generate code
-        if args.verbose:
-            print("⚙️ Generating Python code...")
-        
-        #  creates Python code using Jinja syntax:  
-        generated_code = template.render(
-            file=config,
-            assignments=flattened_dict
-        )
+        if 'code' in entry:
+            generated_code = entry['code']
+            cache.hits.append('render')
+        else:
+            config = parse()
+            
+            # Load Jinja2 template
+            if args.verbose:
+                print("🔧 Loading Jinja2 template...")
+            
+            env = get_environment()
+            template = env.get_template(MAIN_TEMPLATE)
+            
+            # Generate code
+            if args.verbose:
+                print("⚙️ Generating Python code...")
+            
+            #  creates Python code using Jinja syntax:  
+            generated_code = template.render(
+                file=config
+            )
+            entry['code'] = generated_code
+            if cache:
+                cache.save(entry)
         
         # Validate generated code syntax
-        if args.check_syntax:
+        if args.check_syntax and entry.get('syntax_checked'):
+            print("✅ Syntax validation passed (cached)")
+            print("✅ Code compilation successful (cached)")
+            cache.hits.append('syntax')
+        elif args.check_syntax:
             if args.verbose:
                 print("🔍 Checking generated code syntax...")
             
@@ -192,8 +254,7 @@ def generate_code_with_validation(args):
             else:
                 print(f"✅ {syntax_message}")
         
-        # Test code compilation
-        if args.check_syntax:
+            # Test code compilation
             if args.verbose:
                 print("🧪 Testing code compilation...")
             
@@ -204,32 +265,43 @@ def generate_code_with_validation(args):
                 return False
             else:
                 print(f"✅ {compile_message}")
+            
+            entry['syntax_checked'] = True
+            if cache:
+                cache.save(entry)
         
         # Output or save the generated code
+        written = False
         if args.dry_run:
             print("\n🔍 DRY RUN - Generated code preview:")
             print("=" * 50)
             print(generated_code[:1000] + "..." if len(generated_code) > 1000 else generated_code)
             print("=" * 50)
             print(f"📊 Total code length: {len(generated_code)} characters")
+        elif _file_content(args.generated_file_name) == generated_code:
+            # Leave the file untouched so that its timestamp does not trigger rebuilds
+            print(f"✅ Generated code is up to date: {args.generated_file_name}")
         else:
             # Save the generated code to a file
             with open(args.generated_file_name, 'w') as f:
                 f.write(generated_code)
+            written = True
             
             print(f"✅ Generated code saved to: {args.generated_file_name}")
         
         # Additional statistics
         if args.verbose:
-            model_count = len(config.models) if hasattr(config, 'models') and config.models else 0
-            data_count = len(config.data) if hasattr(config, 'data') and config.data else 0
-            pipeline_count = len(config.pipelines) if hasattr(config, 'pipelines') and config.pipelines else 0
+            statistics = entry['statistics']
             
             print(f"\n📊 Generation Statistics:")
-            print(f"   Models: {model_count}")
-            print(f"   Data sources: {data_count}")
-            print(f"   Pipelines: {pipeline_count}")
+            print(f"   Models: {statistics['models']}")
+            print(f"   Data sources: {statistics['data']}")
+            print(f"   Pipelines: {statistics['pipelines']}")
             print(f"   Code lines: {len(generated_code.splitlines())}")
+            if cache:
+                print(f"   Cache hits: {', '.join(cache.hits) if cache.hits else 'none'}")
+            if not args.dry_run:
+                print(f"   Output file: {'written' if written else 'unchanged'}")
         
         return True
         
@@ -241,9 +313,22 @@ def generate_code_with_validation(args):
         return False
 
 
-def main():
-    """Main entry point for the enhanced code generator."""
-    args = parse_command_line_arguments()
+def _file_content(path: str) -> Optional[str]:
+    """Content of a file, or None if it cannot be read."""
+    try:
+        with open(path) as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def main(argv=None) -> int:
+    """
+    Main entry point for the enhanced code generator.
+    
+    Returns the exit code, so the CLI can call it in-process.
+    """
+    args = parse_command_line_arguments(argv)
     
     success = generate_code_with_validation(args)
     
@@ -254,11 +339,11 @@ def main():
         print("\n💥 Process failed!")
         exit_code = 1
     
-    sys.exit(exit_code)
+    return exit_code
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
 
 """
@@ -0,0 +1,137 @@
+"""
+Named librdkafka tuning profiles for producers and consumers.
+
+The defaults of librdkafka favour neither latency nor throughput. A profile
+bundles the settings that matter for one goal:
+
+- ``low-latency``: send every message at once and fetch as soon as a byte is available.
+- ``high-throughput``: large, compressed batches and large fetches.
+- ``exactly-once``: idempotent producing, only committed messages are read
+  and the generated applications use the exactly-once processing guarantee.
+
+The profiles are used by the producer and consumer helpers of kafka_proj, by
+the replay and load generator tools (through their producer config) and by the
+``profile`` of the connector block of a .bvr file.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+__all__ = ['KafkaProfile', 'PROFILES', 'get_profile', 'producer_config', 'consumer_config', 'application_options']
+
+
+@dataclass(frozen=True)
+class KafkaProfile:
+    """
+    librdkafka settings of a profile.
+
+    Parameters
+    ----------
+    producer : dict
+        Producer settings.
+    consumer : dict
+        Consumer settings.
+    processing_guarantee : str, optional
+        The processing guarantee of a quixstreams Application.
+    """
+    producer: Dict = field(default_factory=dict)
+    consumer: Dict = field(default_factory=dict)
+    processing_guarantee: Optional[str] = None
+
+
+PROFILES = {
+    'low-latency': KafkaProfile(
+        producer={
+            'linger.ms': 0,
+            'batch.size': 16 * 1024,
+            'compression.type': 'none',
+            'acks': 1,
+            'enable.idempotence': False,
+            'queue.buffering.max.messages': 100_000,
+        },
+        consumer={
+            'fetch.min.bytes': 1,
+            'fetch.wait.max.ms': 10,
+            'fetch.queue.backoff.ms': 0,
+            'queued.min.messages': 1000,
+            'partition.assignment.strategy': 'cooperative-sticky',
+        }),
+    'high-throughput': KafkaProfile(
+        producer={
+            'linger.ms': 50,
+            'batch.size': 1024 * 1024,
+            'batch.num.messages': 100_000,
+            'compression.type': 'lz4',
+            'acks': 1,
+            'enable.idempotence': False,
+            'queue.buffering.max.messages': 1_000_000,
+            'queue.buffering.max.kbytes': 1024 * 1024,
+        },
+        consumer={
+            'fetch.min.bytes': 1024 * 1024,
+            'fetch.wait.max.ms': 100,
+            'fetch.max.bytes': 50 * 1024 * 1024,
+            'max.partition.fetch.bytes': 10 * 1024 * 1024,
+            'queued.min.messages': 500_000,
+            'queued.max.messages.kbytes': 256 * 1024,
+            'partition.assignment.strategy': 'cooperative-sticky',
+        }),
+    'exactly-once': KafkaProfile(
+        producer={
+            'enable.idempotence': True,
+            'acks': 'all',
+            'max.in.flight.requests.per.connection': 5,
+            'linger.ms': 5,
+            'compression.type': 'lz4',
+        },
+        consumer={
+            'isolation.level': 'read_committed',
+            'enable.auto.commit': False,
+            'partition.assignment.strategy': 'range',
+        },
+        processing_guarantee='exactly-once'),
+}
+
+
+def get_profile(name: str) -> KafkaProfile:
+    """Return a profile by name. Raises ValueError for an unknown profile."""
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown Kafka profile {name!r}, choose one of: {', '.join(PROFILES)}") from None
+
+
+def producer_config(profile: Optional[str] = None, **overrides) -> dict:
+    """Producer settings of a profile (none without a profile) updated with overrides."""
+    config = dict(get_profile(profile).producer) if profile else {}
+    config.update(overrides)
+    return config
+
+
+def consumer_config(profile: Optional[str] = None, **overrides) -> dict:
+    """Consumer settings of a profile (none without a profile) updated with overrides."""
+    config = dict(get_profile(profile).consumer) if profile else {}
+    config.update(overrides)
+    return config
+
+
+def application_options(profile: str, processing_guarantee: Optional[str] = None) -> dict:
+    """
+    Keyword arguments of a quixstreams Application for a profile.
+
+    quixstreams manages the commits and the partition assignment of its consumer
+    itself, so those settings are left out. An explicit processing_guarantee
+    wins over the one of the profile.
+    """
+    kafka_profile = get_profile(profile)
+    options = {
+        'consumer_extra_config': {
+            setting: value for setting, value in kafka_profile.consumer.items()
+            if setting not in ('enable.auto.commit', 'partition.assignment.strategy')
+        },
+        'producer_extra_config': dict(kafka_profile.producer),
+    }
+    guarantee = processing_guarantee or kafka_profile.processing_guarantee
+    if guarantee:
+        options['processing_guarantee'] = guarantee
+    return options
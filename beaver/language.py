@@ -0,0 +1,60 @@
+"""
+Loading of the Beaver DSL grammar.
+
+Building the textX metamodel parses all the grammar files, which costs more than
+parsing a .bvr file with it. The generators and the analyzer get the metamodel
+from get_metamodel, which builds it once per process. The metamodel is kept per
+grammar fingerprint, so an edited grammar is picked up without a restart.
+
+Parsing a model does not change the metamodel (textX clones the parser for
+every model), so the models of several files can be parsed in threads.
+
+The metamodel is not persisted to disk: textX creates the classes of the
+grammar rules at runtime and they cannot be pickled.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+
+from textx import metamodel_from_file
+
+__all__ = ['GRAMMAR_DIR', 'grammar_fingerprint', 'get_metamodel']
+
+GRAMMAR_DIR = Path(__file__).resolve().parent / 'grammar'
+
+_metamodels = {}
+_lock = threading.Lock()
+
+
+def grammar_fingerprint() -> str:
+    """Hash of the contents of all the grammar files."""
+    digest = hashlib.sha256()
+    for grammar_file in sorted(GRAMMAR_DIR.glob('*.tx')):
+        digest.update(grammar_file.name.encode())
+        digest.update(grammar_file.read_bytes())
+    return digest.hexdigest()
+
+
+def get_metamodel(processors: Optional[dict] = None):
+    """
+    Return the metamodel of the Beaver DSL, building it on first use.
+
+    Parameters
+    ----------
+    processors : dict, optional
+        Object processors (rule name -> callable) registered on the metamodel.
+        They replace the processors of a previous call.
+    """
+    fingerprint = grammar_fingerprint()
+    with _lock:
+        metamodel = _metamodels.get(fingerprint)
+        if metamodel is None:
+            metamodel = metamodel_from_file(str(GRAMMAR_DIR / 'pipeline.tx'))
+            _metamodels.clear()
+            _metamodels[fingerprint] = metamodel
+
+        if processors is not None:
+            metamodel.register_obj_processors(processors)
+    return metamodel
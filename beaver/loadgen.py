@@ -0,0 +1,333 @@
+"""
+Load generator that streams River datasets into a Kafka topic.
+
+A single producer process cannot reach the rates a pipeline has to be tested at
+and a fixed rate does not show how a pipeline copes with changes of load. The
+load generator:
+
+- streams any River dataset (``Phishing``) or synthetic generator (``synth.Agrawal``),
+- spreads the stream over several producer processes. For a dataset, process i
+  produces the samples i, i + n, i + 2n, ... so the messages are the same
+  whatever the number of processes. A synthetic generator with a seed is not
+  read n times: every process runs its own generator with seed + i,
+- keys every message with a feature of the sample (or its index), so messages
+  with the same key land in the same partition,
+- follows a RateProfile: a base rate, an optional linear ramp up to it and
+  periodic bursts.
+
+Usage::
+
+    python -m beaver.loadgen synth.Agrawal --topic agrawal --processes 4 \\
+        --rate 20000 --ramp 30 --burst 100000:2:20 --duration 120
+"""
+
+import argparse
+import ast
+import inspect
+import itertools
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from beaver.kafka_profiles import PROFILES, producer_config
+from beaver.replay import DEFAULT_PRODUCER_CONFIG, ReplayReport, dumps, produce
+
+__all__ = ['RateProfile', 'LoadSpec', 'load_dataset', 'iter_messages', 'run_worker', 'generate_load', 'main']
+
+
+@dataclass
+class RateProfile:
+    """
+    Target rate of the messages over time.
+
+    Parameters
+    ----------
+    rate : float, optional
+        Messages per second once the ramp is over. None means as fast as possible.
+    ramp_seconds : float
+        The rate grows linearly from ramp_from to rate during the first ramp_seconds.
+    ramp_from : float
+        The rate at the start of the ramp.
+    burst_rate : float, optional
+        Messages per second during a burst.
+    burst_seconds : float
+        Length of a burst.
+    burst_every : float
+        Seconds from the start of a burst to the start of the next one. The first
+        burst starts after burst_every seconds.
+    """
+    rate: Optional[float] = None
+    ramp_seconds: float = 0.0
+    ramp_from: float = 0.0
+    burst_rate: Optional[float] = None
+    burst_seconds: float = 0.0
+    burst_every: float = 0.0
+
+    def rate_at(self, elapsed: float) -> Optional[float]:
+        """Messages per second after elapsed seconds, None for as fast as possible."""
+        if self.burst_rate and self.burst_every > 0 and elapsed >= self.burst_every \
+                and elapsed % self.burst_every < self.burst_seconds:
+            return self.burst_rate
+        if self.rate is None:
+            return None
+        if elapsed < self.ramp_seconds:
+            return self.ramp_from + (self.rate - self.ramp_from) * elapsed / self.ramp_seconds
+        return self.rate
+
+    def scaled(self, factor: float) -> 'RateProfile':
+        """The same profile with all the rates multiplied by factor, e.g. the share of one process."""
+        return RateProfile(
+            rate=self.rate * factor if self.rate is not None else None,
+            ramp_seconds=self.ramp_seconds,
+            ramp_from=self.ramp_from * factor,
+            burst_rate=self.burst_rate * factor if self.burst_rate else None,
+            burst_seconds=self.burst_seconds,
+            burst_every=self.burst_every)
+
+
+@dataclass
+class LoadSpec:
+    """What a load generator process produces and where (see generate_load)."""
+    dataset: str
+    topic: str
+    bootstrap_server: str = 'localhost:39092'
+    params: Optional[Dict] = None
+    target: str = 'y'
+    key_field: Optional[str] = None
+    limit: Optional[int] = None
+    duration: Optional[float] = None
+    profile: Optional[RateProfile] = None
+    producer_config: Optional[Dict] = None
+
+
+def _dataset_class(name: str) -> type:
+    from river import datasets
+
+    module = datasets
+    *modules, class_name = name.split('.')
+    for module_name in modules:
+        module = getattr(module, module_name, None)
+    dataset_class = getattr(module, class_name, None) if module is not None else None
+    if not isinstance(dataset_class, type):
+        raise ValueError(f"river.datasets has no dataset {name!r}")
+    return dataset_class
+
+
+def load_dataset(name: str, params: Optional[Dict] = None):
+    """
+    Create a River dataset from its name, e.g. 'Phishing' or 'synth.Agrawal'.
+
+    params are passed to the constructor, e.g. {'seed': 42} for a synthetic generator.
+    """
+    return _dataset_class(name)(**(params or {}))
+
+
+def _is_seeded(name: str) -> bool:
+    """Whether a dataset is a generator that takes a seed."""
+    return 'seed' in inspect.signature(_dataset_class(name)).parameters
+
+
+def iter_messages(dataset, target: str = 'y', start: int = 0, step: int = 1) -> Iterator[Tuple[int, dict]]:
+    """
+    The (index, message) pairs of the samples start, start + step, ... of a dataset.
+
+    The message is the features of the sample and its target. A dict target
+    (multi-output datasets) is merged into the message.
+    """
+    for index, (x, y) in itertools.islice(enumerate(dataset), start, None, step):
+        message = dict(x)
+        if isinstance(y, dict):
+            message.update(y)
+        elif y is not None:
+            message[target] = y
+        yield index, message
+
+
+def run_worker(spec: LoadSpec, worker: int = 0, processes: int = 1, producer=None) -> dict:
+    """
+    Produce the share of one process of the load.
+
+    The rate of the profile is divided between the processes. Returns the ReplayReport as a dict.
+    """
+    if producer is None:
+        from confluent_kafka import Producer
+        producer = Producer({**DEFAULT_PRODUCER_CONFIG, 'bootstrap.servers': spec.bootstrap_server,
+                             **(spec.producer_config or {})})
+
+    profile = (spec.profile or RateProfile()).scaled(1 / processes)
+    limit = None
+    if spec.limit is not None:
+        # The samples worker, worker + processes, ... below the limit
+        limit = len(range(worker, spec.limit, processes))
+
+    report = ReplayReport()
+
+    def on_delivery(err, msg):
+        if err:
+            report.failed += 1
+        else:
+            report.delivered += 1
+
+    params = dict(spec.params or {})
+    if _is_seeded(spec.dataset):
+        # Every process generates its own stream instead of skipping the samples of the others
+        if params.get('seed') is not None:
+            params['seed'] += worker
+        samples = ((index * processes + worker, message)
+                   for index, message in iter_messages(load_dataset(spec.dataset, params), spec.target))
+    else:
+        samples = iter_messages(load_dataset(spec.dataset, params), spec.target, worker, processes)
+
+    start = last = polled = time.perf_counter()
+    credit = 0.0
+    for index, message in samples:
+        if limit is not None and report.messages >= limit:
+            break
+
+        # Earn credit at the rate of the profile, one message costs one credit
+        while True:
+            now = time.perf_counter()
+            elapsed = now - start
+            if spec.duration is not None and elapsed >= spec.duration:
+                break
+            rate = profile.rate_at(elapsed)
+            if rate is None:
+                credit = 1.0
+            else:
+                # Credit is capped so an idle moment does not turn into a burst
+                credit = min(credit + rate * (now - last), max(1.0, rate * 0.1))
+            last = now
+            if credit >= 1.0:
+                break
+            time.sleep(min(0.01, (1.0 - credit) / rate) if rate else 0.01)
+        if spec.duration is not None and elapsed >= spec.duration:
+            break
+        credit -= 1.0
+
+        value = dumps(message)
+        key = str(message.get(spec.key_field, index)) if spec.key_field else str(index)
+        produce(producer, spec.topic, value, key, on_delivery)
+        report.messages += 1
+        report.bytes += len(value)
+        # Serve the delivery reports at least every 0.1 s, also when the rate is low
+        if report.messages % 1000 == 0 or now - polled >= 0.1:
+            producer.poll(0)
+            polled = now
+
+    producer.flush()
+    report.seconds = time.perf_counter() - start
+    return report.to_dict()
+
+
+def generate_load(spec: LoadSpec, processes: int = 1) -> Tuple[ReplayReport, List[dict]]:
+    """
+    Run the load generator in several producer processes.
+
+    Returns the combined report (the seconds are those of the slowest process)
+    and the reports of the processes.
+    """
+    if processes < 1:
+        raise ValueError(f"The number of processes must be positive, got {processes}")
+
+    if processes == 1:
+        reports = [run_worker(spec)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(run_worker, spec, worker, processes) for worker in range(processes)]
+            reports = [future.result() for future in futures]
+
+    total = ReplayReport(
+        messages=sum(report['messages'] for report in reports),
+        bytes=sum(report['bytes'] for report in reports),
+        delivered=sum(report['delivered'] for report in reports),
+        failed=sum(report['failed'] for report in reports),
+        seconds=max(report['seconds'] for report in reports))
+    return total, reports
+
+
+def _parse_params(values: Optional[List[str]]) -> Dict:
+    params = {}
+    for value in values or []:
+        name, separator, literal = value.partition('=')
+        if not separator:
+            raise ValueError(f"A parameter must look like name=value, got {value!r}")
+        try:
+            params[name] = ast.literal_eval(literal)
+        except (ValueError, SyntaxError):
+            params[name] = literal
+    return params
+
+
+def _parse_burst(value: Optional[str]) -> Tuple[Optional[float], float, float]:
+    if not value:
+        return None, 0.0, 0.0
+    try:
+        rate, seconds, every = (float(part) for part in value.split(':'))
+    except ValueError as exc:
+        raise ValueError(f"A burst must look like rate:seconds:every, got {value!r}") from exc
+    return rate, seconds, every
+
+
+def _parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Stream a River dataset or synthetic generator to a Kafka topic')
+    parser.add_argument('dataset', help="River dataset, e.g. 'Phishing' or 'synth.Agrawal'")
+    parser.add_argument('--topic', '-t', required=True, help='Destination topic name')
+    parser.add_argument('--bootstrap_server', default='localhost:39092',
+                        help='Kafka bootstrap broker(s) (host[:port])')
+    parser.add_argument('--param', '-p', action='append',
+                        help='Parameter of the dataset, e.g. seed=42 (can be repeated)')
+    parser.add_argument('--target', default='y', help='Field of the target in the messages')
+    parser.add_argument('--key-field', help='Feature whose value is the message key (default: sample index)')
+    parser.add_argument('--processes', '-w', type=int, default=1, help='Number of producer processes')
+    parser.add_argument('--rate', '-r', type=float, help='Total messages per second (default: as fast as possible)')
+    parser.add_argument('--ramp', type=float, default=0.0, help='Seconds to ramp up linearly to the rate')
+    parser.add_argument('--ramp-from', type=float, default=0.0, help='Rate at the start of the ramp')
+    parser.add_argument('--burst', help='Bursts as rate:seconds:every, e.g. 50000:2:30')
+    parser.add_argument('--limit', '-n', type=int, help='Stop after n messages (needed for endless generators without --duration)')
+    parser.add_argument('--duration', '-d', type=float, help='Stop after this many seconds')
+    parser.add_argument('--profile', choices=list(PROFILES), help='Kafka tuning profile of the producers')
+    parser.add_argument('--json', action='store_true', help='Print the final report as JSON, the other messages go to stderr')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_arguments(argv)
+    # With --json stdout only carries the report
+    progress = sys.stderr if args.json else sys.stdout
+
+    try:
+        params = _parse_params(args.param)
+        burst_rate, burst_seconds, burst_every = _parse_burst(args.burst)
+        dataset = load_dataset(args.dataset, params)
+    except ValueError as exc:
+        print(f"❌ {exc}", file=progress)
+        return 1
+
+    if args.limit is None and args.duration is None and getattr(dataset, 'n_samples', None) is None:
+        print(f"❌ {args.dataset} never ends, set --limit or --duration", file=progress)
+        return 1
+
+    spec = LoadSpec(
+        dataset=args.dataset, topic=args.topic, bootstrap_server=args.bootstrap_server, params=params,
+        target=args.target, key_field=args.key_field, limit=args.limit, duration=args.duration,
+        profile=RateProfile(rate=args.rate, ramp_seconds=args.ramp, ramp_from=args.ramp_from,
+                            burst_rate=burst_rate, burst_seconds=burst_seconds, burst_every=burst_every),
+        producer_config=producer_config(args.profile))
+
+    print(f"📤 Streaming {args.dataset} to {args.topic} with {args.processes} process(es)", file=progress)
+    total, reports = generate_load(spec, args.processes)
+
+    if args.json:
+        print(json.dumps({'total': total.to_dict(), 'processes': reports}))
+    else:
+        for worker, report in enumerate(reports):
+            print(f"   process {worker}: {report['messages']} messages, {report['rate']:,.0f} msg/s")
+        print(f"✅ {total}")
+    return 1 if total.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
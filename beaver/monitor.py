@@ -0,0 +1,323 @@
+"""
+Standalone dashboard of the pipelines that publish to a metrics topic.
+
+An application with a ``metrics_topic`` in its connector block does not serve a
+dashboard itself, it publishes compact summaries of its pipelines instead (see
+beaver.telemetry). This dashboard reads the topic in its own process, so
+drawing the figures never slows down the models, and shows every pipeline of
+every application (and worker) that publishes to the topic. A pipeline appears
+on the dashboard with its first summary.
+
+The figures are drawn and extended like those of the generated dashboard (see
+beaver.dashboard). Every pipeline has a status: how long ago its last summary
+arrived.
+
+Usage::
+
+    python -m beaver.monitor --topic beaver-metrics --bootstrap_server localhost:39092
+"""
+
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+import plotly.graph_objs as go
+from dash import ALL, MATCH, Dash, ctx, dcc, html, no_update
+from dash.dependencies import Input, Output, State
+from plotly.subplots import make_subplots
+
+from beaver.dashboard import SCREEN_POINTS, extend_metrics, metrics_cursor, zoom_ranges
+from beaver.telemetry import MetricsCollector
+
+__all__ = ['pipeline_status', 'stats_figure', 'create_app', 'main']
+
+TITLE_STYLE = {'color': '#2E86AB', 'fontFamily': 'Arial, sans-serif', 'marginBottom': '20px'}
+SECTION_STYLE = {
+    'backgroundColor': '#ffffff',
+    'padding': '20px',
+    'borderRadius': '10px',
+    'boxShadow': '0 2px 10px rgba(0,0,0,0.1)',
+    'margin': '0 20px 20px 20px'
+}
+CARD_STYLE = {
+    'backgroundColor': '#ffffff',
+    'padding': '15px',
+    'borderRadius': '8px',
+    'boxShadow': '0 2px 8px rgba(0,0,0,0.1)',
+    'border': '1px solid #e9ecef',
+    'textAlign': 'center'
+}
+
+
+def pipeline_status(pipeline, interval: float, now: Optional[float] = None) -> str:
+    """The status of a remote pipeline, from the age of its last summary."""
+    if pipeline.updated_at is None:
+        return "⚪ Waiting"
+    age = (time.time() if now is None else now) - pipeline.updated_at
+    if age <= 3 * interval:
+        return "🟢 Active"
+    if age <= 30 * interval:
+        return f"🟠 No update for {age:.0f}s"
+    return f"🔴 No update for {age:.0f}s"
+
+
+def stats_figure(pipeline) -> Optional[go.Figure]:
+    """The statistics figure of a pipeline, None if it has no statistics yet."""
+    traces = []
+    layout_updates = pipeline.add_stats_traces(traces)
+    if not traces:
+        return None
+
+    layout = {
+        'title': {'x': 0.5, 'xanchor': 'center', 'font': {'size': 16, 'color': '#2E86AB'}},
+        'plot_bgcolor': 'rgba(0,0,0,0)',
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'font': {'family': 'Arial, sans-serif'},
+        'margin': dict(t=60, b=40, l=60, r=60)
+    }
+    layout_updates.setdefault('xaxis', {}).setdefault('title', 'x-axis')
+    layout_updates.setdefault('yaxis', {}).setdefault('title', 'y-axis')
+    layout.update(layout_updates)
+    return go.Figure(data=traces, layout=go.Layout(**layout))
+
+
+def _empty_figure(text: str) -> go.Figure:
+    return go.Figure().add_annotation(
+        x=0.5, y=0.5, text=text, showarrow=False, font={'size': 16, 'color': '#666'}
+    ).update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis={'visible': False},
+        yaxis={'visible': False}
+    )
+
+
+def _title(pipeline) -> str:
+    return f"{pipeline.source} / {pipeline.name}"
+
+
+def _cards(pipelines: List) -> list:
+    width = max(100 // max(len(pipelines), 1) - 2, 18)
+    return [
+        html.Div([
+            html.Div([
+                html.H4(_title(pipeline), style={'margin': '0', 'color': '#2E86AB'}),
+                html.P(pipeline.model_name, style={'margin': '5px 0', 'color': '#666', 'fontSize': '0.9em'}),
+                html.Div(id={'type': 'status', 'index': key}, children="⚪ Waiting", style={'fontWeight': 'bold'})
+            ], style=CARD_STYLE)
+        ], style={'width': f'{width}%', 'display': 'inline-block', 'margin': '0 1% 10px 1%', 'verticalAlign': 'top'})
+        for key, pipeline in pipelines
+    ]
+
+
+def _stats_sections(pipelines: List) -> list:
+    return [
+        html.Div([
+            html.H4(f"{_title(pipeline)} Detailed Stats",
+                    style={'color': '#2E86AB', 'textAlign': 'center', 'marginBottom': '15px'}),
+            dcc.Graph(id={'type': 'live-stats', 'index': key},
+                      style={'height': '400px', 'border': '1px solid #e9ecef', 'borderRadius': '8px'}),
+            dcc.Store(id={'type': 'live-stats-cursor', 'index': key})
+        ], style={**CARD_STYLE, 'textAlign': 'left', 'margin': '10px 0'})
+        for key, pipeline in pipelines
+    ]
+
+
+def create_app(collector: MetricsCollector, interval: float = 2.0) -> Dash:
+    """
+    The Dash app of the dashboard.
+
+    Parameters
+    ----------
+    collector : MetricsCollector
+        Reads the metrics topic, it has to be started separately.
+    interval : float
+        Default seconds between two refreshes of the page.
+    """
+    dash_app = Dash(__name__)
+    dash_app.title = 'Beaver Dashboard'
+
+    dash_app.layout = html.Div([
+        html.Div([
+            html.H1("🦫 Beaver ML Pipeline Dashboard",
+                    style={'textAlign': 'center', 'color': '#2E86AB', 'fontFamily': 'Arial, sans-serif',
+                           'fontWeight': 'bold', 'margin': '20px 0', 'fontSize': '2.5em'}),
+            html.P(f"Pipelines publishing to {collector.topic}",
+                   style={'textAlign': 'center', 'color': '#666', 'fontFamily': 'Arial, sans-serif',
+                          'fontSize': '1.2em', 'marginBottom': '30px'})
+        ], style={'backgroundColor': '#f8f9fa', 'padding': '20px', 'borderBottom': '3px solid #2E86AB',
+                  'marginBottom': '20px'}),
+
+        html.Div([
+            html.H3("Dashboard Controls", style={'color': '#2E86AB', 'fontFamily': 'Arial, sans-serif'}),
+            html.Label("Update Interval (seconds):", style={'fontWeight': 'bold', 'marginRight': '10px'}),
+            dcc.Slider(id='interval-slider', min=1, max=10, step=1, value=min(max(round(interval), 1), 10),
+                       marks={i: str(i) for i in range(1, 11)},
+                       tooltip={"placement": "bottom", "always_visible": True})
+        ], style=SECTION_STYLE),
+
+        html.Div([
+            html.H3("Pipeline Status", style=TITLE_STYLE),
+            html.Div(id='pipeline-cards', children=html.P("Waiting for the first summary...", style={'color': '#666'}))
+        ], style=SECTION_STYLE),
+
+        html.Div([
+            html.H3("Live Performance Metrics", style=TITLE_STYLE),
+            dcc.Graph(id='live-graph', style={'height': '600px', 'border': '1px solid #e9ecef', 'borderRadius': '8px'}),
+            dcc.Store(id='live-graph-cursor'),
+            dcc.Store(id='live-graph-zoom')
+        ], style=SECTION_STYLE),
+
+        html.Div([
+            html.H3("Individual Pipeline Statistics", style=TITLE_STYLE),
+            html.Div(id='pipeline-stats')
+        ], style=SECTION_STYLE),
+
+        html.Div([
+            html.P("Powered by Beaver DSL 🦫 | Built with Plotly Dash",
+                   style={'textAlign': 'center', 'color': '#666', 'fontFamily': 'Arial, sans-serif', 'margin': '0'})
+        ], style={'backgroundColor': '#f8f9fa', 'padding': '15px', 'borderTop': '1px solid #e9ecef',
+                  'marginTop': '20px'}),
+
+        # The keys of the pipelines on the page, the sections are built again when a pipeline appears
+        dcc.Store(id='pipeline-keys', data=[]),
+        dcc.Interval(id='interval', n_intervals=0, interval=interval * 1000)
+    ], style={'backgroundColor': '#f5f5f5', 'minHeight': '100vh', 'fontFamily': 'Arial, sans-serif'})
+
+    def pipelines_of(keys):
+        # The collector only adds pipelines, the keys of the page are always there
+        pipelines = collector.pipelines
+        return [pipelines[key] for key in keys or [] if key in pipelines]
+
+    @dash_app.callback(Output('interval', 'interval'), Input('interval-slider', 'value'))
+    def update_interval(slider_value):
+        return slider_value * 1000
+
+    @dash_app.callback(
+        [Output('pipeline-cards', 'children'),
+         Output('pipeline-stats', 'children'),
+         Output('pipeline-keys', 'data')],
+        Input('interval', 'n_intervals'),
+        State('pipeline-keys', 'data')
+    )
+    def update_pipelines(n, keys):
+        current = sorted(collector.pipelines)
+        if not current or current == keys:
+            return no_update, no_update, no_update
+        pipelines = [(key, collector.pipelines[key]) for key in current]
+        return _cards(pipelines), _stats_sections(pipelines), current
+
+    @dash_app.callback(
+        Output({'type': 'status', 'index': ALL}, 'children'),
+        Input('interval', 'n_intervals'),
+        State('interval', 'interval'),
+        State({'type': 'status', 'index': ALL}, 'id')
+    )
+    def update_status(n, interval_ms, ids):
+        pipelines = collector.pipelines
+        return [pipeline_status(pipelines[status_id['index']], interval_ms / 1000) for status_id in ids]
+
+    @dash_app.callback(
+        [Output('live-graph', 'figure'),
+         Output('live-graph', 'extendData'),
+         Output('live-graph-cursor', 'data'),
+         Output('live-graph-zoom', 'data')],
+        [Input('interval', 'n_intervals'),
+         Input('live-graph', 'relayoutData'),
+         Input('pipeline-keys', 'data')],
+        [State('live-graph-cursor', 'data'),
+         State('live-graph-zoom', 'data')]
+    )
+    def update_graph(n, relayout_data, keys, cursor, zoom):
+        pipelines = pipelines_of(keys)
+        if not pipelines:
+            return _empty_figure("No pipeline has published yet..."), no_update, None, no_update
+        if ctx.triggered_id == 'pipeline-keys':
+            # New subplots, the zoom of the old ones does not apply anymore
+            zoom, cursor = {}, None
+        elif ctx.triggered_id == 'live-graph':
+            new_zoom = zoom_ranges(relayout_data, rows=len(pipelines), zoom=zoom)
+            if new_zoom == (zoom or {}):
+                return no_update, no_update, no_update, no_update
+            zoom, cursor = new_zoom, None
+
+        if cursor is not None:
+            extension, cursor = extend_metrics(pipelines, cursor)
+            if cursor is not None:
+                return no_update, extension.to_dash() if extension else no_update, cursor, no_update
+
+        cursor = metrics_cursor(pipelines)
+        zoom = zoom or {}
+        fig = make_subplots(rows=len(pipelines), cols=1, vertical_spacing=0.08 if len(pipelines) > 1 else 0,
+                            subplot_titles=[f"{_title(pipeline)} ({pipeline.model_name})" for pipeline in pipelines])
+        for row, pipeline in enumerate(pipelines, start=1):
+            pipeline.add_metrics_traces(fig=fig, row=row, col=1, max_points=SCREEN_POINTS,
+                                        x_range=zoom.get(str(row)))
+        fig.update_layout(
+            height=max(600, 250 * len(pipelines)),
+            title={'text': "Live Pipeline Performance Metrics", 'x': 0.5, 'xanchor': 'center',
+                   'font': {'size': 20, 'color': '#2E86AB'}},
+            margin=dict(t=80, b=40, l=60, r=60),
+            showlegend=True,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font={'family': 'Arial, sans-serif'},
+            uirevision='live-graph'
+        )
+        fig.update_annotations(font_size=14, font_color='#2E86AB')
+        return fig, no_update, cursor, zoom
+
+    @dash_app.callback(
+        [Output({'type': 'live-stats', 'index': MATCH}, 'figure'),
+         Output({'type': 'live-stats', 'index': MATCH}, 'extendData'),
+         Output({'type': 'live-stats-cursor', 'index': MATCH}, 'data')],
+        Input('interval', 'n_intervals'),
+        [State({'type': 'live-stats', 'index': MATCH}, 'id'),
+         State({'type': 'live-stats-cursor', 'index': MATCH}, 'data')]
+    )
+    def update_stats(n, graph_id, cursor):
+        pipeline = collector.pipelines[graph_id['index']]
+        if cursor is not None:
+            extension, cursor = pipeline.extend_stats_traces(cursor)
+            if cursor is not None:
+                return no_update, extension.to_dash() if extension else no_update, cursor
+
+        cursor = pipeline.stats_cursor()
+        fig = stats_figure(pipeline)
+        if fig is None:
+            return _empty_figure("No data available yet..."), no_update, None
+        return fig, no_update, cursor
+
+    return dash_app
+
+
+def _parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Dashboard of the pipelines that publish to a metrics topic')
+    parser.add_argument('--topic', '-t', required=True, help='The metrics_topic of the applications')
+    parser.add_argument('--bootstrap_server', default='localhost:39092',
+                        help='Kafka bootstrap broker(s) (host[:port])')
+    parser.add_argument('--host', default='0.0.0.0', help='Address the dashboard listens on')
+    parser.add_argument('--port', '-p', type=int, default=8050, help='Port of the dashboard')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between two refreshes of the page')
+    parser.add_argument('--from-beginning', action='store_true',
+                        help='Read the summaries already in the topic (default: only new ones)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_arguments(argv)
+
+    collector = MetricsCollector(args.topic, {'bootstrap.servers': args.bootstrap_server},
+                                 from_beginning=args.from_beginning)
+    collector.start()
+    print(f"📊 Dashboard of {args.topic} on http://{args.host}:{args.port}")
+    try:
+        create_app(collector, args.interval).run(debug=False, use_reloader=False, host=args.host, port=args.port)
+    finally:
+        collector.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Process parallel execution of the pipelines of a data block.
+
+A FanOut runs all the pipelines of a data block one after the other in the
+consumer process, so a file with several expensive models is bound by a single
+core. A ParallelFanOut spreads the pipelines over worker processes. Every decoded
+message is sent to all the workers over a pipe, the workers train and predict
+at the same time and their outputs are merged before they are produced to the
+output topics.
+
+The pipeline objects of the consumer process do not learn anymore. They mirror
+the outputs of the workers so the dashboard keeps working unchanged.
+"""
+
+import multiprocessing
+import traceback
+from typing import List, Optional
+
+from beaver.fanout import FanOut
+
+__all__ = ['ParallelFanOut']
+
+
+class _WorkerError:
+    """Traceback of an exception raised in a worker, sent back instead of the outputs."""
+
+    def __init__(self, worker: str, details: str):
+        self.worker = worker
+        self.details = details
+
+
+def _serve(connection, fanout: FanOut, worker: str):
+    """Main loop of a worker process. A None message closes the pipelines and stops the worker."""
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            # The consumer process is gone
+            message = None
+
+        if message is None:
+            try:
+                for pipeline in fanout.pipelines:
+                    pipeline.close()
+                result = True
+            except Exception:
+                result = _WorkerError(worker, traceback.format_exc())
+            try:
+                connection.send(result)
+            except OSError:
+                pass
+            connection.close()
+            return
+
+        try:
+            connection.send(fanout(message))
+        except Exception:
+            connection.send(_WorkerError(worker, traceback.format_exc()))
+
+
+class ParallelFanOut:
+    """
+    Dispatch each message of a data block to pipelines that run in worker processes.
+
+    The pipelines are assigned round robin to the workers. Each worker owns a copy of
+    its pipelines and of the preprocessor and runs them with a FanOut, so the shared
+    preprocessor is run once per worker instead of once per pipeline. The models,
+    their metrics and their checkpoints live in the workers.
+
+    The workers are forked when the ParallelFanOut is created, before the dashboard
+    thread and the consumer are started, so no pickling of the models is needed.
+    This requires the 'fork' start method (Linux and macOS).
+
+    Every call waits for the outputs of all the workers, so the messages are still
+    processed in order. The time of a message is the time of the slowest worker
+    plus the cost of sending the message, which pays off when the models are
+    expensive compared to the size of the messages.
+
+    Parameters
+    ----------
+    pipelines : list of Pipeline
+        The pipelines that read the data block.
+    processes : int
+        Number of worker processes. At most one worker per pipeline is started.
+    preprocessor : object, optional
+        The River transformer shared by the pipelines.
+    y : str, optional
+        The target of the data block.
+
+    Returns a dict with the output of every pipeline keyed by the pipeline name, like a FanOut.
+    """
+
+    def __init__(self, pipelines: List, processes: int, preprocessor=None, y: Optional[str] = None):
+        if processes < 1:
+            raise ValueError(f"ParallelFanOut needs at least 1 process, got {processes}")
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("ParallelFanOut needs the 'fork' start method, which is not available on this platform.")
+
+        self.pipelines = list(pipelines)
+        processes = min(processes, len(self.pipelines))
+        self.groups = [self.pipelines[index::processes] for index in range(processes)]
+
+        context = multiprocessing.get_context('fork')
+        self._connections = []
+        self._workers = []
+        self._closed = False
+        for group in self.groups:
+            worker = '+'.join(pipeline.name for pipeline in group)
+            connection, child_connection = context.Pipe()
+            process = context.Process(
+                target=_serve,
+                args=(child_connection, FanOut(group, preprocessor=preprocessor, y=y), worker),
+                name=f'beaver-{worker}',
+                daemon=True)
+            process.start()
+            child_connection.close()
+            self._connections.append(connection)
+            self._workers.append(process)
+
+    def __call__(self, message: dict) -> dict:
+        for connection in self._connections:
+            connection.send(message)
+
+        # Every reply is read before an error is raised, an unread reply would be
+        # taken for the answer to the next message
+        outputs = {}
+        errors = []
+        for connection in self._connections:
+            try:
+                outputs.update(self._receive(connection))
+            except RuntimeError as exc:
+                errors.append(exc)
+        if errors:
+            raise errors[0]
+
+        # Keep the pipelines of this process up to date for the dashboard
+        for pipeline in self.pipelines:
+            pipeline.observe(outputs[pipeline.name])
+
+        return {pipeline.name: outputs[pipeline.name] for pipeline in self.pipelines}
+
+    def close(self):
+        """Close the pipelines of the workers, which writes their final checkpoints, and stop the workers."""
+        if self._closed:
+            return
+        self._closed = True
+
+        errors = []
+        for connection in self._connections:
+            try:
+                connection.send(None)
+                self._receive(connection)
+            except (RuntimeError, OSError) as exc:
+                errors.append(exc)
+        for connection, process in zip(self._connections, self._workers):
+            connection.close()
+            process.join()
+        if errors:
+            raise errors[0]
+
+    def _receive(self, connection):
+        try:
+            result = connection.recv()
+        except EOFError as exc:
+            raise RuntimeError("A pipeline worker process exited unexpectedly.") from exc
+        if isinstance(result, _WorkerError):
+            raise RuntimeError(f"Pipeline worker {result.worker} failed:\n{result.details}")
+        return result
@@ -1,7 +1,8 @@
 from collections import deque , Counter
-from typing import List, Optional, Union
+import threading
+import time
+from typing import Callable, List, Optional, Union
 
-import dill
 from matplotlib import pyplot as plt
 from river import metrics
 import warnings
@@ -10,17 +11,23 @@ from matplotlib.animation import FuncAnimation
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
 from river import base, utils
-from sklearn.metrics import confusion_matrix
 import numpy as np
 from river.compose.pipeline import Pipeline as RiverPipeline
-from flatten_dict import flatten
-from river import anomaly
+import pandas as pd
+from river import compose
 from sklearn.preprocessing import LabelEncoder
+from beaver.checkpoint import CheckpointPolicy, Checkpointer
+from beaver.buffers import DownsampledSeries, RetentionPolicy, RingBuffer
+from beaver.dashboard import PipelineSnapshot, PipelineView, stats_kind
+from beaver.summaries import QuantileSketch, ScatterSummary
+from beaver.extraction import FeatureExtractor
+from beaver.fanout import preprocess
+from beaver.workers import worker_path
 
-__all__ = ['Pipeline']
+__all__ = ['Pipeline', 'PipelineSnapshot']
 
 
-class Pipeline:
+class Pipeline(PipelineView):
     """
     A class to represent a machine learning pipeline.
 
@@ -39,6 +46,19 @@ class Pipeline:
         The target y value
     output_topic : str, optional
         The Kafka topic to which the output will be sent. Default is None.
+    checkpoint : CheckpointPolicy, optional
+        When the model is saved to disk. Default is every 60 seconds and on shutdown.
+    batch_size : int, optional
+        Number of messages that train_and_predict_windowed collects before 
+        processing them as a micro-batch. Default is None (no micro-batching).
+    retention : RetentionPolicy, optional
+        How many metric values and predictions are kept in memory for the dashboard.
+    preprocessor : object, optional
+        A River transformer that is applied before the model. It is kept out of the model 
+        so that it can be shared by the pipelines of a FanOut, which runs it once per message.
+    features : callable, optional
+        Computes the generated features of a micro-batch. It takes the list of messages and 
+        returns the messages with the new features. Only used by train_and_predict_batch.
 
     """
 
@@ -49,18 +69,27 @@ class Pipeline:
         name: str,
         metrics_list: Optional[List[metrics.base.Metric]] = None,
         y: Optional[str] = None,
-        output_topic: Optional[str] = None
+        output_topic: Optional[str] = None,
+        checkpoint: Optional[CheckpointPolicy] = None,
+        batch_size: Optional[int] = None,
+        retention: Optional[RetentionPolicy] = None,
+        preprocessor = None,
+        features: Optional[Callable[[List[dict]], List[dict]]] = None
         ):
         
         self.model_name = model_name
         self.model_name = model_name
         self.y = y
+        self.extractor = FeatureExtractor(y)
         self.model = model
+        self.preprocessor = preprocessor
+        self.features = features
         self.output_topic = output_topic
         self.name = name
         self.metrics_list = metrics_list
         self.iteration = 0
         self.passed_seasonality = 0
+        self.retention = retention if retention is not None else RetentionPolicy()
         """
         Best Practices
             - Group Metrics by Type:
@@ -108,11 +137,48 @@ class Pipeline:
                         raise ValueError(
                             f"Unknown metric type: {metric.__class__.__name__}")
 
-                self.metrics_values[metric.__class__.__name__] = []
+                self.metrics_values[metric.__class__.__name__] = DownsampledSeries(
+                    recent_points=self.retention.recent_points,
+                    history_buckets=self.retention.history_buckets)
             
-        self.y_true_list = []
-        self.y_pred_list = []  
+        # Only the most recent values are kept so memory stays flat
+        self.y_true_list = RingBuffer(self.retention.stats_points)
+        self.y_pred_list = RingBuffer(self.retention.stats_points)
         self.label_encoder = LabelEncoder()
+
+        # For classifiers the confusion matrix is updated with every prediction 
+        # so the dashboard does not have to recompute it from the whole history
+        self.stats_kind = stats_kind(self._model_instance())
+        self.confusion_matrix = metrics.ConfusionMatrix() if self.stats_kind == 'classifier' else None
+        # Regressors and anomaly detectors summarize the whole stream in a fixed amount of memory
+        self.scatter = ScatterSummary(self.retention.sample_points) if self.stats_kind == 'regressor' else None
+        self.score_quantiles = QuantileSketch() if self.stats_kind == 'anomaly' else None
+
+        # The dashboard reads snapshots of the values above, published by the thread that updates them
+        self._writes = 0
+        self._snapshot = self._take_snapshot(0)
+        self._published_at = time.monotonic()
+        self._publish_lock = threading.Lock()
+
+        # Micro-batch mode. predict_many/learn_many are only used if the whole model supports them
+        self.batch_size = batch_size
+        self._window = []
+        self._mini_batch = self.preprocessor is None and _supports_mini_batch(self.model) and not (
+            self.metrics_list and self.metrics['probabilistic'] is not None
+            and not hasattr(self.model, 'predict_proba_many'))
+        
+        # The lock is held while the model is updated so that the checkpoint writer
+        # never serializes a model in the middle of learn_one
+        self._model_lock = threading.RLock()
+        self.checkpoint_policy = checkpoint if checkpoint is not None else CheckpointPolicy()
+        self.checkpointer = Checkpointer(
+            policy=self.checkpoint_policy,
+            # Every consumer worker writes its own checkpoint
+            path=worker_path(self.checkpoint_policy.path or f'{self.name}.pkl'),
+            get_model=self._full_model,
+            lock=self._model_lock,
+            bigger_is_better=self._metric_bigger_is_better(self.checkpoint_policy.on_improvement)
+        )
             
 
     def __str__(self):
@@ -124,57 +190,198 @@ class Pipeline:
         Add the values of metrics into a list and return a dict containing the 
         input data the prediction and the metrics values.
         """
-        X = flatten(X, reducer='underscore')
-        
-        #print('hi')
-        # If y exists we need to seperate it from the data
-        if self.y:
-            y = X[self.y]
-            X = {key: value for key, value in X.items() if key != self.y}
-            
-        y_predicted, y_predicted_proba = self._predict(X , y if 'y' in locals() else None)
-        # Train the model
-        if hasattr(self.model , 'learn_one' ): 
-            if self.model._supervised: 
-                self.model.learn_one(x=X, y=y)
+        # Flatten the message and seperate y from the data.
+        # The extractor reuses a cached plan as long as the message shape does not change
+        X, y = self.extractor.split(X)
+
+        return self.train_and_predict_prepared(X, y)
+
+    def train_and_predict_prepared(self, X: dict, y=None, x_predict: Optional[dict] = None, x_learn: Optional[dict] = None) -> dict:
+        """
+        Train the model and make predictions on a message that is already split into features and target.
+
+        A FanOut calls this after it has run the shared preprocessor once for all its pipelines. 
+        x_predict and x_learn are the preprocessed features used for the prediction and for 
+        the update of the model. If they are not given, the preprocessor of the pipeline 
+        (if any) is run here. X is the raw features, which are part of the output.
+        """
+        with self._model_lock:
+            if x_predict is None:
+                x_predict, x_learn = self._preprocess(X, y)
+
+            y_predicted, y_predicted_proba = self._predict(x_predict , y)
+            # Train the model
+            self._learn(x_learn, y)
+
+        return self._record_output(X, y, y_predicted, y_predicted_proba)
+
+    def train_and_predict_batch(self, batch: List[dict]) -> List[dict]:
+        """
+        Train the model on a micro-batch of messages and make predictions.
+
+        The messages are converted to a pandas DataFrame once. If every step of the model 
+        supports mini-batches, predict_many and learn_many are used. In that case all the 
+        rows of the batch are predicted before the model learns from them. 
+        Otherwise each row is predicted and learned in turn, like in train_and_predict.
+
+        Returns a list with one output dict per message.
+        """
+        if not batch:
+            return []
+        if self.features is not None:
+            batch = self.features(batch)
+
+        rows, y_list = [], []
+        for X in batch:
+            X, y = self.extractor.split(X)
+            rows.append(X)
+            y_list.append(y)
+
+        with self._model_lock:
+            if self._mini_batch:
+                frame = pd.DataFrame(rows)
+                y_predicted_list = self.model.predict_many(frame).tolist()
+                if self.metrics_list and self.metrics['probabilistic'] is not None:
+                    y_predicted_proba_list = self.model.predict_proba_many(frame).to_dict('records')
+                else:
+                    y_predicted_proba_list = [None] * len(rows)
+
+                if self.model._supervised:
+                    self.model.learn_many(frame, pd.Series(y_list))
+                else:
+                    self.model.learn_many(frame)
+                self.passed_seasonality += len(rows)
             else:
-                self.model.learn_one(x=X)
+                y_predicted_list, y_predicted_proba_list = [], []
+                for X, y in zip(rows, y_list):
+                    x_predict, x_learn = self._preprocess(X, y)
+                    y_predicted, y_predicted_proba = self._predict(x_predict, y)
+                    self._learn(x_learn, y)
+                    y_predicted_list.append(y_predicted)
+                    y_predicted_proba_list.append(y_predicted_proba)
+
+        return [
+            self._record_output(X, y, y_predicted, y_predicted_proba)
+            for X, y, y_predicted, y_predicted_proba
+            in zip(rows, y_list, y_predicted_list, y_predicted_proba_list)
+        ]
+
+    def train_and_predict_windowed(self, X) -> List[dict]:
+        """
+        Collect messages until batch_size of them are available and then process them 
+        with train_and_predict_batch. 
+        
+        While the window is filling up an empty list is returned, so this is meant 
+        to be used with StreamingDataFrame.apply(..., expand=True).
+        """
+        self._window.append(X)
+        if len(self._window) < (self.batch_size or 1):
+            return []
 
-        if self.metrics_list is not None and (y_predicted is not None or y_predicted_proba is not None): 
-            #print('heee')
-            #print('heee')
-            latest_metrics = self._update_metrics(y , y_predicted , y_predicted_proba)
-           
-        # Save the model to a file
-        with open(f'{self.name}.pkl', 'wb') as model_file:
-            dill.dump(self.model, model_file)
-
-        #TODO: Simplify these if statements
-        output = {**X}
-        if self.y:
-            if y_predicted is not None: 
-                self.y_true_list.append(y) 
-            
-            output['y_true'] = y
-        if y_predicted_proba is not None:
-            output['y_predicted_probabilities'] = {str(k): v for k, v in y_predicted_proba.items()}
-        if y_predicted is not None:
-            self.y_pred_list.append(y_predicted)
-            
-            output['y_predicted'] = y_predicted
-        if self.metrics_list is not None and (y_predicted is not None or y_predicted_proba is not None) :
-            output['metrics'] = latest_metrics
+        batch, self._window = self._window, []
+        return self.train_and_predict_batch(batch)
 
-        output = _convert_numpy_types(output)
+    def close(self):
+        """
+        Stop the background checkpoint writer and save the model if the
+        checkpoint policy asks for a checkpoint on shutdown.
+        """
+        # Learn from a partially filled window. Its outputs cannot be produced anymore
+        if self._window:
+            batch, self._window = self._window, []
+            self.train_and_predict_batch(batch)
+        self.checkpointer.close()
 
-        return output
+    def observe(self, output: dict):
+        """
+        Record an output of this pipeline that was computed by another process.
+
+        A ParallelFanOut trains the pipelines in worker processes. Their outputs are
+        recorded here so that the metrics and statistics plots of the dashboard, which
+        runs in the consumer process, stay up to date. The model is not updated.
+        """
+        self._writes += 1
+        try:
+            for metric_name, value in output.get('metrics', {}).items():
+                self.metrics_values[metric_name].append(value)
+
+            if 'y_predicted' in output:
+                y_predicted = output['y_predicted']
+                self.y_pred_list.append(y_predicted)
+                if self.y:
+                    self.y_true_list.append(output['y_true'])
+                    if self.confusion_matrix is not None:
+                        self.confusion_matrix.update(output['y_true'], y_predicted)
+                self._summarize(output.get('y_true'), y_predicted)
+        finally:
+            self._writes += 1
+        self._publish_if_due()
+
+    def snapshot(self) -> 'PipelineSnapshot':
+        """
+        The values shown by the dashboard, as an immutable copy.
+
+        The thread that processes the messages publishes a new snapshot every 
+        retention.snapshot_interval seconds, and the dashboard only reads the latest 
+        one, so neither waits for the other and the dashboard never sees a buffer 
+        in the middle of an update. When no message came since the last changes, 
+        they are copied and published here instead. The copy is thrown away if a 
+        message is processed meanwhile, it is then published by the processing thread.
+        """
+        snapshot, writes = self._snapshot, self._writes
+        if snapshot.version == writes or writes % 2 \
+                or time.monotonic() - self._published_at < self.retention.snapshot_interval:
+            return snapshot
+        try:
+            fresh = self._take_snapshot(writes)
+        except (RuntimeError, IndexError):
+            # The values changed while they were copied, e.g. a new class was added to the confusion matrix
+            return snapshot
+        if self._writes != writes:
+            return snapshot
+        self._publish(fresh)
+        return fresh
+
+    def _publish_if_due(self):
+        if time.monotonic() - self._published_at >= self.retention.snapshot_interval:
+            self._publish(self._take_snapshot(self._writes))
+
+    def _publish(self, snapshot: 'PipelineSnapshot'):
+        # The reader and the processing thread both publish, the newest copy wins
+        with self._publish_lock:
+            if snapshot.version >= self._snapshot.version:
+                self._snapshot = snapshot
+                self._published_at = time.monotonic()
+
+    def _take_snapshot(self, version: int) -> 'PipelineSnapshot':
+        confusion_matrix, classes = None, ()
+        if self.confusion_matrix is not None:
+            classes = tuple(sorted(self.confusion_matrix.classes))
+            confusion_matrix = {y_true: dict(row) for y_true, row in self.confusion_matrix.data.items()}
+        return PipelineSnapshot(
+            version=version,
+            timestamp=time.time(),
+            metrics={metric_name: values.snapshot() for metric_name, values in self.metrics_values.items()}
+            if self.metrics_list is not None else {},
+            y_true=self.y_true_list.snapshot(),
+            y_pred=self.y_pred_list.snapshot(),
+            confusion_matrix=confusion_matrix,
+            classes=classes,
+            scatter=self.scatter.snapshot() if self.scatter is not None else None,
+            score_quantiles=self.score_quantiles.values() if self.score_quantiles is not None else None)
+
+    def _summarize(self, y_true, y_predicted):
+        if self.scatter is not None and y_true is not None:
+            self.scatter.add(y_true, y_predicted)
+        elif self.score_quantiles is not None:
+            self.score_quantiles.add(y_predicted)
 
     def metrics_plot(self):
         """
         Plot the metrics values.
         """
-        for metric_name, values in self.metrics_values.items():
-            plt.plot(values, label=metric_name)
+        for metric_name, values in self.snapshot().metrics.items():
+            plt.plot(values.indices(), values.values(), label=metric_name)
             plt.title(f"{self.name} - {metric_name}")
         plt.xlabel('iterations')
         plt.ylabel('values')
@@ -213,10 +420,7 @@ class Pipeline:
         4. The model has a update method
         
         """
-        if isinstance(self.model, RiverPipeline):
-            model_instance = self.model[self.model_name]
-        else:
-            model_instance = self.model
+        model_instance = self._model_instance()
         
         y_predicted, y_predicted_proba = None, None
         
@@ -266,6 +470,81 @@ class Pipeline:
         #print(y_predicted , y_predicted_proba)
         return y_predicted, y_predicted_proba
 
+    def share_lock(self, lock):
+        """
+        Use a lock that is shared with other pipelines, e.g. the pipelines of a FanOut 
+        that share a preprocessor, for the updates of the model and the checkpoints.
+        """
+        self._model_lock = lock
+        self.checkpointer.lock = lock
+
+    def _full_model(self):
+        """The model including the preprocessor, which is what checkpoints contain."""
+        if self.preprocessor is None:
+            return self.model
+        return compose.Pipeline(self.preprocessor, self.model)
+
+    def _preprocess(self, X, y=None):
+        """Features used for the prediction and for learning after the preprocessor of the pipeline."""
+        if self.preprocessor is None:
+            return X, X
+        return preprocess(self.preprocessor, X, y)
+
+    def _model_instance(self):
+        """The estimator itself, without the preprocessing steps of a River pipeline."""
+        if isinstance(self.model, RiverPipeline):
+            return self.model[self.model_name]
+        return self.model
+
+    def _learn(self, X, y=None):
+        """Update the model with a single observation."""
+        if hasattr(self.model , 'learn_one' ): 
+            if self.model._supervised: 
+                self.model.learn_one(x=X, y=y)
+            else:
+                self.model.learn_one(x=X)
+
+    def _record_output(self, X, y, y_predicted, y_predicted_proba) -> dict:
+        """
+        Update the metrics and the stored values with a prediction and 
+        build the output dict of a message.
+        """
+        # The counter is odd while the values shown by the dashboard change (see snapshot)
+        self._writes += 1
+        try:
+            if self.metrics_list is not None and (y_predicted is not None or y_predicted_proba is not None): 
+                latest_metrics = self._update_metrics(y , y_predicted , y_predicted_proba)
+           
+            # Let the checkpointer decide if the model should be saved.
+            # The file is written by a background thread
+            self.checkpointer.notify(latest_metrics if 'latest_metrics' in locals() else None)
+
+            #TODO: Simplify these if statements
+            output = {**X}
+            if self.y:
+                if y_predicted is not None: 
+                    self.y_true_list.append(y) 
+            
+                output['y_true'] = y
+            if y_predicted_proba is not None:
+                output['y_predicted_probabilities'] = {str(k): v for k, v in y_predicted_proba.items()}
+            if y_predicted is not None:
+                self.y_pred_list.append(y_predicted)
+                if self.confusion_matrix is not None and self.y:
+                    self.confusion_matrix.update(y, y_predicted)
+                self._summarize(y if self.y else None, y_predicted)
+            
+                output['y_predicted'] = y_predicted
+            if self.metrics_list is not None and (y_predicted is not None or y_predicted_proba is not None) :
+                output['metrics'] = latest_metrics
+        finally:
+            self._writes += 1
+        self._publish_if_due()
+
+        output = _convert_numpy_types(output)
+
+        return output
+
     def _update_metrics(self, y, y_predicted, y_predicted_proba=None) -> dict:
         latest_metrics = {}
         for metric_group , metrics_in_group in self.metrics.items():
@@ -294,6 +573,16 @@ class Pipeline:
         #print(latest_metrics)
         return latest_metrics
 
+    def _metric_bigger_is_better(self, metric_name: Optional[str]) -> bool:
+        """Direction of the metric that is used for checkpoints on improvement."""
+        if metric_name is None:
+            return True
+        for metric in self.metrics_list or []:
+            if metric.__class__.__name__ == metric_name:
+                return metric.bigger_is_better
+        raise ValueError(
+            f"Checkpoint metric {metric_name} is not one of the metrics of pipeline {self.name}.")
+
     def _add_metric(self, metric, category):
         """Helper function to add a metric to the appropriate category."""
         #print(metric)
@@ -304,158 +593,16 @@ class Pipeline:
             #print('type' , self.metrics[category]  )
             
         
-    def add_metrics_traces(self, fig, row=1, col=1):
-        """
-        Add line plot traces for each metric into the given figure.
-        
-        Parameters
-        ----------
-        fig : plotly.graph_objs.Figure
-            The figure object to add traces to.
-        row : int
-            Row index of the subplot.
-        col : int
-            Column index of the subplot.
-        """
-        #print(self.metrics_values)
-        if self.metrics_list is not None: 
-            for metric_name, values in self.metrics_values.items():
-                
-                fig.add_trace(go.Scatter(
-                    y=values,
-                    mode="lines",
-                    name=f"{self.name} - {metric_name}",
-                    #hoverinfo="y+name",
-                    hovertemplate=f"{self.name} - {metric_name}"+"<br>Value:%{y}<br>Iteration:%{x}<extra></extra>"
-                ), row=row, col=col)
-            
-    def add_stats_traces(self,traces): #fig, row=1, col=1) : 
-        if isinstance(self.model, RiverPipeline):
-            model_instance = self.model[self.model_name]
-        else:
-            model_instance = self.model
-        
-        layout_updates = {}
-        
-        if issubclass(type(model_instance), base.Classifier):
-            #print(model_instance)
-            # Get unique labels from the actual predictions and true values
-            unique_labels = sorted(set(self.y_true_list + self.y_pred_list))
-            
-            # Only create confusion matrix if we have data
-            if unique_labels:
-                # Create confusion matrix with the actual labels
-                cm = confusion_matrix(self.y_true_list, self.y_pred_list, labels=unique_labels)
-                
-                traces.append(go.Heatmap(
-                            z = cm,
-                            x=unique_labels,  # predicted (x-axis)
-                            y=unique_labels,  # true (y-axis)
-                            colorscale='Viridis',
-                            name=f"{self.name} Confusion Matrix",
-                            colorbar=dict(
-                                title='Count',
-                                #len=0.5,  # 50% of the plot height
-                                #xanchor='left'
-                                ),
-                            hovertemplate='y_true: %{y}<br>y_predicted: %{x}<br>Count: %{z}<extra></extra>'
-                    )
-                )
-                
-                # Return layout updates to fix axis ticks
-                layout_updates = {
-                    'xaxis': {
-                        'tickmode': 'array',
-                        'tickvals': unique_labels,
-                        'ticktext': [str(label) for label in unique_labels]
-                    },
-                    'yaxis': {
-                        'tickmode': 'array',
-                        'tickvals': unique_labels,
-                        'ticktext': [str(label) for label in unique_labels]
-                    }
-                }
-            
-        elif issubclass(type(model_instance) , base.Regressor) : 
-            #print(model_instance)
-            #print(self.y_true_list)
-            #print(self.y_pred_list)
-            if self.y_true_list and self.y_pred_list:
-                traces.append(go.Scatter(
-                            x=self.y_true_list,
-                            y=self.y_pred_list,
-                            mode='markers',
-                            #marker=dict(color='blue', size=6, opacity=0.7),
-                            name=f"{self.name} Predictions",
-                            hovertemplate='y_true: %{x}<br>y_predicted: %{y}<extra></extra>'
-                    )#, row=row, col=col
-                )
-                # Optionally, add a y=x reference line
-                min_val = min(np.min(self.y_true_list), np.min(self.y_pred_list))
-                max_val = max(np.max(self.y_true_list), np.max(self.y_pred_list))
-                #print(min_val)
-                traces.append(
-                    go.Scatter(
-                        x=[min_val, max_val],
-                        y=[min_val, max_val],
-                        mode='lines',
-                        line=dict(color='red', dash='dash'),
-                        name='Ideal: y = x',
-                        showlegend=True
-                    ),
-                    #row=row, col=col
-                )
-                
-                # Add axis titles for regressor
-                layout_updates = {
-                    'xaxis': {'title': 'y_true'},
-                    'yaxis': {'title': 'y_predicted'}
-                }
-        elif issubclass(type(model_instance), base.Clusterer):
-            # Count occurrences of each cluster label in y_pred_list
-            cluster_counts = Counter(self.y_pred_list)
-            print(self.y_pred_list)
-            clusters = list(cluster_counts.keys())
-            #print(cluster_counts)
-            counts = list(cluster_counts.values())
-
-            traces.append(
-                go.Bar(
-                    x=clusters,
-                    y=counts,
-                    name=f"{self.name} Cluster Counts",
-                    #marker=dict(color='orange'),
-                    hovertemplate='Cluster: %{x}<br>Count: %{y}<extra></extra>'
-                )
-            )
-        elif issubclass(type(model_instance), base.DriftDetector):  
-            
-            traces.append(
-                go.Scatter(
-                    x=self.y_pred_list,
-                    mode='markers',
-                    #marker=dict(color='red', size=10, symbol='x'),
-                    name='Drift Detected',
-                    hovertemplate='Drift detected at index: %{x}<extra></extra>'
-                )
-            )
-        
-        elif issubclass(type(model_instance), anomaly.base.AnomalyDetector) or issubclass(type(model_instance), anomaly.base.SupervisedAnomalyDetector): 
-            traces.append(go.Scatter(
-                x=list(range(len(self.y_pred_list))),
-                y=self.y_pred_list,
-                mode='markers',
-                #marker=dict(color='blue', size=6, opacity=0.7),
-                name=f"{self.name} anomaly scores",
-                hovertemplate='Index: %{x}<br>Score: %{y}<extra></extra>'
-                )#, row=row, col=col
-            )
-            
-        else : 
-            StatisticsWarning()
-        
-        return layout_updates
-            
+
+def _supports_mini_batch(estimator) -> bool:
+    """Check if every step of a (River) model implements the mini-batch methods."""
+    if isinstance(estimator, RiverPipeline):
+        return all(_supports_mini_batch(step) for step in estimator.steps.values())
+    if isinstance(estimator, compose.TransformerUnion):
+        return all(_supports_mini_batch(transformer) for transformer in estimator.transformers.values())
+    if hasattr(estimator, 'transform_many'):
+        return hasattr(estimator, 'learn_many')
+    return hasattr(estimator, 'learn_many') and hasattr(estimator, 'predict_many')
 
 
 def _convert_numpy_types(obj):
@@ -0,0 +1,58 @@
+"""
+Jinja2 environment of the code generators.
+
+The templates are loaded from the beaver package, so generation works from any
+working directory, and their compiled bytecode is kept in the Beaver cache
+directory (see beaver.cache). Jinja checks the source of a template against the
+cached bytecode, so an edited template is recompiled automatically, and an
+unchanged one is not compiled again by the next run.
+
+Run ``python -m beaver.rendering`` (e.g. when building an image) to compile
+all the templates ahead of time.
+"""
+
+from typing import Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader
+
+from beaver.cache import cache_dir
+
+__all__ = ['MAIN_TEMPLATE', 'get_environment', 'precompile_templates']
+
+# The template of a generated application, it includes all the others
+MAIN_TEMPLATE = 'models.jinja'
+
+_environment = None
+
+
+def _bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    directory = cache_dir() / 'jinja'
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        # Templates are compiled on every run if the cache cannot be written
+        return None
+    return FileSystemBytecodeCache(str(directory))
+
+
+def get_environment() -> Environment:
+    """The Jinja2 environment is created once per process, so compiled templates are reused between files."""
+    global _environment
+    if _environment is None:
+        _environment = Environment(
+            loader=PackageLoader('beaver', 'templates'),
+            bytecode_cache=_bytecode_cache())
+    return _environment
+
+
+def precompile_templates() -> int:
+    """Compile every template into the bytecode cache. Returns the number of templates."""
+    environment = get_environment()
+    names = environment.list_templates(extensions=['jinja'])
+    for name in names:
+        environment.get_template(name)
+    return len(names)
+
+
+if __name__ == '__main__':
+    print(f"✅ {precompile_templates()} templates compiled")
@@ -0,0 +1,318 @@
+"""
+Replay a dataset file to a Kafka topic as fast as possible, or at a fixed rate.
+
+Load testing a pipeline needs a producer that is faster than the pipeline. The
+replayer avoids the per row costs of a DataFrame.iterrows loop:
+
+- The file is read in chunks (CSV, or Parquet with pyarrow), so memory does not
+  grow with the size of the dataset.
+- The column names are normalized once per file instead of once per message.
+- The rows of a chunk are serialized in one pass with orjson (the standard json
+  module is used if orjson is not installed).
+- The producer batches messages (linger.ms, batch.size, compression) and
+  deliveries are counted instead of printed.
+
+At the end a ReplayReport tells how many messages were produced and at which rate.
+
+Usage::
+
+    python -m beaver.replay data.csv --topic Phishing --rate 5000
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from beaver.kafka_profiles import PROFILES, producer_config as profile_producer_config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+__all__ = ['DEFAULT_PRODUCER_CONFIG', 'RateLimiter', 'ReplayReport', 'normalize_column',
+           'read_chunks', 'dumps', 'serialize_rows', 'produce', 'replay', 'main']
+
+# Producer settings for throughput. Messages wait up to linger.ms to fill large batches
+DEFAULT_PRODUCER_CONFIG = {
+    'acks': 'all',
+    'linger.ms': 20,
+    'batch.size': 1024 * 1024,
+    'compression.type': 'lz4',
+    'queue.buffering.max.messages': 500_000,
+    'queue.buffering.max.kbytes': 1024 * 1024,
+}
+
+
+def normalize_column(name) -> str:
+    """The field name of a column in the messages: lower case with underscores instead of spaces."""
+    return str(name).replace(" ", "_").lower()
+
+
+def read_chunks(path: str, chunk_size: int = 10_000) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV or Parquet file in DataFrames of at most chunk_size rows.
+
+    The columns of the DataFrames are already normalized (see normalize_column).
+    Parquet files need pyarrow.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix in ('.parquet', '.pq'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Replaying Parquet files needs pyarrow: pip install pyarrow") from exc
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_size)
+
+    columns = None
+    for chunk in chunks:
+        if columns is None:
+            columns = [normalize_column(column) for column in chunk.columns]
+        chunk.columns = columns
+        yield chunk
+
+
+def _json_default(value):
+    # Timestamps and other objects that are not JSON types
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def dumps(message: dict) -> bytes:
+    """Serialize a message to JSON with orjson if it is installed."""
+    if orjson is not None:
+        return orjson.dumps(message, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(message, default=_json_default).encode('utf-8')
+
+
+def serialize_rows(chunk: pd.DataFrame) -> List[bytes]:
+    """
+    Serialize every row of a DataFrame to a JSON object.
+
+    With orjson NaN values become null. The json module writes NaN, like the old producer.
+    """
+    columns = list(chunk.columns)
+    rows = chunk.itertuples(index=False, name=None)
+    if orjson is not None:
+        options = orjson.OPT_SERIALIZE_NUMPY
+        return [orjson.dumps(dict(zip(columns, row)), default=_json_default, option=options) for row in rows]
+    return [json.dumps(dict(zip(columns, row)), default=_json_default).encode('utf-8') for row in rows]
+
+
+class RateLimiter:
+    """
+    Pace messages to a target rate.
+
+    The limiter keeps the schedule of the whole run, so a slow moment is made up
+    for afterwards and the average rate stays at the target. With no rate it never waits.
+
+    Parameters
+    ----------
+    rate : float, optional
+        Messages per second.
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        if rate is not None and rate <= 0:
+            raise ValueError(f"The rate must be positive, got {rate}")
+        self.rate = rate
+        self.start = time.perf_counter()
+        self.sent = 0
+
+    def wait(self, messages: int = 1) -> float:
+        """Account for messages that are about to be sent and sleep until they are due. Returns the time slept."""
+        self.sent += messages
+        if self.rate is None:
+            return 0.0
+        delay = self.start + (self.sent - messages) / self.rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+            return delay
+        return 0.0
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of a replay."""
+    messages: int = 0
+    bytes: int = 0
+    delivered: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Messages per second."""
+        return self.messages / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Megabytes per second."""
+        return self.bytes / self.seconds / 1e6 if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.messages} messages ({self.bytes / 1e6:.1f} MB) in {self.seconds:.2f}s: "
+                f"{self.rate:,.0f} msg/s, {self.throughput:.2f} MB/s, "
+                f"{self.delivered} delivered, {self.failed} failed")
+
+    def to_dict(self) -> dict:
+        return {'messages': self.messages, 'bytes': self.bytes, 'delivered': self.delivered,
+                'failed': self.failed, 'seconds': self.seconds, 'rate': self.rate}
+
+
+def produce(producer, topic: str, value: bytes, key, on_delivery):
+    """Produce a message, waiting for room in the local queue of the producer if it is full."""
+    while True:
+        try:
+            producer.produce(topic, value=value, key=key, on_delivery=on_delivery)
+            return
+        except BufferError:
+            # The local queue is full. Serve delivery reports until there is room again
+            producer.poll(0.1)
+
+
+def replay(path: str, topic: str, bootstrap_server: str = 'localhost:39092', rate: Optional[float] = None,
+           chunk_size: int = 10_000, key_column: Optional[str] = None, limit: Optional[int] = None,
+           producer_config: Optional[dict] = None, producer=None, progress_every: float = 0.0,
+           progress=None) -> ReplayReport:
+    """
+    Produce every row of a dataset file to a topic as a JSON message.
+
+    Parameters
+    ----------
+    path : str
+        CSV or Parquet file.
+    topic : str
+        Destination topic.
+    bootstrap_server : str
+        Kafka bootstrap broker(s), used if no producer is given.
+    rate : float, optional
+        Target messages per second. Default is as fast as possible.
+    chunk_size : int
+        Rows read and serialized at once.
+    key_column : str, optional
+        Column (normalized name) whose value is the message key. Default is the row number.
+        A ValueError is raised before the first message if the file has no such column.
+    limit : int, optional
+        Stop after this many messages.
+    producer_config : dict, optional
+        librdkafka settings that override DEFAULT_PRODUCER_CONFIG.
+    producer : confluent_kafka.Producer, optional
+        Producer to use instead of creating one.
+    progress_every : float
+        Print the report every this many seconds while replaying. 0 disables it.
+    progress : file, optional
+        Where the reports are printed. Default is stdout.
+    """
+    if producer is None:
+        from confluent_kafka import Producer
+        producer = Producer({**DEFAULT_PRODUCER_CONFIG, 'bootstrap.servers': bootstrap_server,
+                             **(producer_config or {})})
+
+    report = ReplayReport()
+
+    def on_delivery(err, msg):
+        if err:
+            report.failed += 1
+        else:
+            report.delivered += 1
+
+    limiter = RateLimiter(rate)
+    # Pace small groups of messages, sleeping for every message costs more than producing it
+    step = max(1, min(1000, int(rate / 100))) if rate else chunk_size
+    start = last_progress = time.perf_counter()
+
+    for chunk in read_chunks(path, chunk_size):
+        if key_column is not None and report.messages == 0 and key_column not in chunk.columns:
+            raise ValueError(f"{path} has no column {key_column}, its columns are: {', '.join(chunk.columns)}")
+        if limit is not None:
+            chunk = chunk.iloc[:limit - report.messages]
+        values = serialize_rows(chunk)
+        if key_column is not None:
+            keys = [str(key) for key in chunk[key_column].tolist()]
+        else:
+            keys = [str(index) for index in range(report.messages, report.messages + len(values))]
+
+        for offset in range(0, len(values), step):
+            group = values[offset:offset + step]
+            limiter.wait(len(group))
+            for value, key in zip(group, keys[offset:offset + step]):
+                produce(producer, topic, value, key, on_delivery)
+                report.bytes += len(value)
+            report.messages += len(group)
+            producer.poll(0)
+
+            if progress_every and time.perf_counter() - last_progress >= progress_every:
+                last_progress = time.perf_counter()
+                report.seconds = last_progress - start
+                print(f"  {report}", file=progress)
+
+        if limit is not None and report.messages >= limit:
+            break
+
+    producer.flush()
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def _parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a CSV or Parquet dataset to a Kafka topic')
+    parser.add_argument('path', help='CSV or Parquet file')
+    parser.add_argument('--topic', '-t', required=True, help='Destination topic name')
+    parser.add_argument('--bootstrap_server', default='localhost:39092',
+                        help='Kafka bootstrap broker(s) (host[:port])')
+    parser.add_argument('--rate', '-r', type=float, help='Target messages per second (default: as fast as possible)')
+    parser.add_argument('--limit', '-n', type=int, help='Stop after n messages')
+    parser.add_argument('--chunk-size', type=int, default=10_000, help='Rows read and serialized at once')
+    parser.add_argument('--key-column', help='Column whose value is the message key (default: row number)')
+    parser.add_argument('--linger-ms', type=float, help='Override linger.ms of the producer')
+    parser.add_argument('--batch-size', type=int, help='Override batch.size (bytes) of the producer')
+    parser.add_argument('--acks', choices=['0', '1', 'all'], help='Override acks of the producer')
+    parser.add_argument('--compression', choices=['none', 'gzip', 'snappy', 'lz4', 'zstd'],
+                        help='Override compression.type of the producer')
+    parser.add_argument('--progress', type=float, default=5.0, help='Seconds between progress reports, 0 disables them')
+    parser.add_argument('--profile', choices=list(PROFILES),
+                        help='Kafka tuning profile of the producer, the other producer options override it')
+    parser.add_argument('--json', action='store_true', help='Print the final report as JSON, the other messages go to stderr')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_arguments(argv)
+
+    config = profile_producer_config(args.profile)
+    for setting, value in (('linger.ms', args.linger_ms), ('batch.size', args.batch_size),
+                           ('acks', args.acks), ('compression.type', args.compression)):
+        if value is not None:
+            config[setting] = value
+
+    # With --json stdout only carries the report
+    progress = sys.stderr if args.json else sys.stdout
+    print(f"📤 Replaying {args.path} to {args.topic}"
+          f"{f' at {args.rate:g} msg/s' if args.rate else ' as fast as possible'}", file=progress)
+    try:
+        report = replay(args.path, args.topic, bootstrap_server=args.bootstrap_server, rate=args.rate,
+                        chunk_size=args.chunk_size, key_column=args.key_column, limit=args.limit,
+                        producer_config=config, progress_every=args.progress, progress=progress)
+    except ValueError as exc:
+        print(f"❌ {exc}", file=progress)
+        return 1
+
+    if args.json:
+        print(json.dumps(report.to_dict()))
+    else:
+        print(f"✅ {report}")
+    return 1 if report.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
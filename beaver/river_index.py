@@ -0,0 +1,159 @@
+"""
+Index of the River classes that Beaver models can use.
+
+Validating a .bvr file only needs to know which classes exist in which River
+module and the parameters of their __init__. Importing all of River and
+inspecting every class to find out takes much longer than the validation itself,
+so the index is built once per installed River version and saved as JSON in the
+user cache directory. Later runs load the JSON and do not import River at all.
+
+The cache directory is described in beaver.cache.
+"""
+
+import importlib
+import inspect
+import json
+import sys
+from importlib import metadata
+from typing import Dict, List, Optional
+
+from beaver.cache import cache_dir
+from beaver.checkpoint import write_atomic
+
+__all__ = ['RiverIndex', 'RIVER_MODULES', 'load_river_index']
+
+# Bump when the layout of the cached JSON changes
+INDEX_FORMAT = 1
+
+# Every River module a model of the grammar (grammar/models.tx) can come from
+RIVER_MODULES = [
+    'linear_model', 'tree', 'ensemble', 'forest', 'cluster',
+    'preprocessing', 'metrics', 'anomaly', 'drift', 'optim',
+    'neural_net', 'proba', 'reco', 'bandit', 'model_selection',
+    'compose', 'neighbors', 'naive_bayes', 'time_series', 'rules',
+    'multiclass', 'multioutput', 'imblearn', 'facto', 'stats',
+    'feature_extraction', 'feature_selection', 'misc',
+    'neural_net.activations', 'metrics.multioutput', 'optim.base',
+    'optim.initializers', 'optim.losses', 'optim.schedulers', 'proba.base',
+    'reco.base', 'tree.base', 'tree.splitter', 'drift.binary'
+]
+
+# The annotations that the validator checks the values of the parameters against
+_ANNOTATIONS = {int: 'int', float: 'float'}
+
+_loaded = {}
+
+
+def _annotation_tag(annotation) -> Optional[str]:
+    for annotation_type, tag in _ANNOTATIONS.items():
+        if annotation is annotation_type:
+            return tag
+    return None
+
+
+class RiverIndex:
+    """
+    Classes of the River modules and the parameters of their __init__.
+
+    Parameters
+    ----------
+    version : str
+        The River version the index was built for.
+    modules : dict
+        module path (e.g. 'neural_net.activations') -> class name -> list of
+        (parameter name, annotation) where the annotation is 'int', 'float' or None.
+    """
+
+    def __init__(self, version: str, modules: Dict[str, Dict[str, list]]):
+        self.version = version
+        self.modules = modules
+
+    def has_module(self, module: str) -> bool:
+        return module in self.modules
+
+    def has_class(self, module: str, class_name: str) -> bool:
+        return class_name in self.modules.get(module, {})
+
+    def classes(self, module: str) -> List[str]:
+        """Public classes of a module, in alphabetical order like dir()."""
+        return list(self.modules.get(module, {}))
+
+    def parameters(self, module: str, class_name: str) -> Dict[str, Optional[str]]:
+        """Parameters of the __init__ of a class (without self) and their annotation."""
+        if not self.has_class(module, class_name):
+            raise AttributeError(f"module 'river.{module}' has no attribute '{class_name}'")
+        return dict(self.modules[module][class_name])
+
+    @classmethod
+    def build(cls, version: str) -> 'RiverIndex':
+        """Import the River modules and inspect their classes."""
+        modules = {}
+        for module_name in RIVER_MODULES:
+            try:
+                module = importlib.import_module(f'river.{module_name}')
+            except ImportError as e:
+                # Some modules might not be available in all River versions
+                # On stderr, stdout may carry the JSON output of the analyzer
+                print(f"Warning: Could not import river.{module_name}: {e}", file=sys.stderr)
+                continue
+
+            classes = {}
+            for name in dir(module):
+                member = getattr(module, name)
+                if name.startswith('_') or not inspect.isclass(member):
+                    continue
+                try:
+                    signature = inspect.signature(member.__init__)
+                except (TypeError, ValueError):
+                    # Classes implemented in C without a signature
+                    signature = None
+                classes[name] = [
+                    (param_name, _annotation_tag(param.annotation))
+                    for param_name, param in signature.parameters.items() if param_name != 'self'
+                ] if signature else []
+            modules[module_name] = classes
+        return cls(version, modules)
+
+    def to_json(self) -> str:
+        return json.dumps({'format': INDEX_FORMAT, 'version': self.version, 'modules': self.modules})
+
+    @classmethod
+    def from_json(cls, text: str) -> 'RiverIndex':
+        data = json.loads(text)
+        if data.get('format') != INDEX_FORMAT:
+            raise ValueError(f"River index format {data.get('format')} is not {INDEX_FORMAT}")
+        modules = {
+            module: {name: [tuple(param) for param in params] for name, params in classes.items()}
+            for module, classes in data['modules'].items()
+        }
+        return cls(data['version'], modules)
+
+
+def load_river_index() -> RiverIndex:
+    """
+    Return the index of the installed River version.
+
+    It is taken from memory, then from the disk cache, and only built (and cached)
+    if neither has it. A cache that cannot be read or written is ignored.
+    """
+    version = metadata.version('river')
+    if version in _loaded:
+        return _loaded[version]
+
+    path = cache_dir() / f'river-index-{version}.json'
+    index = None
+    if path.exists():
+        try:
+            index = RiverIndex.from_json(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError, KeyError, TypeError):
+            index = None
+
+    if index is None:
+        index = RiverIndex.build(version)
+        try:
+            write_atomic(str(path), index.to_json().encode('utf-8'))
+        except OSError:
+            pass
+
+    _loaded[version] = index
+    return index
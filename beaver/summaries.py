@@ -0,0 +1,290 @@
+"""
+Streaming summaries of the predictions of a pipeline for its statistics plots.
+
+The most recent predictions (see beaver.buffers) only show the end of a run,
+and drawing all of them costs as much as there are. The summaries in this
+module describe the whole stream in a fixed amount of memory and are drawn at
+a fixed cost, however long the pipeline runs:
+
+- ReservoirSample keeps a uniform sample of the (y_true, y_predicted) pairs of
+  a regressor (Vitter's algorithm R): every pair seen so far has the same
+  chance to be in it.
+- Histogram2D counts the pairs in a grid of at most bins x bins cells. When a
+  pair falls outside of the grid, neighbouring cells are merged so the grid
+  covers twice the range, the dense regions of the scatter plot stay visible
+  where a sample would draw overlapping markers.
+- RunningRange keeps the smallest and largest value, for the y = x line.
+- QuantileSketch estimates quantiles of the anomaly scores with the P²
+  algorithm of river.stats.Quantile, a few floats per quantile.
+
+ScatterSummary groups the summaries of a regressor. Like the buffers, the
+summaries are read through immutable snapshots.
+"""
+
+import math
+import numbers
+import random
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from river import stats
+
+from beaver.buffers import _read_only
+
+__all__ = ['ReservoirSample', 'Histogram2D', 'RunningRange', 'QuantileSketch', 'ScatterSummary',
+           'DensitySnapshot', 'ScatterSnapshot']
+
+# Quantiles of the anomaly scores drawn on the dashboard
+SCORE_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _is_finite(value) -> bool:
+    if type(value) is float:
+        return math.isfinite(value)
+    return isinstance(value, numbers.Real) and not isinstance(value, (bool, np.bool_)) and math.isfinite(value)
+
+
+class ReservoirSample:
+    """
+    A uniform sample of at most size (x, y) pairs of a stream.
+
+    Parameters
+    ----------
+    size : int
+        Number of pairs kept.
+    seed : int, optional
+        Seed of the random choices.
+    """
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        if size <= 0:
+            raise ValueError(f"The sample size must be positive, got {size}")
+        self.size = size
+        self.x = np.empty(size, dtype=np.float64)
+        self.y = np.empty(size, dtype=np.float64)
+        self.total = 0
+        self._rng = random.Random(seed)
+
+    def add(self, x: float, y: float):
+        if self.total < self.size:
+            index = self.total
+        else:
+            # The new pair replaces a kept one with probability size / (total + 1)
+            index = self._rng.randrange(self.total + 1)
+        self.total += 1
+        if index < self.size:
+            self.x[index] = x
+            self.y[index] = y
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Read only copies of the x and y values of the sample."""
+        count = min(self.total, self.size)
+        return _read_only(self.x[:count].copy()), _read_only(self.y[:count].copy())
+
+    def __len__(self) -> int:
+        return min(self.total, self.size)
+
+
+@dataclass(frozen=True, eq=False)
+class DensitySnapshot:
+    """
+    Read only copy of a Histogram2D.
+
+    Parameters
+    ----------
+    x, y : numpy.ndarray
+        The centers of the columns and of the rows of the grid.
+    z : numpy.ndarray
+        The counts, z[row, column] like a plotly Heatmap.
+    """
+    x: np.ndarray
+    y: np.ndarray
+    z: np.ndarray
+
+    @property
+    def total(self) -> int:
+        return int(self.z.sum())
+
+
+class Histogram2D:
+    """
+    Counts of (x, y) pairs in a grid of at most bins x bins cells.
+
+    Cell (i, j) covers [i * width_x, (i + 1) * width_x) x [j * width_y, (j + 1) * width_y).
+    The widths start small and double, merging pairs of neighbouring cells, whenever
+    the cells in use would span more than bins columns or rows. Only the cells that
+    were hit are stored.
+
+    Parameters
+    ----------
+    bins : int
+        Maximum number of columns and of rows.
+    """
+
+    def __init__(self, bins: int = 50):
+        if bins < 2:
+            raise ValueError(f"A histogram needs at least 2 bins, got {bins}")
+        self.bins = bins
+        self.width = [2.0 ** -20, 2.0 ** -20]
+        self.counts: Dict[Tuple[int, int], int] = {}
+        self._low = [0, 0]
+        self._high = [-1, -1]
+
+    def add(self, x: float, y: float):
+        """Count a pair. Pairs with a value that is not a finite number are ignored."""
+        if not (_is_finite(x) and _is_finite(y)):
+            return
+        i, j = math.floor(x / self.width[0]), math.floor(y / self.width[1])
+        if not (self._low[0] <= i <= self._high[0] and self._low[1] <= j <= self._high[1]):
+            i, j = self._extend(x, y, i, j)
+        self.counts[i, j] = self.counts.get((i, j), 0) + 1
+
+    def _extend(self, x: float, y: float, i: int, j: int) -> Tuple[int, int]:
+        # The grid grows to include the cell of a pair, coarser if it would span more than bins cells
+        if not self.counts:
+            self._low, self._high = [i, j], [i, j]
+            return i, j
+        cell = [i, j]
+        for axis, value in ((0, x), (1, y)):
+            while max(self._high[axis], cell[axis]) - min(self._low[axis], cell[axis]) >= self.bins:
+                self._coarsen(axis)
+                cell[axis] = math.floor(value / self.width[axis])
+            self._low[axis] = min(self._low[axis], cell[axis])
+            self._high[axis] = max(self._high[axis], cell[axis])
+        return cell[0], cell[1]
+
+    def _coarsen(self, axis: int):
+        # Cells 2k and 2k + 1 become cell k (floor division also for negative cells)
+        merged: Dict[Tuple[int, int], int] = {}
+        for (i, j), count in self.counts.items():
+            key = (i >> 1, j) if axis == 0 else (i, j >> 1)
+            merged[key] = merged.get(key, 0) + count
+        self.counts = merged
+        self.width[axis] *= 2
+        self._low[axis] >>= 1
+        self._high[axis] >>= 1
+
+    def snapshot(self) -> Optional[DensitySnapshot]:
+        """The grid as a dense array, None if no pair was counted."""
+        # The bounds are those of the copied cells, the grid may grow while it is copied
+        width_x, width_y = self.width
+        counts = dict(self.counts)
+        if not counts:
+            return None
+        columns = [i for i, _ in counts]
+        rows = [j for _, j in counts]
+        low_i, low_j = min(columns), min(rows)
+        z = np.zeros((max(rows) - low_j + 1, max(columns) - low_i + 1), dtype=np.int64)
+        for (i, j), count in counts.items():
+            z[j - low_j, i - low_i] = count
+        x = (np.arange(low_i, low_i + z.shape[1]) + 0.5) * width_x
+        y = (np.arange(low_j, low_j + z.shape[0]) + 0.5) * width_y
+        return DensitySnapshot(_read_only(x), _read_only(y), _read_only(z))
+
+
+class RunningRange:
+    """The smallest and the largest finite value of a stream."""
+
+    def __init__(self):
+        self.low: Optional[float] = None
+        self.high: Optional[float] = None
+
+    def add(self, *values: float):
+        for value in values:
+            if not _is_finite(value):
+                continue
+            if self.low is None:
+                self.low = self.high = float(value)
+            else:
+                self.low = min(self.low, float(value))
+                self.high = max(self.high, float(value))
+
+
+class QuantileSketch:
+    """
+    Estimates of some quantiles of a stream (P² algorithm, see river.stats.Quantile).
+
+    Parameters
+    ----------
+    quantiles : sequence of float
+        The quantiles, between 0 and 1.
+    """
+
+    def __init__(self, quantiles: Sequence[float] = SCORE_QUANTILES):
+        self.sketches = {q: stats.Quantile(q) for q in quantiles}
+        self.total = 0
+
+    def add(self, value: float):
+        if not _is_finite(value):
+            return
+        self.total += 1
+        for sketch in self.sketches.values():
+            sketch.update(value)
+
+    def values(self) -> Dict[float, float]:
+        """The current estimates, empty before the first value."""
+        if not self.total:
+            return {}
+        return {q: float(sketch.get()) for q, sketch in self.sketches.items()}
+
+
+@dataclass(frozen=True, eq=False)
+class ScatterSnapshot:
+    """
+    Read only copy of a ScatterSummary.
+
+    Parameters
+    ----------
+    x, y : numpy.ndarray
+        The sampled (y_true, y_predicted) pairs.
+    total : int
+        Number of pairs of the stream.
+    low, high : float, optional
+        Smallest and largest value of the stream, None before the first pair.
+    density : DensitySnapshot, optional
+        Counts of the pairs of the stream.
+    """
+    x: np.ndarray
+    y: np.ndarray
+    total: int
+    low: Optional[float]
+    high: Optional[float]
+    density: Optional[DensitySnapshot]
+
+
+class ScatterSummary:
+    """
+    The summaries of the (y_true, y_predicted) pairs of a regressor.
+
+    Parameters
+    ----------
+    sample_points : int
+        Size of the uniform sample drawn as markers.
+    bins : int
+        Maximum number of columns and rows of the density grid.
+    seed : int, optional
+        Seed of the sample.
+    """
+
+    def __init__(self, sample_points: int, bins: int = 50, seed: Optional[int] = None):
+        self.sample = ReservoirSample(sample_points, seed)
+        self.density = Histogram2D(bins)
+        self.range = RunningRange()
+
+    def add(self, y_true: float, y_predicted: float):
+        """Add a pair. Pairs with a value that is not a finite number are ignored."""
+        if not (_is_finite(y_true) and _is_finite(y_predicted)):
+            return
+        self.sample.add(y_true, y_predicted)
+        self.density.add(y_true, y_predicted)
+        self.range.add(y_true, y_predicted)
+
+    @property
+    def total(self) -> int:
+        return self.sample.total
+
+    def snapshot(self) -> ScatterSnapshot:
+        x, y = self.sample.snapshot()
+        return ScatterSnapshot(x=x, y=y, total=self.sample.total, low=self.range.low, high=self.range.high,
+                               density=self.density.snapshot())
@@ -0,0 +1,434 @@
+"""
+Compact summaries of the pipelines on a Kafka topic, for a dashboard in another process.
+
+Drawing the dashboard in the process of the application takes CPU and GIL time
+from the models. With a ``metrics_topic`` in the connector block the application
+runs no dashboard. Instead a MetricsPublisher sends, every interval seconds, what
+changed in every pipeline since its previous summary:
+
+- the new values of the metrics as (iteration, value) points, reduced with LTTB
+  when there are more than max_points of them,
+- the new predictions (and the targets of a regressor) for the statistics plot,
+  evenly thinned out to max_points,
+- the confusion matrix of a classifier, the counts of the latest predictions of
+  a clusterer, the uniform sample, range and density grid of the predictions of
+  a regressor and the quantiles of the scores of an anomaly detector (see
+  beaver.summaries). They are computed from all the values of the pipeline,
+  not from the thinned ones.
+
+``beaver dashboard`` (see beaver.monitor) reads the topic with a MetricsCollector,
+which rebuilds every pipeline as a RemotePipeline that is drawn like a local one.
+The messages are keyed by source (the application and its worker) and pipeline,
+so one dashboard can watch many applications.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from beaver.buffers import PointSeries, RetentionPolicy
+from beaver.dashboard import PipelineSnapshot, PipelineView
+from beaver.downsampling import downsample
+from beaver.replay import dumps, produce
+from beaver.summaries import DensitySnapshot, ScatterSnapshot
+from beaver.workers import worker_index
+
+__all__ = ['default_source', 'summarize', 'MetricsPublisher', 'RemotePipeline', 'MetricsCollector']
+
+logger = logging.getLogger(__name__)
+
+
+def default_source(name: str) -> str:
+    """The source name of an application on the dashboard, with the index of the worker if it is one."""
+    index = worker_index()
+    return name if index is None else f'{name}.worker{index}'
+
+
+def _thin(count: int, max_points: int) -> np.ndarray:
+    """Indices of at most max_points evenly spaced values out of count, the last one included."""
+    if count <= max_points:
+        return np.arange(count)
+    return np.unique(np.linspace(0, count - 1, max_points).round().astype(np.int64))
+
+
+def _new_values(buffer, position: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """The (positions, values) of a BufferSnapshot from position on, all of them if they are not available."""
+    values = buffer.since(position) if position is not None else None
+    if values is None:
+        values = buffer.to_numpy()
+    return buffer.indices()[len(buffer) - len(values):], values
+
+
+def summarize(pipeline, cursor: Optional[dict] = None, max_points: int = 200) -> Tuple[Optional[dict], dict]:
+    """
+    What changed in a pipeline since cursor, as a JSON serializable message.
+
+    Parameters
+    ----------
+    pipeline : Pipeline
+        The pipeline, its values are read from its latest snapshot.
+    cursor : dict, optional
+        The cursor returned with the previous summary. Without it, or if the
+        pipeline dropped values that were not sent, the summary has all the
+        values the pipeline keeps.
+    max_points : int
+        Maximum number of points of every series in the message.
+
+    Returns
+    -------
+    tuple
+        The message (None if nothing changed) and the cursor of the next summary.
+    """
+    snapshot = pipeline.snapshot()
+    cursor = cursor or {}
+    if cursor.get('version') == snapshot.version:
+        return None, cursor
+
+    positions = dict(cursor.get('positions', {}))
+    message = {
+        'pipeline': pipeline.name,
+        'model_name': getattr(pipeline, 'model_name', None),
+        'kind': pipeline.stats_kind,
+        'timestamp': snapshot.timestamp,
+        'metrics': {},
+    }
+
+    for metric_name, series in snapshot.metrics.items():
+        points = series.points_since(positions[metric_name]) if metric_name in positions else None
+        # Without a cursor the downsampled history is sent as well
+        x, y = points if points is not None else (series.indices(), series.values())
+        positions[metric_name] = series.total
+        if len(y):
+            x, y = downsample(x, y, max_points)
+            message['metrics'][metric_name] = {'x': x.tolist(), 'y': y.tolist()}
+
+    if pipeline.stats_kind == 'classifier':
+        if snapshot.confusion_matrix is not None:
+            classes = list(snapshot.classes)
+            message['confusion_matrix'] = {
+                'classes': classes,
+                'counts': [[int(snapshot.confusion_matrix.get(y_true, {}).get(y_pred, 0)) for y_pred in classes]
+                           for y_true in classes],
+            }
+    elif pipeline.stats_kind is not None:
+        for name, buffer in (('y_pred', snapshot.y_pred), ('y_true', snapshot.y_true)):
+            if name == 'y_true' and pipeline.stats_kind != 'regressor':
+                continue
+            x, values = _new_values(buffer, positions.get(name))
+            positions[name] = buffer.total
+            if not len(values):
+                continue
+            if pipeline.stats_kind == 'anomaly':
+                # LTTB keeps the peaks of the scores
+                x, values = downsample(x, values, max_points)
+            else:
+                keep = _thin(len(values), max_points)
+                x, values = x[keep], values[keep]
+            message[name] = {'x': x.tolist(), 'y': values.tolist()}
+        if pipeline.stats_kind == 'clusterer':
+            # Counted over all the predictions the pipeline keeps, like the local bar chart
+            counts = Counter(snapshot.y_pred.to_numpy().tolist())
+            message['cluster_counts'] = [[cluster, count] for cluster, count in counts.items()]
+
+    if snapshot.scatter is not None:
+        density = snapshot.scatter.density
+        message['scatter'] = {
+            # The uniform sample of the whole stream, a sample of the thinned pairs would not be uniform
+            'sample': {'x': snapshot.scatter.x.tolist(), 'y': snapshot.scatter.y.tolist()},
+            'total': snapshot.scatter.total,
+            'low': snapshot.scatter.low,
+            'high': snapshot.scatter.high,
+            'density': {'x': density.x.tolist(), 'y': density.y.tolist(), 'z': density.z.tolist()}
+            if density is not None else None,
+        }
+    if snapshot.score_quantiles is not None:
+        message['score_quantiles'] = [[quantile, value] for quantile, value in snapshot.score_quantiles.items()]
+
+    return message, {'version': snapshot.version, 'positions': positions}
+
+
+class MetricsPublisher:
+    """
+    Publish the summaries of pipelines to a Kafka topic from a background thread.
+
+    The thread only reads the snapshots of the pipelines (see Pipeline.snapshot),
+    so it never waits for the processing of the messages.
+
+    Parameters
+    ----------
+    pipelines : list of Pipeline
+        The pipelines of the application.
+    topic : str
+        The metrics topic.
+    producer_config : dict, optional
+        librdkafka settings of the producer, at least bootstrap.servers.
+    source : str, optional
+        Name of the application on the dashboard. Default is default_source('beaver').
+    interval : float
+        Seconds between two summaries of a pipeline.
+    max_points : int
+        Maximum number of points of every series in a summary.
+    producer : confluent_kafka.Producer, optional
+        Producer to use instead of creating one.
+    """
+
+    def __init__(self, pipelines: Sequence, topic: str, producer_config: Optional[dict] = None,
+                 source: Optional[str] = None, interval: float = 1.0, max_points: int = 200, producer=None):
+        if interval <= 0:
+            raise ValueError(f"The publishing interval must be positive, got {interval}")
+        if producer is None:
+            from confluent_kafka import Producer
+            producer = Producer({'linger.ms': 100, 'compression.type': 'lz4', **(producer_config or {})})
+        self.pipelines = list(pipelines)
+        self.topic = topic
+        self.source = source if source is not None else default_source('beaver')
+        self.interval = interval
+        self.max_points = max_points
+        self.producer = producer
+        self.failed = 0
+        self._cursors: Dict[str, dict] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self) -> int:
+        """Send the summary of every pipeline that changed. Returns the number of messages."""
+        sent = 0
+        for pipeline in self.pipelines:
+            message, self._cursors[pipeline.name] = summarize(
+                pipeline, self._cursors.get(pipeline.name), self.max_points)
+            if message is None:
+                continue
+            message['source'] = self.source
+            produce(self.producer, self.topic, dumps(message), f'{self.source}/{pipeline.name}', self._on_delivery)
+            sent += 1
+        self.producer.poll(0)
+        return sent
+
+    def start(self):
+        """Publish every interval seconds until stop is called."""
+        self._thread = threading.Thread(target=self._run, name='beaver-metrics-publisher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the thread, publish the last changes and wait up to timeout seconds for their delivery."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.publish()
+        self.producer.flush(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except Exception:  # The dashboard must never stop the application
+                logger.exception("Could not publish the pipeline metrics to %s", self.topic)
+
+    def _on_delivery(self, err, msg):
+        if err:
+            self.failed += 1
+
+
+class RemotePipeline(PipelineView):
+    """
+    A pipeline of another process, rebuilt from its summaries (see summarize).
+
+    The values are appended by the thread that reads the metrics topic. After every
+    summary a new snapshot is taken, which is what the dashboard reads.
+
+    Parameters
+    ----------
+    source : str
+        The application the pipeline belongs to.
+    name : str
+        The name of the pipeline.
+    retention : RetentionPolicy, optional
+        How many points are kept: recent_points per metric and stats_points
+        for the statistics plot.
+    """
+
+    def __init__(self, source: str, name: str, retention: Optional[RetentionPolicy] = None):
+        self.source = source
+        self.name = name
+        self.model_name = None
+        self.stats_kind = None
+        self.retention = retention if retention is not None else RetentionPolicy()
+        self.metrics_values: Dict[str, PointSeries] = {}
+        self.y_true = PointSeries(self.retention.stats_points)
+        self.y_pred = PointSeries(self.retention.stats_points)
+        self.confusion_matrix = None
+        self.classes = ()
+        # The summaries describe the whole stream of the application and are received as is
+        self.cluster_counts = None
+        self.scatter = None
+        self.score_quantiles = None
+        self.updated_at = None
+        self._version = 0
+        self._snapshot = self._take_snapshot()
+
+    def apply(self, message: dict):
+        """Add the values of a summary."""
+        self.model_name = message.get('model_name') or self.model_name
+        self.stats_kind = message.get('kind', self.stats_kind)
+
+        for metric_name, points in message.get('metrics', {}).items():
+            series = self.metrics_values.get(metric_name)
+            if series is None or self._restarted(series, points):
+                series = self.metrics_values[metric_name] = PointSeries(self.retention.recent_points)
+            for x, y in zip(points['x'], points['y']):
+                series.append(x, np.nan if y is None else y)
+
+        for name in ('y_true', 'y_pred'):
+            points = message.get(name)
+            if points is None:
+                continue
+            if self._restarted(getattr(self, name), points):
+                setattr(self, name, PointSeries(self.retention.stats_points))
+            series = getattr(self, name)
+            for x, y in zip(points['x'], points['y']):
+                series.append(x, y)
+
+        if 'cluster_counts' in message:
+            self.cluster_counts = {cluster: count for cluster, count in message['cluster_counts']}
+        if 'scatter' in message:
+            self.scatter = message['scatter']
+        if 'score_quantiles' in message:
+            self.score_quantiles = {quantile: value for quantile, value in message['score_quantiles']}
+
+        if 'confusion_matrix' in message:
+            classes = message['confusion_matrix']['classes']
+            self.classes = tuple(classes)
+            self.confusion_matrix = {
+                y_true: dict(zip(classes, counts))
+                for y_true, counts in zip(classes, message['confusion_matrix']['counts'])
+            }
+
+        self.updated_at = time.time()
+        self._version += 1
+        self._snapshot = self._take_snapshot()
+
+    def snapshot(self) -> PipelineSnapshot:
+        return self._snapshot
+
+    @staticmethod
+    def _restarted(series: PointSeries, points: dict) -> bool:
+        # The iterations start again from 0 when the application is restarted
+        last = series.last_x()
+        return last is not None and bool(points['x']) and points['x'][0] <= last
+
+    def _take_snapshot(self) -> PipelineSnapshot:
+        return PipelineSnapshot(
+            version=self._version,
+            timestamp=self.updated_at or time.time(),
+            metrics={metric_name: series.snapshot() for metric_name, series in self.metrics_values.items()},
+            y_true=self.y_true.snapshot().recent,
+            y_pred=self.y_pred.snapshot().recent,
+            confusion_matrix=self.confusion_matrix,
+            classes=self.classes,
+            scatter=self._scatter_snapshot(),
+            score_quantiles=self.score_quantiles,
+            cluster_counts=self.cluster_counts)
+
+    def _scatter_snapshot(self) -> Optional[ScatterSnapshot]:
+        if self.scatter is None:
+            return None
+        sample = self.scatter['sample']
+        density = self.scatter['density']
+        if density is not None:
+            density = DensitySnapshot(np.asarray(density['x'], dtype=np.float64),
+                                      np.asarray(density['y'], dtype=np.float64),
+                                      np.asarray(density['z'], dtype=np.int64))
+        return ScatterSnapshot(x=np.asarray(sample['x'], dtype=np.float64),
+                               y=np.asarray(sample['y'], dtype=np.float64), total=self.scatter['total'], low=self.scatter['low'],
+                               high=self.scatter['high'], density=density)
+
+
+class MetricsCollector:
+    """
+    Read the summaries of a metrics topic and keep a RemotePipeline for every
+    pipeline of every source.
+
+    Every dashboard reads the whole topic with a consumer group of its own and
+    does not commit offsets.
+
+    Parameters
+    ----------
+    topic : str
+        The metrics topic.
+    consumer_config : dict, optional
+        librdkafka settings of the consumer, at least bootstrap.servers.
+    from_beginning : bool
+        Read the summaries already in the topic. By default only new summaries are read.
+    retention : RetentionPolicy, optional
+        How many points every RemotePipeline keeps.
+    consumer : confluent_kafka.Consumer, optional
+        Consumer to use instead of creating one. It must be subscribed to the topic.
+    """
+
+    def __init__(self, topic: str, consumer_config: Optional[dict] = None, from_beginning: bool = False,
+                 retention: Optional[RetentionPolicy] = None, consumer=None):
+        if consumer is None:
+            from confluent_kafka import Consumer
+            consumer = Consumer({
+                'group.id': f'beaver-dashboard-{uuid.uuid4().hex[:8]}',
+                'auto.offset.reset': 'earliest' if from_beginning else 'latest',
+                'enable.auto.commit': False,
+                **(consumer_config or {}),
+            })
+            consumer.subscribe([topic])
+        self.topic = topic
+        self.consumer = consumer
+        self.retention = retention
+        # Replaced instead of changed, so the dashboard can read it while messages arrive
+        self.pipelines: Dict[str, RemotePipeline] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def apply(self, message: dict):
+        """Add a summary to its RemotePipeline."""
+        key = f"{message.get('source')}/{message['pipeline']}"
+        pipeline = self.pipelines.get(key)
+        if pipeline is None:
+            pipeline = RemotePipeline(message.get('source'), message['pipeline'], self.retention)
+            self.pipelines = {**self.pipelines, key: pipeline}
+        pipeline.apply(message)
+
+    def poll(self, timeout: float = 1.0) -> int:
+        """Read the available summaries, waiting up to timeout seconds for the first one. Returns their number."""
+        applied = 0
+        for msg in self.consumer.consume(num_messages=500, timeout=timeout):
+            if msg.error():
+                logger.warning("Metrics topic %s: %s", self.topic, msg.error())
+                continue
+            try:
+                self.apply(json.loads(msg.value()))
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipped a message of %s that is not a pipeline summary", self.topic)
+                continue
+            applied += 1
+        return applied
+
+    def start(self):
+        """Read the topic in a background thread until stop is called."""
+        self._thread = threading.Thread(target=self._run, name='beaver-metrics-collector', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.consumer.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll(0.5)
+            except Exception:
+                logger.exception("Could not read the metrics topic %s", self.topic)
+                time.sleep(1.0)
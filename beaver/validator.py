@@ -3,12 +3,13 @@ Static validation system for Beaver DSL model classes.
 This module provides functionality to validate model definitions before code generation.
 """
 
-import inspect
 from typing import Dict, List, Set, Any, Optional, Tuple
-import importlib
 from dataclasses import dataclass
 from enum import Enum
 
+from beaver.kafka_profiles import PROFILES
+from beaver.river_index import RiverIndex, load_river_index
+
 
 class ValidationLevel(Enum):
     ERROR = "error"
@@ -28,33 +29,11 @@ class ValidationIssue:
 class ModelValidator:
     """Validates model definitions against River library specifications."""
     
-    def __init__(self):
+    def __init__(self, river_index: Optional[RiverIndex] = None):
         self.issues: List[ValidationIssue] = []
-        self.river_modules = self._load_river_modules()
-        
-    def _load_river_modules(self) -> Dict[str, Any]:
-        """Load available River modules and their classes."""
-        modules = {}
-        # Complete list of actual River modules (verified)
-        river_submodules = [
-            'linear_model', 'tree', 'ensemble', 'forest', 'cluster', 
-            'preprocessing', 'metrics', 'anomaly', 'drift', 'optim',
-            'neural_net', 'proba', 'reco', 'bandit', 'model_selection',
-            'compose', 'neighbors', 'naive_bayes', 'time_series', 'rules',
-            'multiclass', 'multioutput', 'imblearn', 'facto', 'stats',
-            'feature_extraction', 'feature_selection', 'misc'
-        ]
-        
-        for module_name in river_submodules:
-            try:
-                # Import the module dynamically
-                module = importlib.import_module(f'river.{module_name}')
-                modules[module_name] = module
-            except ImportError as e:
-                # Some modules might not be available in all River versions
-                print(f"Warning: Could not import river.{module_name}: {e}")
-        # Return the dictionary of modules        
-        return modules
+        # Classes and signatures of River, cached on disk per River version
+        # so that validation does not import River
+        self.river_index = river_index if river_index is not None else load_river_index()
     
     def validate_model(self, model_def) -> bool:
         """
@@ -111,13 +90,7 @@ class ModelValidator:
         # Handle submodule paths (e.g., 'neural_net.activations')
         if '.' in mapped_class:
             module_parts = mapped_class.split('.')
-            try:
-                # Import the submodule
-                #import importlib
-                # Import the full module path dynamically
-                full_module_path = f"river.{mapped_class}"
-                submodule = importlib.import_module(full_module_path)
-                
+            if self.river_index.has_module(mapped_class):
                 # Check if the specific class exists in the submodule
                 # Real-World Example
                 # Let's say you have a DSL file with:
@@ -132,9 +105,8 @@ class ModelValidator:
                 # Creates a validation error:
                 # "Class 'WrongActivation' not found in module 'river.neural_net.activations'"\
                 # 💡 Available classes in neural_net.activations: ReLU, Tanh, Sigmoid, LeakyReLU, ELU, SELU, GELU, Swish, Mish, SoftPlus
-                if not hasattr(submodule, type_name):
-                    available_classes = [name for name in dir(submodule) 
-                                       if not name.startswith('_') and inspect.isclass(getattr(submodule, name))]
+                if not self.river_index.has_class(mapped_class, type_name):
+                    available_classes = self.river_index.classes(mapped_class)
                     self.issues.append(ValidationIssue(
                         level=ValidationLevel.ERROR,
                         message=f"Class '{type_name}' not found in module 'river.{mapped_class}'",
@@ -144,7 +116,7 @@ class ModelValidator:
                     return False
                 return True
                 
-            except ImportError:
+            else:
                 self.issues.append(ValidationIssue(
                     level=ValidationLevel.ERROR,
                     message=f"Module 'river.{mapped_class}' not found",
@@ -154,21 +126,18 @@ class ModelValidator:
                 return False
         
         # Handle regular modules
-        if mapped_class not in self.river_modules:
+        if not self.river_index.has_module(mapped_class):
             self.issues.append(ValidationIssue(
                 level=ValidationLevel.ERROR,
                 message=f"Module '{mapped_class}' not found in River library",
                 model_name=model_name,
-                suggestion=f"Available modules: {', '.join(sorted(self.river_modules.keys()))}"
+                suggestion=f"Available modules: {', '.join(sorted(m for m in self.river_index.modules if '.' not in m))}"
             ))
             return False
-            
-        module = self.river_modules[mapped_class]
         
         # Check if the specific class exists in the module
-        if not hasattr(module, type_name):
-            available_classes = [name for name in dir(module) 
-                               if not name.startswith('_') and inspect.isclass(getattr(module, name))]
+        if not self.river_index.has_class(mapped_class, type_name):
+            available_classes = self.river_index.classes(mapped_class)
             self.issues.append(ValidationIssue(
                 level=ValidationLevel.ERROR,
                 message=f"Class '{type_name}' not found in module 'river.{mapped_class}'",
@@ -200,14 +169,12 @@ class ModelValidator:
             #  gets the class name from the custom import map or defaults to the class name provided to lower case 
             # This allows for custom mappings like 'neuralNetworksActivations' to 'neural_net.activations'
             mapped_class = custom_import_map.get(class_name, class_name.lower())
-            module = self.river_modules[mapped_class]
-            # Get the class from the module
-            model_class = getattr(module, type_name)
+            if not self.river_index.has_module(mapped_class):
+                raise KeyError(mapped_class)
             
-            # Get the __init__ signature
-            sig = inspect.signature(model_class.__init__)
-            # Get valid parameters excluding 'self'
-            valid_params = set(sig.parameters.keys()) - {'self'}
+            # Get the __init__ parameters (excluding 'self') and their annotations from the index
+            annotations = self.river_index.parameters(mapped_class, type_name)
+            valid_params = set(annotations)
             
             # Check each parameter
             for param in params:
@@ -225,9 +192,9 @@ class ModelValidator:
                     ))
                     
                 # Validate parameter types
-                if param_name and param_name in sig.parameters:
+                if param_name and param_name in annotations:
                     # Validate the parameter type
-                    self._validate_parameter_type(param, sig.parameters[param_name], model_name)
+                    self._validate_parameter_type(param, annotations[param_name], model_name)
                     
         except Exception as e:
             self.issues.append(ValidationIssue(
@@ -236,8 +203,8 @@ class ModelValidator:
                 model_name=model_name
             ))
     
-    def _validate_parameter_type(self, param, param_spec, model_name: str):
-        """Validate individual parameter types."""
+    def _validate_parameter_type(self, param, annotation: Optional[str], model_name: str):
+        """Validate individual parameter types. The annotation is 'int', 'float' or None."""
         # This is a simplified type validation
         # In a full implementation, you'd check against the annotation
         param_name = param.name if hasattr(param, 'name') else "unknown"
@@ -246,20 +213,19 @@ class ModelValidator:
             value = param.value
             
             # Check for common type mismatches
-            if hasattr(param_spec, 'annotation'):
-                annotation = param_spec.annotation
+            if annotation is not None:
                 
                 # Basic type checking
                 # int check. If the annotation is int and the value is not an int, log a warning
                 # __class__ is used to get the class of the value
                 # __class__.__name__ is used to get the class name of the value
-                if annotation == int and hasattr(value, '__class__') and value.__class__.__name__ not in ['int', 'TypeRef']:
+                if annotation == 'int' and hasattr(value, '__class__') and value.__class__.__name__ not in ['int', 'TypeRef']:
                     self.issues.append(ValidationIssue(
                         level=ValidationLevel.WARNING,
                         message=f"Parameter '{param_name}' expects int, got {value.__class__.__name__}",
                         model_name=model_name
                     ))
-                elif annotation == float and hasattr(value, '__class__') and value.__class__.__name__ not in ['float', 'int', 'TypeRef']:
+                elif annotation == 'float' and hasattr(value, '__class__') and value.__class__.__name__ not in ['float', 'int', 'TypeRef']:
                     self.issues.append(ValidationIssue(
                         level=ValidationLevel.WARNING,
                         message=f"Parameter '{param_name}' expects float, got {value.__class__.__name__}",
@@ -480,6 +446,19 @@ class ModelValidator:
         
         return "\n".join(report)
     
+    def validate_connector(self, connector) -> bool:
+        """Check the settings of the connector block that River knows nothing about."""
+        profile = getattr(connector, 'profile', None)
+        if profile and profile not in PROFILES:
+            self.issues.append(ValidationIssue(
+                level=ValidationLevel.ERROR,
+                message=f"Unknown Kafka profile '{profile}'",
+                model_name='connector',
+                suggestion=f"Use one of: {', '.join(PROFILES)}"
+            ))
+            return False
+        return True
+    
     def clear_issues(self):
         """Clear all validation issues."""
         self.issues.clear()
@@ -497,11 +476,16 @@ def validate_beaver_model(config) -> Tuple[bool, str]:
     """
     validator = ModelValidator()
     
-    if not hasattr(config, 'models') or not config.models:
-        return True, "No models to validate."
-    
     all_valid = True
     
+    if getattr(config, 'connector', None) is not None and not validator.validate_connector(config.connector):
+        all_valid = False
+    
+    if not hasattr(config, 'models') or not config.models:
+        if all_valid:
+            return True, "No models to validate."
+        return False, validator.get_validation_report()
+    
     # Validate individual models
     for model in config.models:
         if not validator.validate_model(model):
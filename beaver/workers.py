@@ -0,0 +1,197 @@
+"""
+Partition parallel consumer workers.
+
+A generated application consumes its input topics with a single process. To use
+the partitions of a topic, several copies of the application are started in the
+same consumer group and Kafka assigns a share of the partitions to each one.
+
+- launch_workers starts the copies. Each one knows its index from the environment.
+- Every worker keeps its own models, trained on the partitions it consumes, and
+  writes its own checkpoints and serves its own dashboard.
+- A ModelAverager can periodically average the weights of linear models across
+  the workers so that they do not drift apart.
+"""
+
+import glob
+import logging
+import numbers
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional
+
+import dill
+
+from beaver.checkpoint import write_atomic
+
+__all__ = ['launch_workers', 'worker_index', 'worker_count', 'worker_path', 'ModelAverager']
+
+WORKER_INDEX_ENV = 'BEAVER_WORKER_INDEX'
+WORKER_COUNT_ENV = 'BEAVER_WORKERS'
+
+logger = logging.getLogger("quixstreams")
+
+
+def worker_index() -> Optional[int]:
+    """Index of this worker or None if the application was not started by launch_workers."""
+    index = os.environ.get(WORKER_INDEX_ENV)
+    return int(index) if index is not None else None
+
+
+def worker_count() -> int:
+    """Number of workers that consume the topics of the application."""
+    return int(os.environ.get(WORKER_COUNT_ENV, 1))
+
+
+def worker_path(path: str) -> str:
+    """
+    Make a file name unique per worker, e.g. 'model.pkl' becomes 'model.worker2.pkl'.
+    Outside of a worker the path is returned unchanged.
+    """
+    index = worker_index()
+    if index is None:
+        return path
+    root, extension = os.path.splitext(path)
+    return f'{root}.worker{index}{extension}'
+
+
+def launch_workers(script: str, workers: int) -> int:
+    """
+    Run a generated application in several processes of the same consumer group.
+
+    Each process gets its index and the number of workers through the environment.
+    Ctrl+C reaches all the workers, which close their pipelines before they exit.
+
+    Returns the highest exit code of the workers.
+    """
+    if workers < 1:
+        raise ValueError(f"The number of workers must be positive, got {workers}")
+
+    processes = []
+    for index in range(workers):
+        environment = {**os.environ, WORKER_INDEX_ENV: str(index), WORKER_COUNT_ENV: str(workers)}
+        processes.append(subprocess.Popen([sys.executable, script], env=environment))
+
+    while True:
+        try:
+            return max(process.wait() for process in processes)
+        except KeyboardInterrupt:
+            # The workers received the interrupt as well. Wait for them to shut down
+            continue
+
+
+def _linear_parameters(model):
+    """(weights, intercept) of a linear model or None if the model has no such parameters."""
+    for attribute in ('_weights', 'weights'):
+        weights = getattr(model, attribute, None)
+        if hasattr(weights, 'items') and isinstance(getattr(model, 'intercept', None), numbers.Real) \
+                and all(isinstance(value, numbers.Real) for value in weights.values()):
+            return weights, model.intercept
+    return None
+
+
+class ModelAverager:
+    """
+    Periodically average the parameters of linear models across the workers.
+
+    Every interval seconds each worker publishes the weights and the intercept of its
+    models to a file next to its checkpoints and replaces them with the average of the
+    latest parameters of all the workers. Files older than three intervals are ignored,
+    so a worker that stopped does not hold the others back.
+
+    Only models with numeric weights and an intercept (e.g. LinearRegression,
+    LogisticRegression, Perceptron, PAClassifier) can be averaged. Other models keep
+    the state of their own worker. Preprocessors are not averaged.
+
+    The model keeps learning while the files are read, so the average is applied as a
+    delta: every parameter moves by the difference between the average and the value
+    that was published. The updates made in the meantime are kept.
+
+    Parameters
+    ----------
+    pipelines : list of Pipeline
+        The pipelines of this worker.
+    interval : float
+        Seconds between two averaging rounds.
+    directory : str
+        Directory shared by the workers.
+    """
+
+    def __init__(self, pipelines: List, interval: float, directory: str = '.'):
+        if interval <= 0:
+            raise ValueError(f"The averaging interval must be positive, got {interval}")
+        self.interval = interval
+        self.directory = directory
+        self.rounds = 0
+
+        self.pipelines = []
+        for pipeline in pipelines:
+            if _linear_parameters(pipeline._model_instance()) is not None:
+                self.pipelines.append(pipeline)
+            else:
+                logger.info(f"{pipeline.name}: {pipeline.model_name} cannot be averaged, each worker keeps its own model.")
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start averaging in a background thread. Nothing happens outside of a multi worker run."""
+        if worker_index() is None or worker_count() < 2 or not self.pipelines:
+            return
+        self._thread = threading.Thread(target=self._run, name='model-averager', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def average(self):
+        """Publish the parameters of this worker and average them with the parameters of the others."""
+        for pipeline in self.pipelines:
+            model = pipeline._model_instance()
+            path = os.path.join(self.directory, worker_path(f'{pipeline.name}.params'))
+
+            with pipeline._model_lock:
+                weights, intercept = _linear_parameters(model)
+                own = (dict(weights.items()), intercept)
+            write_atomic(path, dill.dumps(own))
+
+            parameters = [own]
+            for peer in self._peer_files(pipeline.name, path):
+                with open(peer, 'rb') as peer_file:
+                    parameters.append(dill.load(peer_file))
+            if len(parameters) < 2:
+                continue
+
+            features = set().union(*(peer_weights for peer_weights, _ in parameters))
+            averaged = {
+                feature: sum(peer_weights.get(feature, 0.0) for peer_weights, _ in parameters) / len(parameters)
+                for feature in features
+            }
+            averaged_intercept = sum(peer_intercept for _, peer_intercept in parameters) / len(parameters)
+
+            own_weights, own_intercept = own
+            with pipeline._model_lock:
+                weights, intercept = _linear_parameters(model)
+                for feature, value in averaged.items():
+                    weights[feature] = weights.get(feature, 0.0) + value - own_weights.get(feature, 0.0)
+                model.intercept = intercept + averaged_intercept - own_intercept
+        self.rounds += 1
+
+    def _peer_files(self, name: str, own_path: str) -> List[str]:
+        oldest = time.time() - 3 * self.interval
+        pattern = os.path.join(self.directory, f'{glob.escape(name)}.worker*.params')
+        return [
+            path for path in glob.glob(pattern)
+            if os.path.abspath(path) != os.path.abspath(own_path) and os.path.getmtime(path) >= oldest
+        ]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.average()
+            except Exception as exc:
+                logger.warning(f"Model averaging failed: {exc}")
@@ -10,10 +10,10 @@ import subprocess
 
 
 def run_generator(args):
-    """Run the enhanced code generator."""
+    """Run the enhanced code generator in this process."""
+    from beaver import gen_enhanced
+    
     cmd = [
-        sys.executable, 
-        'beaver/gen_enhanced.py',
         '--metamodel', args.input,
         '--generated_file_name', args.output
     ]
@@ -27,16 +27,20 @@ def run_generator(args):
         cmd.append('--check-syntax')
     if args.dry_run:
         cmd.append('--dry-run')
+    if args.no_cache:
+        cmd.append('--no-cache')
     if args.verbose:
         cmd.append('--verbose')
     
-    # Run the command and return the result
-    return subprocess.run(cmd)
+    # Run the generator and return its exit code
+    return gen_enhanced.main(cmd)
 
 
 def run_analyzer(args):
-    """Run the model analyzer."""
-    cmd = [sys.executable, 'beaver/analyzer.py']
+    """Run the model analyzer in this process."""
+    from beaver import analyzer
+    
+    cmd = []
     
     if args.input:
         cmd.extend(['--file', args.input])
@@ -47,17 +51,21 @@ def run_analyzer(args):
     
     if args.output_format:
         cmd.extend(['--output', args.output_format])
+    if args.workers:
+        cmd.extend(['--workers', str(args.workers)])
+    if args.incremental:
+        cmd.append('--incremental')
     if args.verbose:
         cmd.append('--verbose')
     
-    return subprocess.run(cmd)
+    return analyzer.main(cmd)
 
 
 def run_validator(args):
-    """Run standalone validation."""
+    """Run standalone validation in this process."""
+    from beaver import gen_enhanced
+    
     cmd = [
-        sys.executable,
-        'beaver/gen_enhanced.py',
         '--metamodel', args.input,
         '--validate-only'
     ]
@@ -65,7 +73,118 @@ def run_validator(args):
     if args.verbose:
         cmd.append('--verbose')
     
-    return subprocess.run(cmd)
+    return gen_enhanced.main(cmd)
+
+
+def run_batch(args):
+    """
+    Generate (or validate) many .bvr files in one process.
+    
+    The grammar, the River index and the templates are loaded for the first 
+    file only and reused for the others.
+    """
+    from beaver import gen_enhanced
+    
+    inputs = [Path(path) for path in args.inputs or []]
+    if args.directory:
+        inputs += sorted(Path(args.directory).glob('*.bvr'))
+    
+    if not inputs:
+        print("❌ No .bvr files to process")
+        return 1
+    
+    output_dir = Path(args.output_dir)
+    if not args.validate_only:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    
+    failed = []
+    for input_path in inputs:
+        print(f"\n📄 {input_path}")
+        cmd = [
+            '--metamodel', str(input_path),
+            '--generated_file_name', str(output_dir / f'{input_path.stem}.py')
+        ]
+        if args.validate_only:
+            cmd.append('--validate-only')
+        if args.skip_validation:
+            cmd.append('--skip-validation')
+        if args.check_syntax:
+            cmd.append('--check-syntax')
+        if args.no_cache:
+            cmd.append('--no-cache')
+        if args.verbose:
+            cmd.append('--verbose')
+        
+        if gen_enhanced.main(cmd) != 0:
+            failed.append(input_path)
+    
+    print(f"\n📊 Batch: {len(inputs) - len(failed)}/{len(inputs)} files succeeded")
+    for input_path in failed:
+        print(f"   ❌ {input_path}")
+    
+    return 1 if failed else 0
+
+
+def run_pipeline(args):
+    """Run a generated pipeline, optionally in several consumer worker processes."""
+    if args.workers:
+        from beaver.workers import launch_workers
+        returncode = launch_workers(args.input, args.workers)
+        return subprocess.CompletedProcess(args=[args.input], returncode=returncode)
+
+    return subprocess.run([sys.executable, args.input])
+
+
+def run_replay(args):
+    """Replay a dataset file to a Kafka topic in this process."""
+    from beaver import replay
+    
+    cmd = [args.path, '--topic', args.topic, '--bootstrap_server', args.bootstrap_server]
+    
+    if args.rate:
+        cmd.extend(['--rate', str(args.rate)])
+    if args.limit:
+        cmd.extend(['--limit', str(args.limit)])
+    if args.key_column:
+        cmd.extend(['--key-column', args.key_column])
+    if args.profile:
+        cmd.extend(['--profile', args.profile])
+    if args.json:
+        cmd.append('--json')
+    
+    return replay.main(cmd)
+
+
+def run_loadgen(args):
+    """Stream a River dataset to a Kafka topic from several producer processes."""
+    from beaver import loadgen
+    
+    cmd = [args.dataset, '--topic', args.topic, '--bootstrap_server', args.bootstrap_server,
+           '--target', args.target, '--processes', str(args.processes)]
+    
+    for param in args.param or []:
+        cmd.extend(['--param', param])
+    for option, value in (('--key-field', args.key_field), ('--rate', args.rate), ('--ramp', args.ramp),
+                          ('--ramp-from', args.ramp_from), ('--burst', args.burst),
+                          ('--limit', args.limit), ('--duration', args.duration), ('--profile', args.profile)):
+        if value:
+            cmd.extend([option, str(value)])
+    if args.json:
+        cmd.append('--json')
+    
+    return loadgen.main(cmd)
+
+
+def run_dashboard(args):
+    """Serve the dashboard of the pipelines that publish to a metrics topic."""
+    from beaver import monitor
+    
+    cmd = ['--topic', args.topic, '--bootstrap_server', args.bootstrap_server,
+           '--host', args.host, '--port', str(args.port), '--interval', str(args.interval)]
+    if args.from_beginning:
+        cmd.append('--from-beginning')
+    
+    return monitor.main(cmd)
 
 
 def list_examples():
@@ -98,6 +217,11 @@ QUICK START:
    python beaver_cli.py generate --input examples/model.bvr          # Generate code from example
    python beaver_cli.py validate --input examples/model.bvr          # Validate model definitions
    python beaver_cli.py analyze --directory examples                 # Analyze all examples
+   python beaver_cli.py batch --directory examples --output-dir out  # Generate all examples in one process
+   python beaver_cli.py run --input model.py --workers 4             # Run with 4 consumer workers
+   python beaver_cli.py replay data.csv --topic Phishing --rate 5000 # Load test a pipeline
+   python beaver_cli.py loadgen synth.Agrawal --topic agrawal --processes 4 --rate 20000 --duration 60
+   python beaver_cli.py dashboard --topic beaver-metrics             # Dashboard of the metrics_topic
 
 WORKFLOWS:
    1. Validation-first workflow:
@@ -123,6 +247,9 @@ EXAMPLES:
    # Analyze all examples and get JSON output
    python beaver_cli.py analyze --directory examples --output json
    
+   # Analyze a large directory with 4 processes, streaming one JSON line per file
+   python beaver_cli.py analyze --directory models --workers 4 --incremental --output-format jsonl
+   
    # Quick test run without writing files
    python beaver_cli.py generate --input examples/model.bvr --dry-run
 
@@ -150,6 +277,7 @@ def main():
     gen_parser.add_argument('--skip-validation', action='store_true', help='Skip validation')
     gen_parser.add_argument('--check-syntax', action='store_true', help='Check generated code syntax')
     gen_parser.add_argument('--dry-run', action='store_true', help='Show preview without writing files')
+    gen_parser.add_argument('--no-cache', action='store_true', help='Regenerate even if nothing changed')
     gen_parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     
     # Validate command
@@ -161,9 +289,65 @@ def main():
     ana_parser = subparsers.add_parser('analyze', help='Analyze Beaver DSL files')
     ana_parser.add_argument('--input', '-i', help='Analyze specific .bvr file')
     ana_parser.add_argument('--directory', '-d', help='Analyze all .bvr files in directory')
-    ana_parser.add_argument('--output-format', choices=['text', 'json'], default='text', help='Output format')
+    ana_parser.add_argument('--output-format', choices=['text', 'json', 'jsonl'], default='text', help='Output format')
+    ana_parser.add_argument('--workers', '-w', type=int, help='Number of processes that analyze files in parallel')
+    ana_parser.add_argument('--incremental', action='store_true', help='Skip files that did not change since their last analysis')
     ana_parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     
+    # Batch command
+    batch_parser = subparsers.add_parser('batch', help='Generate or validate many .bvr files in one process')
+    batch_parser.add_argument('inputs', nargs='*', help='Input .bvr files')
+    batch_parser.add_argument('--directory', '-d', help='Process all .bvr files in directory')
+    batch_parser.add_argument('--output-dir', '-o', default='generated', help='Directory for the generated Python files')
+    batch_parser.add_argument('--validate-only', action='store_true', help='Only validate, don\'t generate')
+    batch_parser.add_argument('--skip-validation', action='store_true', help='Skip validation')
+    batch_parser.add_argument('--check-syntax', action='store_true', help='Check generated code syntax')
+    batch_parser.add_argument('--no-cache', action='store_true', help='Regenerate even if nothing changed')
+    batch_parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    
+    # Run command
+    run_parser = subparsers.add_parser('run', help='Run a generated pipeline')
+    run_parser.add_argument('--input', '-i', required=True, help='Generated Python file')
+    run_parser.add_argument('--workers', '-w', type=int, help='Number of consumer worker processes (overrides the connector workers)')
+    
+    # Replay command
+    replay_parser = subparsers.add_parser('replay', help='Replay a CSV or Parquet dataset to a Kafka topic')
+    replay_parser.add_argument('path', help='CSV or Parquet file')
+    replay_parser.add_argument('--topic', '-t', required=True, help='Destination topic name')
+    replay_parser.add_argument('--bootstrap_server', default='localhost:39092', help='Kafka bootstrap broker(s) (host[:port])')
+    replay_parser.add_argument('--rate', '-r', type=float, help='Target messages per second (default: as fast as possible)')
+    replay_parser.add_argument('--limit', '-n', type=int, help='Stop after n messages')
+    replay_parser.add_argument('--key-column', help='Column whose value is the message key (default: row number)')
+    replay_parser.add_argument('--profile', choices=['low-latency', 'high-throughput', 'exactly-once'], help='Kafka tuning profile of the producer')
+    replay_parser.add_argument('--json', action='store_true', help='Print the final report as JSON')
+    
+    # Load generator command
+    load_parser = subparsers.add_parser('loadgen', help='Stream a River dataset or synthetic generator to a Kafka topic')
+    load_parser.add_argument('dataset', help="River dataset, e.g. 'Phishing' or 'synth.Agrawal'")
+    load_parser.add_argument('--topic', '-t', required=True, help='Destination topic name')
+    load_parser.add_argument('--bootstrap_server', default='localhost:39092', help='Kafka bootstrap broker(s) (host[:port])')
+    load_parser.add_argument('--param', '-p', action='append', help='Parameter of the dataset, e.g. seed=42 (can be repeated)')
+    load_parser.add_argument('--target', default='y', help='Field of the target in the messages')
+    load_parser.add_argument('--key-field', help='Feature whose value is the message key (default: sample index)')
+    load_parser.add_argument('--processes', '-w', type=int, default=1, help='Number of producer processes')
+    load_parser.add_argument('--rate', '-r', type=float, help='Total messages per second (default: as fast as possible)')
+    load_parser.add_argument('--ramp', type=float, help='Seconds to ramp up linearly to the rate')
+    load_parser.add_argument('--ramp-from', type=float, help='Rate at the start of the ramp')
+    load_parser.add_argument('--burst', help='Bursts as rate:seconds:every, e.g. 50000:2:30')
+    load_parser.add_argument('--limit', '-n', type=int, help='Stop after n messages')
+    load_parser.add_argument('--duration', '-d', type=float, help='Stop after this many seconds')
+    load_parser.add_argument('--profile', choices=['low-latency', 'high-throughput', 'exactly-once'], help='Kafka tuning profile of the producers')
+    load_parser.add_argument('--json', action='store_true', help='Print the final report as JSON')
+    
+    # Dashboard command
+    dash_parser = subparsers.add_parser('dashboard', help='Serve the dashboard of the pipelines that publish to a metrics topic')
+    dash_parser.add_argument('--topic', '-t', required=True, help='The metrics_topic of the applications')
+    dash_parser.add_argument('--bootstrap_server', default='localhost:39092', help='Kafka bootstrap broker(s) (host[:port])')
+    dash_parser.add_argument('--host', default='0.0.0.0', help='Address the dashboard listens on')
+    dash_parser.add_argument('--port', '-p', type=int, default=8050, help='Port of the dashboard')
+    dash_parser.add_argument('--interval', type=float, default=2.0, help='Seconds between two refreshes of the page')
+    dash_parser.add_argument('--from-beginning', action='store_true', help='Read the summaries already in the topic (default: only new ones)')
+    
     # Examples command
     subparsers.add_parser('examples', help='List available example files')
     
@@ -183,6 +367,16 @@ def main():
             result = run_validator(args)
         elif args.command == 'analyze':
             result = run_analyzer(args)
+        elif args.command == 'batch':
+            result = run_batch(args)
+        elif args.command == 'run':
+            result = run_pipeline(args)
+        elif args.command == 'replay':
+            result = run_replay(args)
+        elif args.command == 'loadgen':
+            result = run_loadgen(args)
+        elif args.command == 'dashboard':
+            result = run_dashboard(args)
         elif args.command == 'examples':
             list_examples()
             return
@@ -193,9 +387,10 @@ def main():
             parser.print_help()
             return
         
-        # Exit with the same code as the subprocess
+        # Exit with the same code as the command
         if hasattr(result, 'returncode'):
             sys.exit(result.returncode)
+        sys.exit(result)
             
     except KeyboardInterrupt:
         print("\n🛑 Operation cancelled by user")
@@ -3,18 +3,21 @@ import datetime
 
 from confluent_kafka import Consumer
 
+from beaver.kafka_profiles import consumer_config
 
-def create_kafka_consumer(server, offset, groupId):
-    config = {
+
+def create_kafka_consumer(server, offset, groupId, profile=None):
+    # profile is one of beaver.kafka_profiles.PROFILES (low-latency, high-throughput, exactly-once).
+    # The profiles set the fetch sizes and the partition assignment strategy
+    # (librdkafka calls the cooperative sticky assignor 'cooperative-sticky')
+    config = consumer_config(profile, **{
         # User-specific properties that you must set
         'bootstrap.servers': server,
 
         # Fixed properties
         'group.id':          groupId,
         'auto.offset.reset': offset,
-        # cannot make it work
-        # 'partition.assignment.strategy': 'org.apache.kafka.clients.consumer.CooperativeStickyAssignor'
-    }
+    })
     # none means if we don't have existing consumer group we fail. we must set consumer group
     # earliest read from the beginning of my topic
     # latest i want to read from just now and only the new messages.
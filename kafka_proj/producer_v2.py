@@ -3,15 +3,23 @@ import argparse
 
 from confluent_kafka import Producer
 from sseclient import SSEClient as EventSource
+from beaver.delivery import DeliveryReporter, JsonLinesSink, print_sink
+from beaver.kafka_profiles import producer_config
+from beaver.replay import dumps, produce
 # from kafka import RoundRobinPartitioner
 
 
 # https://docs.confluent.io/platform/current/clients/producer.html
 # https://docs.confluent.io/platform/current/installation/configuration/producer-configs.html
-def create_kafka_producer(bootstrap_server, acks, linger_ms=0, batch_size=16 * 1024, compression_type=None):
-    config = {
-        # User-specific properties that you must set
-        'bootstrap.servers': bootstrap_server,
+def create_kafka_producer(bootstrap_server, acks=None, linger_ms=None, batch_size=None, compression_type=None, profile=None):
+    # profile is one of beaver.kafka_profiles.PROFILES (low-latency, high-throughput, exactly-once).
+    # The arguments that are given override the settings of the profile
+    if profile is None:
+        # Defaults without a profile
+        linger_ms = 0 if linger_ms is None else linger_ms
+        batch_size = 16 * 1024 if batch_size is None else batch_size
+
+    settings = {
         # 'partitioner': RoundRobinPartitioner,
         # TODO: find out how to change number of partitions -> through kafka admin
         'acks': acks,  # 0 1 all|-1
@@ -21,8 +29,10 @@ def create_kafka_producer(bootstrap_server, acks, linger_ms=0, batch_size=16 * 1
         # 'enable.idempotence': True (default)
         'linger.ms': linger_ms,  # Wait up to x ms for the batch to fill before sending default 0
         'compression.type': compression_type  # None ( default )
-
     }
+    config = producer_config(profile, **{setting: value for setting, value in settings.items() if value is not None})
+    # User-specific properties that you must set
+    config['bootstrap.servers'] = bootstrap_server
 
     # not working
     # partitioner = RoundRobinPartitioner(partitions=3)  # Assume we have 3 partitions in the topic
@@ -35,7 +45,7 @@ def create_kafka_producer(bootstrap_server, acks, linger_ms=0, batch_size=16 * 1
 def construct_id(event_data):
     event_data = {'id': event_data['id']}
 
-    return json.dumps({"id": event_data['id']}).encode('utf-8')
+    return dumps(event_data)
 
 
 def construct_event(event_data, user_types):
@@ -49,7 +59,8 @@ def construct_event(event_data, user_types):
     user_type = user_types[event_data['bot']]
 
     # define the structure of the json event that will be published to kafka topic
-    event = json.dumps({"id": event_data['id'],
+    # orjson (if installed) serializes it straight to bytes
+    event = dumps({"id": event_data['id'],
                         "domain": event_data['meta']['domain'],
                         "namespace": event_data['namespace'],
                         "title": event_data['title'],
@@ -61,7 +72,7 @@ def construct_event(event_data, user_types):
                         "minor": event_data['minor'],
                         # "type": event_data['type'],
                         "old_length": event_data['length']['old'],
-                        "new_length": event_data['length']['new']}).encode('utf-8')
+                        "new_length": event_data['length']['new']})
 
     return event
 
@@ -101,17 +112,22 @@ def parse_command_line_arguments():
                         help='Destination topic name', type=str)
     parser.add_argument('--events_to_produce',
                         help='Kill producer after n events have been produced', type=int, default=500)
+    parser.add_argument('--report_interval',
+                        help='Seconds between two delivery reports', type=float, default=5.0)
+    parser.add_argument('--profile', choices=['low-latency', 'high-throughput', 'exactly-once'],
+                        help='Kafka tuning profile of the producer', type=str)
+    parser.add_argument('--report_file',
+                        help='Also append the delivery reports to this JSON lines file', type=str)
 
     return parser.parse_args()
 
 
 def delivery_callback(err, msg):
     # executed when a record is successfully sent or an exception is thrown
+    # Successful deliveries are not printed, console output would limit the producer.
+    # Use a DeliveryReporter for periodic counters and latencies
     if err:
         print(f'ERROR: Message failed delivery: {err}')
-    else:
-        print(
-            f"Produced event to topic {msg.topic()}: partition {msg.partition()}: value = {msg.value().decode('utf-8')}")
 
 
 if __name__ == "__main__":
@@ -119,8 +135,11 @@ if __name__ == "__main__":
     args = parse_command_line_arguments()
 
     # init producer
-    producer = create_kafka_producer(bootstrap_server=args.bootstrap_server,
-                                     acks='all', linger_ms=20, batch_size=32 * 1024, compression_type='snappy')
+    if args.profile:
+        producer = create_kafka_producer(bootstrap_server=args.bootstrap_server, profile=args.profile)
+    else:
+        producer = create_kafka_producer(bootstrap_server=args.bootstrap_server,
+                                         acks='all', linger_ms=20, batch_size=32 * 1024, compression_type='snappy')
 
     # init dictionary of namespaces
     namespace_dict = init_namespaces()
@@ -128,6 +147,10 @@ if __name__ == "__main__":
     # used to parse user type
     user_types = {True: 'bot', False: 'human'}
 
+    # Deliveries are aggregated and reported every report_interval seconds
+    sinks = [print_sink] + ([JsonLinesSink(args.report_file)] if args.report_file else [])
+    reporter = DeliveryReporter(interval=args.report_interval, sinks=sinks)
+
     # consume websocket
     url = 'https://stream.wikimedia.org/v2/stream/recentchange'
 
@@ -147,10 +170,8 @@ if __name__ == "__main__":
                     event_to_send = construct_event(event_data, user_types)
                     id_to_send = construct_id(event_data)
 
-                    producer.produce(
-                        args.topic_name, value=event_to_send, key=id_to_send, callback=delivery_callback)
-                    # Polling to handle responses
-                    # do we need these ?
+                    produce(producer, args.topic_name, event_to_send, id_to_send, reporter)
+                    # Polling serves the delivery reports
                     producer.poll(0)
                     # producer.flush()  # Ensure the producer sends the message before proceeding
 
@@ -163,3 +184,4 @@ if __name__ == "__main__":
 
     # Flush to ensure all messages are sent before exit
     producer.flush()
+    reporter.close()
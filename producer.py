@@ -1,34 +1,14 @@
 # %%
-import pandas as pd
 from river import datasets
-import pandas as pd
-from kafka_proj.producer_v2 import parse_command_line_arguments, create_kafka_producer, delivery_callback
+from kafka_proj.producer_v2 import parse_command_line_arguments
+from beaver.replay import replay
 import kagglehub
-import json
 # %%
 
-def convert_keys_to_underscores(data):
-    """
-    Recursively converts all dictionary keys by replacing spaces with underscores.
-    """
-    if isinstance(data, dict):
-        return {
-            key.replace(" ", "_").lower(): convert_keys_to_underscores(value)
-            for key, value in data.items()
-        }
-    elif isinstance(data, list):
-        return [convert_keys_to_underscores(item) for item in data]
-    else:
-        return data
-
 if __name__ == "__main__":
 
     args = parse_command_line_arguments()
 
-    # init producer
-    producer = create_kafka_producer(
-        bootstrap_server=args.bootstrap_server, acks='all',  compression_type='snappy')
-
 #%% 
     # Download Heart Failure Prediction dataset from Kaggle
     # path = kagglehub.dataset_download("fedesoriano/heart-failure-prediction")
@@ -47,34 +27,15 @@ if __name__ == "__main__":
 
 # %%
     # Trump approval , Airline , Phishing
-    #df = pd.read_csv(dataset.path)
-    df = pd.read_csv(path + '/2019.csv') 
-# %%
-    df
+    #dataset_path = dataset.path
+    dataset_path = path + '/2019.csv'
 
 # %%
     print('Messages are being published to Kafka topic')
-    messages_count = 0
-
-    for idx, row in df.iterrows():
-
-        
-        
-        # convert to json format
-        #Trump Approval dataset 
-        row_dict = row.to_dict()
-        json_message = convert_keys_to_underscores(row_dict)
-        # Serialize to JSON string
-        json_string = json.dumps(json_message)
-        # Produce the message to kafka
-        producer.produce(
-            args.topic_name, value=json_string, key=str(idx), callback=delivery_callback)
-
-        # Polling to handle responses
-        producer.poll(0)
-
-        messages_count += 1
 
-    # Flush to ensure all messages are sent before exit
-    producer.flush()
+    # The file is read in chunks and every row is produced as a JSON message
+    # whose keys are the column names in lower case with underscores
+    report = replay(dataset_path, args.topic_name, bootstrap_server=args.bootstrap_server,
+                    producer_config={'compression.type': 'snappy'}, progress_every=5.0)
+    print(report)
 # %%
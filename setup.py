@@ -4,6 +4,8 @@ setup(
     name='beaver',
     version='1.0.0',
     packages=['beaver'],  # Automatically find packages in subdirectories
+    # The grammar and the templates are loaded from the installed package
+    package_data={'beaver': ['grammar/*.tx', 'templates/*.jinja']},
     author='Iasonas Kakandris',
     description='Beaver is a DSL for machine learning in live data',
     author_email = 'ikakandris@gmail.com' , 
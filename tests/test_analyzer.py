@@ -0,0 +1,47 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from beaver.analyzer import AnalysisCache, analyze_directory
+
+EXAMPLES = Path(__file__).resolve().parent.parent / 'examples'
+
+
+@pytest.fixture
+def examples(tmp_path, monkeypatch):
+    monkeypatch.setenv('BEAVER_CACHE_DIR', str(tmp_path / 'cache'))
+    directory = tmp_path / 'examples'
+    shutil.copytree(EXAMPLES, directory)
+    return directory
+
+
+def analyze(directory, capsys, **kwargs) -> dict:
+    """The result of every file, read from the JSON lines output (stdout only has JSON)."""
+    capsys.readouterr()
+    analyze_directory(str(directory), output_format='jsonl', **kwargs)
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    return {line['file']: line['result'] for line in lines}
+
+
+def test_parallel_output_equals_serial_output(examples, capsys):
+    serial = analyze(examples, capsys)
+    parallel = analyze(examples, capsys, workers=3)
+    assert sorted(serial) == sorted(path.name for path in examples.glob('*.bvr'))
+    assert parallel == serial
+
+
+def test_unchanged_files_are_cache_hits(examples, capsys):
+    first = analyze(examples, capsys, incremental=True)
+    second = analyze(examples, capsys, incremental=True)
+    assert second == first
+
+    cache = AnalysisCache()
+    files = sorted(examples.glob('*.bvr'))
+    assert all(cache.get(path) is not None for path in files)
+    assert cache.hits == len(files)
+
+    # An edited file is analyzed again
+    files[0].write_text(files[0].read_text() + '\n// edited\n')
+    assert AnalysisCache().get(files[0]) is None
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from beaver.buffers import DownsampledSeries, RingBuffer
+
+
+def test_ring_buffer_wraps_around_oldest_first():
+    buffer = RingBuffer(4)
+    for value in range(10):
+        buffer.append(value)
+    assert buffer.tolist() == [6, 7, 8, 9]
+    assert list(buffer.indices()) == [6, 7, 8, 9]
+    assert (buffer[0], buffer[-1], len(buffer), buffer.total) == (6, 9, 4, 10)
+    with pytest.raises(IndexError):
+        buffer[4]
+
+
+def test_ring_buffer_since():
+    buffer = RingBuffer(4)
+    for value in range(10):
+        buffer.append(value)
+    assert buffer.since(7).tolist() == [7, 8, 9]
+    assert buffer.since(10).tolist() == []
+    # Overwritten values and positions past the end cannot be returned
+    assert buffer.since(5) is None
+    assert buffer.since(11) is None
+
+
+def test_ring_buffer_widens_its_dtype():
+    buffer = RingBuffer(3)
+    buffer.append(1)
+    buffer.append(2.5)
+    assert buffer.to_numpy().dtype == np.float64
+    buffer.append('label')
+    assert buffer.tolist() == [1, 2.5, 'label']
+
+
+def test_series_keeps_recent_values_and_bounded_history():
+    series = DownsampledSeries(recent_points=10, history_buckets=8)
+    for value in range(1000):
+        series.append(value)
+
+    assert series.since(990).tolist() == list(range(990, 1000))
+    assert series.since(989) is None
+    assert series._history_size <= 8
+    assert len(series) <= series.max_points
+    x, y = series.indices(), series.values()
+    assert np.all(np.diff(x) > 0)
+    assert list(x[-10:]) == list(range(990, 1000))
+    # Every bucket is the average of the events it covers, for y = x it is drawn at its average
+    np.testing.assert_allclose(y, x)
+
+
+def test_series_merges_buckets_when_full():
+    series = DownsampledSeries(recent_points=2, history_buckets=4)
+    for value in range(2 + 4):
+        series.append(value)
+    assert series._history_size == 4 and series.bucket_width == 1
+    series.append(6)
+    # The buckets were merged in pairs before event 4 got its own bucket
+    assert series.bucket_width == 2
+    assert list(series._history_x[:series._history_size]) == [0.5, 2.5, 4.0]
+    # From now on a bucket covers two events
+    series.append(7)
+    assert series._history_size == 3
+    series.append(8)
+    assert list(series._history_x[:series._history_size]) == [0.5, 2.5, 4.0, 5.5]
+
+
+def test_series_missing_values_are_nan():
+    series = DownsampledSeries(recent_points=3)
+    series.append(None)
+    series.append(1)
+    assert np.isnan(series.values()[0])
+    assert series.last() == 1.0
@@ -0,0 +1,69 @@
+import threading
+
+import dill
+
+from beaver.checkpoint import CheckpointPolicy, Checkpointer
+
+
+def make_checkpointer(tmp_path, policy, requests):
+    checkpointer = Checkpointer(policy, str(tmp_path / 'model.pkl'), lambda: {'weights': 1}, threading.Lock())
+
+    def request():
+        # Record the request and reset the counters, without starting the writer thread
+        requests.append(checkpointer.events_since_checkpoint)
+        checkpointer.events_since_checkpoint = 0
+
+    checkpointer.request = request
+    return checkpointer
+
+
+def test_every_n_events(tmp_path):
+    requests = []
+    checkpointer = make_checkpointer(tmp_path, CheckpointPolicy(every_n_events=3, every_seconds=None), requests)
+    for _ in range(7):
+        checkpointer.notify()
+    assert requests == [3, 3]
+
+
+def test_every_seconds(tmp_path):
+    requests = []
+    checkpointer = make_checkpointer(tmp_path, CheckpointPolicy(every_seconds=0.0), requests)
+    checkpointer.notify()
+    assert len(requests) == 1
+    requests.clear()
+    checkpointer = make_checkpointer(tmp_path, CheckpointPolicy(every_seconds=3600.0), requests)
+    checkpointer.notify()
+    assert requests == []
+
+
+def test_improvement(tmp_path):
+    requests = []
+    policy = CheckpointPolicy(every_seconds=None, on_improvement='Accuracy')
+    checkpointer = make_checkpointer(tmp_path, policy, requests)
+    for value in (0.5, 0.4, 0.6, 0.6):
+        checkpointer.notify({'Accuracy': value})
+    assert len(requests) == 2
+    assert checkpointer.best_value == 0.6
+
+
+def test_best_value_updated_when_another_trigger_fires(tmp_path):
+    requests = []
+    policy = CheckpointPolicy(every_n_events=1, every_seconds=0.0, on_improvement='MAE')
+    checkpointer = make_checkpointer(tmp_path, policy, requests)
+    checkpointer.bigger_is_better = False
+    checkpointer.notify({'MAE': 2.0})
+    checkpointer.notify({'MAE': 1.0})
+    checkpointer.notify({'MAE': 3.0})
+    # One request per call, however many triggers fired
+    assert len(requests) == 3
+    assert checkpointer.best_value == 1.0
+
+
+def test_writer_and_shutdown(tmp_path):
+    path = tmp_path / 'model.pkl'
+    checkpointer = Checkpointer(CheckpointPolicy(every_n_events=1), str(path), lambda: {'weights': 1},
+                                threading.Lock())
+    checkpointer.notify()
+    checkpointer.close()
+    assert dill.loads(path.read_bytes()) == {'weights': 1}
+    assert checkpointer.checkpoints_written >= 1
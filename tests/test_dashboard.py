@@ -0,0 +1,64 @@
+from beaver.buffers import RetentionPolicy
+from beaver.dashboard import extend_metrics, metrics_cursor
+from beaver.telemetry import RemotePipeline
+
+RETENTION = RetentionPolicy(recent_points=100)
+
+
+def make_pipeline(name='p', metrics=('MAE',)):
+    pipeline = RemotePipeline('app', name, RETENTION)
+    add(pipeline, 0, 10, metrics)
+    return pipeline
+
+
+def add(pipeline, start, stop, metrics=('MAE',)):
+    points = {'x': list(range(start, stop)), 'y': [float(x) for x in range(start, stop)]}
+    pipeline.apply({'pipeline': pipeline.name, 'metrics': {metric_name: points for metric_name in metrics}})
+
+
+def test_new_values_are_appended():
+    pipelines = [make_pipeline()]
+    cursor = metrics_cursor(pipelines)
+    add(pipelines[0], 10, 15)
+
+    extension, cursor = extend_metrics(pipelines, cursor)
+    assert extension.data == {'x': [[10, 11, 12, 13, 14]], 'y': [[10.0, 11.0, 12.0, 13.0, 14.0]]}
+    assert extension.traces == [0]
+    assert cursor == {'positions': {'p/MAE': 15}, 'extended': 5}
+
+    # Nothing new, the cursor stays
+    assert extend_metrics(pipelines, cursor) == (None, cursor)
+
+
+def test_only_changed_traces_are_extended():
+    pipelines = [make_pipeline('a'), make_pipeline('b')]
+    cursor = metrics_cursor(pipelines)
+    add(pipelines[1], 10, 12)
+    extension, cursor = extend_metrics(pipelines, cursor)
+    assert extension.traces == [1]
+    assert cursor['positions'] == {'a/MAE': 10, 'b/MAE': 12}
+
+
+def test_dropped_values_invalidate_the_cursor():
+    pipelines = [make_pipeline()]
+    cursor = metrics_cursor(pipelines)
+    # More values than the series keeps, the ones after the cursor are gone
+    add(pipelines[0], 10, 10 + RETENTION.recent_points + 1)
+    assert extend_metrics(pipelines, cursor) == (None, None)
+
+
+def test_new_trace_invalidates_the_cursor():
+    pipelines = [make_pipeline()]
+    cursor = metrics_cursor(pipelines)
+    pipelines.append(make_pipeline('q'))
+    assert extend_metrics(pipelines, cursor) == (None, None)
+
+
+def test_long_extension_invalidates_the_cursor():
+    pipelines = [make_pipeline()]
+    cursor = metrics_cursor(pipelines)
+    add(pipelines[0], 10, 20)
+    extension, cursor = extend_metrics(pipelines, cursor, max_extension=15)
+    assert extension is not None
+    add(pipelines[0], 20, 30)
+    assert extend_metrics(pipelines, cursor, max_extension=15) == (None, None)
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from beaver import delivery
+from beaver.delivery import DeliveryReporter, JsonLinesSink
+
+
+class FakeMessage:
+    def __init__(self, value=b'12345', latency=0.002):
+        self._value = value
+        self._latency = latency
+
+    def value(self):
+        return self._value
+
+    def latency(self):
+        return self._latency
+
+
+class FakeError:
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(delivery.time, 'time', lambda: now[0])
+    return now
+
+
+def test_interval_rollover(clock):
+    reports = []
+    reporter = DeliveryReporter(interval=5, sinks=[reports.append])
+    reporter(None, FakeMessage())
+    reporter(FakeError('_MSG_TIMED_OUT'), None)
+    clock[0] += 4.9
+    reporter(None, FakeMessage(latency=0.010))
+    assert reports == []
+
+    # The delivery reported after the interval closes it, and is counted in it
+    clock[0] += 0.2
+    reporter(None, FakeMessage(value=None, latency=None))
+    assert len(reports) == 1
+    report = reports[0]
+    assert (report.delivered, report.failed, report.bytes) == (3, 1, 10)
+    assert report.seconds == pytest.approx(5.1)
+    assert report.rate == pytest.approx(3 / 5.1)
+    assert report.errors == {'_MSG_TIMED_OUT': 1}
+    assert report.latency_max == pytest.approx(10.0)
+    assert report.latency_p50 == pytest.approx(6.0)
+
+    # The next interval starts empty, the totals go on
+    clock[0] += 5
+    reporter(None, FakeMessage())
+    report = reports[1]
+    assert (report.delivered, report.failed, report.errors) == (1, 0, {})
+    assert (report.total_delivered, report.total_failed) == (4, 1)
+
+
+def test_latency_sample_is_bounded(clock):
+    reports = []
+    reporter = DeliveryReporter(interval=5, sinks=[reports.append], max_samples=100)
+    for latency in range(1, 10_001):
+        reporter(None, FakeMessage(latency=latency / 1000))
+    assert len(reporter._latencies) == 100
+
+    report = reporter.close()
+    assert report.delivered == 10_000
+    # The maximum is exact, the percentiles come from a uniform sample
+    assert report.latency_max == 10_000
+    assert report.latency_p50 == pytest.approx(5_000, abs=1_500)
+    assert report.latency_p99 > report.latency_p95 > report.latency_p50
+
+
+def test_close_reports_the_partial_interval(clock):
+    reports = []
+    reporter = DeliveryReporter(interval=5, sinks=[reports.append])
+    reporter(None, FakeMessage())
+    clock[0] += 1
+    report = reporter.close()
+    assert reports == [report]
+    assert (report.delivered, report.seconds) == (1, 1)
+
+    # An interval without deliveries has no latencies
+    empty = reporter.close()
+    assert (empty.delivered, empty.latency_p50, empty.latency_max) == (0, None, None)
+    assert empty.total_delivered == 1
+
+
+def test_json_lines_sink(tmp_path, clock):
+    path = tmp_path / 'deliveries.jsonl'
+    reporter = DeliveryReporter(interval=5, sinks=[JsonLinesSink(str(path))])
+    reporter(None, FakeMessage())
+    clock[0] += 2
+    reporter.close()
+    reporter.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]['delivered'] == 1 and lines[0]['rate'] == 0.5 and lines[0]['latency_max'] == 2.0
+    assert lines[1]['delivered'] == 0 and lines[1]['latency_p50'] is None and lines[1]['total_delivered'] == 1
+
+
+def test_interval_must_be_positive():
+    with pytest.raises(ValueError, match='positive'):
+        DeliveryReporter(interval=0)
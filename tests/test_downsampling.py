@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from beaver.downsampling import downsample, lttb, visible_range
+
+
+def test_short_series_is_kept():
+    np.testing.assert_array_equal(lttb(np.arange(5), np.zeros(5), 10), np.arange(5))
+
+
+def test_lttb_keeps_the_ends_and_the_peaks():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[123], y[700] = 50.0, -40.0
+    kept = lttb(x, y, 20)
+    assert len(kept) == 20
+    assert kept[0] == 0 and kept[-1] == 999
+    assert np.all(np.diff(kept) > 0)
+    assert 123 in kept and 700 in kept
+
+
+def test_lttb_one_point_per_bucket():
+    rng = np.random.default_rng(0)
+    n, n_out = 1003, 12
+    kept = lttb(np.arange(n), rng.normal(size=n), n_out)
+    every = (n - 2) / (n_out - 2)
+    for bucket, index in enumerate(kept[1:-1]):
+        assert np.floor(bucket * every) + 1 <= index < np.floor((bucket + 1) * every) + 1
+
+
+def test_lttb_needs_three_points():
+    with pytest.raises(ValueError):
+        lttb(np.arange(10), np.arange(10), 2)
+
+
+def test_downsample_drops_nan_only_when_reducing():
+    x = np.arange(10)
+    y = np.where(x < 3, np.nan, x.astype(np.float64))
+    kept_x, kept_y = downsample(x, y, 20)
+    assert len(kept_x) == 10 and np.isnan(kept_y[:3]).all()
+
+    kept_x, kept_y = downsample(x, y, 4)
+    assert len(kept_x) == 4 and not np.isnan(kept_y).any()
+    assert kept_x[0] == 3 and kept_x[-1] == 9
+
+
+def test_downsample_visible_range():
+    x = np.arange(100)
+    kept_x, _ = downsample(x, x * 2.0, 50, x_range=(10.5, 20.5))
+    # One point on each side of the range so the line reaches the edges
+    np.testing.assert_array_equal(kept_x, np.arange(10, 22))
+    assert visible_range(x, (-5, 3)) == slice(0, 5)
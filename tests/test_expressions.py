@@ -0,0 +1,147 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from beaver.expressions import (_OPERATORS, Assignment, BinaryOp, Column, Negate, Number, compile_features,
+                                fold)
+
+
+def col(name):
+    return Column(name)
+
+
+def evaluate(node, values):
+    """Reference: the expression as written, without folding or shared subexpressions."""
+    if isinstance(node, Number):
+        return node.value
+    if isinstance(node, Column):
+        return values[node.name]
+    if isinstance(node, Negate):
+        return -evaluate(node.operand, values)
+    return _OPERATORS[node.operator](evaluate(node.left, values), evaluate(node.right, values))
+
+
+def reference(assignments, message):
+    row = dict(message)
+    for assignment in assignments:
+        row[assignment.variable] = evaluate(assignment.expression, row)
+    return row
+
+
+def run_rows(program, messages):
+    results = []
+    for message in messages:
+        namespace = {'row': dict(message)}
+        exec('\n'.join(program.row_statements()), namespace)
+        results.append(namespace['row'])
+    return results
+
+
+def run_batch(program, messages):
+    namespace = {'rows': [dict(message) for message in messages], 'np': np}
+    exec('\n'.join(program.batch_statements()), namespace)
+    return namespace['result']
+
+
+RATIO = BinaryOp('/', col('x'), col('y'))
+CASES = {
+    'chained': [
+        Assignment('ratio', RATIO),
+        Assignment('twice', BinaryOp('*', col('ratio'), Number(2))),
+        Assignment('again', BinaryOp('+', col('ratio'), BinaryOp('*', col('twice'), Number(0.5)))),
+    ],
+    'unary minus': [
+        Assignment('neg', Negate(BinaryOp('-', col('x'), col('y')))),
+        Assignment('neg_product', BinaryOp('*', Negate(col('x')), col('y'))),
+        Assignment('minus_negative', BinaryOp('-', col('x'), Negate(Number(3)))),
+        Assignment('double_negative', Negate(Negate(col('neg')))),
+    ],
+    'shared subexpression': [
+        Assignment('scaled', BinaryOp('*', BinaryOp('+', col('x'), col('y')), Number(2))),
+        Assignment('divided', BinaryOp('/', BinaryOp('+', col('x'), col('y')), Number(3))),
+        Assignment('mixed', BinaryOp('-', BinaryOp('+', col('x'), col('y')), col('x'))),
+    ],
+    'associativity': [
+        Assignment('left', BinaryOp('-', BinaryOp('-', col('x'), col('y')), Number(1))),
+        Assignment('right', BinaryOp('-', col('x'), BinaryOp('-', col('y'), Number(1)))),
+        Assignment('quotient', BinaryOp('/', col('x'), BinaryOp('*', col('y'), Number(2)))),
+    ],
+    'constants': [
+        Assignment('folded', BinaryOp('*', col('x'), BinaryOp('+', Number(2), Number(1)))),
+        Assignment('constant', BinaryOp('-', Number(1), Number(4))),
+        Assignment('x', BinaryOp('+', col('x'), Number(1))),
+    ],
+}
+
+
+def messages(n=20, seed=0):
+    rng = random.Random(seed)
+    return [{'x': rng.uniform(-10, 10), 'y': rng.uniform(0.5, 10), 'label': 'keep'} for _ in range(n)]
+
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_row_and_batch_statements_give_the_same_values(name):
+    assignments = CASES[name]
+    program = compile_features(assignments)
+    data = messages()
+    expected = [reference(assignments, message) for message in data]
+    assert run_rows(program, data) == expected
+    assert run_batch(program, data) == expected
+
+
+def test_shared_subexpression_is_computed_once():
+    program = compile_features(CASES['shared subexpression'])
+    # x is read twice, x + y three times
+    assert program.row_statements() == [
+        '_t0 = row["x"]',
+        '_t1 = _t0 + row["y"]',
+        'row["scaled"] = _t1 * 2',
+        'row["divided"] = _t1 / 3',
+        'row["mixed"] = _t1 - _t0',
+    ]
+    assert sum(statement.count('+') for statement in program.batch_statements()[:-1]) == 1
+
+
+def test_generated_features_reuse_their_values():
+    program = compile_features(CASES['chained'])
+    assert program.columns == ['ratio', 'twice', 'again']
+    assert program.inputs == ['x', 'y']
+    # ratio is used by the three features, twice by again
+    assert program.row_statements() == [
+        '_t0 = row["x"] / row["y"]',
+        'row["ratio"] = _t0',
+        '_t1 = _t0 * 2',
+        'row["twice"] = _t1',
+        'row["again"] = _t0 + _t1 * 0.5',
+    ]
+
+
+def test_fold():
+    assert fold(BinaryOp('*', col('x'), BinaryOp('+', Number(2), Number(1)))) == BinaryOp('*', col('x'), Number(3))
+    assert fold(Negate(Number(2))) == Number(-2)
+    # Operations are not reordered: (x + 1) + 2 is not x + 3
+    assert fold(BinaryOp('+', BinaryOp('+', col('x'), Number(1)), Number(2))) == \
+        BinaryOp('+', BinaryOp('+', col('x'), Number(1)), Number(2))
+    # A division by zero is not folded
+    assert fold(BinaryOp('/', col('x'), BinaryOp('-', Number(1), Number(1)))) == BinaryOp('/', col('x'), Number(0))
+
+
+def test_division_by_constant_zero():
+    assignments = [Assignment('broken', BinaryOp('/', col('x'), BinaryOp('-', Number(1), Number(1))))]
+    program = compile_features(assignments)
+    data = messages(3)
+    # A message fails like the expression as written, a window gives inf with a warning (see batch_statements)
+    with pytest.raises(ZeroDivisionError):
+        reference(assignments, data[0])
+    with pytest.raises(ZeroDivisionError):
+        run_rows(program, data)
+    with pytest.warns(RuntimeWarning):
+        result = run_batch(program, data)
+    assert all(math.isinf(row['broken']) for row in result)
+
+
+def test_no_assignments():
+    assert compile_features([]) is None
+    assert compile_features(None) is None
@@ -0,0 +1,34 @@
+from flatten_dict import flatten
+
+from beaver.extraction import FeatureExtractor
+
+
+def test_flat_message():
+    extractor = FeatureExtractor('y')
+    assert extractor.split({'a': 1, 'b': 2, 'y': 0}) == ({'a': 1, 'b': 2}, 0)
+    assert extractor.split({'a': 3, 'b': 4, 'y': 1}) == ({'a': 3, 'b': 4}, 1)
+    assert extractor.plans_built == 1
+
+
+def test_nested_message_matches_flatten():
+    message = {'a': {'x': 1, 'z': {'w': 2}}, 'b': 3, 'y': 0}
+    X, y = FeatureExtractor('y').split(message)
+    expected = flatten(message, reducer='underscore')
+    assert y == expected.pop('y')
+    assert X == expected
+
+
+def test_scalar_key_becomes_nested():
+    extractor = FeatureExtractor('y')
+    extractor.split({'a': 1, 'b': 2, 'y': 0})
+    assert extractor.split({'a': {'x': 1}, 'b': 2, 'y': 0}) == ({'a_x': 1, 'b': 2}, 0)
+
+
+def test_nested_key_becomes_scalar():
+    extractor = FeatureExtractor('y')
+    extractor.split({'a': {'x': 1}, 'b': 2, 'y': 0})
+    assert extractor.split({'a': 5, 'b': 2, 'y': 1}) == ({'a': 5, 'b': 2}, 1)
+
+
+def test_without_target():
+    assert FeatureExtractor().split({'a': 1, 'y': 0}) == ({'a': 1, 'y': 0}, None)
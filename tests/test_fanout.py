@@ -0,0 +1,47 @@
+import copy
+import random
+
+import pytest
+from river import compose, feature_extraction, linear_model, preprocessing, stats
+
+from beaver.fanout import preprocess
+
+
+def _stream(n=300, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        x = {'a': rng.random(), 'b': rng.gauss(0, 3), 'c': rng.choice('uvw')}
+        yield x, 2 * x['a'] - x['b'] + {'u': 0, 'v': 1, 'w': 5}[x['c']]
+
+
+def _numeric():
+    return compose.Select('a', 'b') | preprocessing.StandardScaler()
+
+
+def _target_agg():
+    return feature_extraction.TargetAgg(by='c', how=stats.Mean())
+
+
+@pytest.mark.parametrize('make_preprocessor', [
+    _numeric,
+    _target_agg,
+    lambda: _numeric() + _target_agg(),
+    lambda: (_numeric() + _target_agg()) | preprocessing.StandardScaler(),
+], ids=['unsupervised', 'supervised', 'union', 'pipeline'])
+def test_preprocess_matches_river_pipeline(make_preprocessor):
+    model = linear_model.LinearRegression()
+    reference = compose.Pipeline(make_preprocessor(), copy.deepcopy(model))
+    preprocessor = make_preprocessor()
+
+    for x, y in _stream():
+        x_predict, x_learn = preprocess(preprocessor, x, y)
+        assert model.predict_one(x_predict) == pytest.approx(reference.predict_one(x))
+        model.learn_one(x_learn, y)
+        reference.learn_one(x, y)
+
+
+def test_supervised_features_are_transformed_before_learning():
+    preprocessor = _target_agg()
+    preprocess(preprocessor, {'c': 'u'}, 1.0)
+    x_predict, x_learn = preprocess(preprocessor, {'c': 'u'}, 3.0)
+    assert x_learn == x_predict
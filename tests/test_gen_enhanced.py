@@ -0,0 +1,56 @@
+import os
+import re
+import shutil
+from pathlib import Path
+
+import pytest
+
+from beaver import gen_enhanced
+
+EXAMPLES = Path(__file__).resolve().parent.parent / 'examples'
+
+
+@pytest.fixture
+def bvr(tmp_path, monkeypatch):
+    monkeypatch.setenv('BEAVER_CACHE_DIR', str(tmp_path / 'cache'))
+    path = tmp_path / 'linear.bvr'
+    shutil.copy(EXAMPLES / 'linear.bvr', path)
+    return path
+
+
+def generate(bvr, capsys, *options):
+    output = bvr.with_suffix('.py')
+    capsys.readouterr()
+    assert gen_enhanced.main(['--metamodel', str(bvr), '--generated_file_name', str(output),
+                              '--check-syntax', '--verbose', *options]) == 0
+    out = capsys.readouterr().out
+    hits = re.search(r'Cache hits: (.*)', out)
+    written = re.search(r'Output file: (\w+)', out).group(1)
+    return (hits.group(1) if hits else None), written
+
+
+def test_cache_hits_and_invalidation(bvr, capsys):
+    output = bvr.with_suffix('.py')
+    assert generate(bvr, capsys) == ('none', 'written')
+    code = output.read_text()
+    # An old timestamp shows whether the file is written again
+    os.utime(output, (1_000_000, 1_000_000))
+
+    assert generate(bvr, capsys) == ('validation, render, syntax', 'unchanged')
+    assert output.stat().st_mtime == 1_000_000
+
+    # An edited .bvr file is a miss
+    bvr.write_text(bvr.read_text().replace("output_topic = 'almaPipeline'", "output_topic = 'almaTopic'"))
+    assert generate(bvr, capsys) == ('none', 'written')
+    assert 'almaTopic' in output.read_text() and output.read_text() != code
+
+    # Without the cache the file is generated again, and not written if it did not change
+    os.utime(output, (1_000_000, 1_000_000))
+    assert generate(bvr, capsys, '--no-cache') == (None, 'unchanged')
+    assert output.stat().st_mtime == 1_000_000
+
+
+def test_key_includes_generation_fingerprint(bvr, monkeypatch):
+    key = gen_enhanced.GenerationCache(str(bvr)).path
+    monkeypatch.setattr(gen_enhanced, '_generation_fingerprint', 'another grammar or template')
+    assert gen_enhanced.GenerationCache(str(bvr)).path != key
@@ -0,0 +1,40 @@
+import confluent_kafka
+import pytest
+
+from beaver.kafka_profiles import PROFILES, application_options, consumer_config, get_profile, producer_config
+
+# Nothing listens there, the clients are only created to validate the settings
+BROKER = 'localhost:1'
+
+
+@pytest.mark.parametrize('profile', list(PROFILES))
+def test_librdkafka_accepts_the_profile(profile):
+    producer = confluent_kafka.Producer(producer_config(profile, **{'bootstrap.servers': BROKER}))
+    assert producer.flush(0) == 0
+
+    consumer = confluent_kafka.Consumer(consumer_config(profile, **{'bootstrap.servers': BROKER, 'group.id': 'test'}))
+    consumer.close()
+
+
+@pytest.mark.parametrize('profile', list(PROFILES))
+def test_application_options(profile, tmp_path):
+    from quixstreams import Application
+
+    options = application_options(profile)
+    consumer = options['consumer_extra_config']
+    # quixstreams commits and assigns the partitions itself
+    assert 'enable.auto.commit' not in consumer and 'partition.assignment.strategy' not in consumer
+    assert options['producer_extra_config'] == PROFILES[profile].producer
+
+    app = Application(broker_address=BROKER, consumer_group='test', state_dir=str(tmp_path), **options)
+    assert app.config.processing_guarantee == (PROFILES[profile].processing_guarantee or 'at-least-once')
+
+
+def test_overrides_and_processing_guarantee():
+    assert producer_config() == {}
+    assert producer_config('low-latency', acks='all')['acks'] == 'all'
+    assert consumer_config('exactly-once', **{'group.id': 'g'})['isolation.level'] == 'read_committed'
+    assert application_options('exactly-once', 'at-least-once')['processing_guarantee'] == 'at-least-once'
+    assert 'processing_guarantee' not in application_options('low-latency')
+    with pytest.raises(ValueError, match='choose one of: low-latency'):
+        get_profile('fast')
@@ -0,0 +1,63 @@
+import pytest
+
+from beaver.loadgen import LoadSpec, RateProfile, run_worker
+
+
+class FakeProducer:
+    """Delivers the messages on poll, and counts those delivered before the flush."""
+
+    def __init__(self):
+        self.pending = []
+        self.delivered = 0
+        self.delivered_before_flush = None
+
+    def produce(self, topic, value, key, on_delivery):
+        self.pending.append(on_delivery)
+
+    def poll(self, timeout=0):
+        for on_delivery in self.pending:
+            on_delivery(None, None)
+        self.delivered += len(self.pending)
+        self.pending.clear()
+
+    def flush(self):
+        self.delivered_before_flush = self.delivered
+        self.poll()
+
+
+def test_ramp():
+    profile = RateProfile(rate=100, ramp_seconds=10, ramp_from=20)
+    assert profile.rate_at(0) == 20
+    assert profile.rate_at(5) == pytest.approx(60)
+    assert profile.rate_at(10) == 100
+    assert profile.rate_at(60) == 100
+    assert RateProfile().rate_at(5) is None
+
+
+def test_burst_overrides_ramp():
+    profile = RateProfile(rate=100, ramp_seconds=30, burst_rate=1000, burst_seconds=2, burst_every=10)
+    # The first burst starts after burst_every seconds, during the ramp
+    assert profile.rate_at(1) == pytest.approx(100 / 30)
+    assert profile.rate_at(10) == 1000
+    assert profile.rate_at(11.5) == 1000
+    assert profile.rate_at(12) == pytest.approx(40)
+    assert profile.rate_at(41) == 1000
+    assert profile.rate_at(45) == 100
+    # Bursts also apply without a base rate
+    assert RateProfile(burst_rate=50, burst_seconds=1, burst_every=5).rate_at(5.5) == 50
+
+
+def test_scaled():
+    profile = RateProfile(rate=100, ramp_seconds=10, ramp_from=20, burst_rate=1000, burst_seconds=2, burst_every=10)
+    assert profile.scaled(0.25) == RateProfile(rate=25, ramp_seconds=10, ramp_from=5, burst_rate=250,
+                                               burst_seconds=2, burst_every=10)
+    assert RateProfile().scaled(0.5) == RateProfile()
+
+
+def test_deliveries_are_served_at_low_rates():
+    producer = FakeProducer()
+    spec = LoadSpec('synth.Agrawal', 'load', params={'seed': 1}, limit=15, profile=RateProfile(rate=50))
+    report = run_worker(spec, producer=producer)
+    assert report['messages'] == report['delivered'] == 15
+    # About 0.3 s of messages: the reports do not wait for the flush
+    assert producer.delivered_before_flush > 0
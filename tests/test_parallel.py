@@ -0,0 +1,39 @@
+import pytest
+
+from beaver.parallel import ParallelFanOut
+
+
+class EchoPipeline:
+    """Returns the value of its message, fails on the messages it is told to."""
+
+    def __init__(self, name, fail_on=None):
+        self.name = name
+        self.y = None
+        self.fail_on = fail_on
+        self.observed = []
+
+    def share_lock(self, lock):
+        pass
+
+    def train_and_predict_prepared(self, X, y=None, x_predict=None, x_learn=None):
+        if X['value'] == self.fail_on:
+            raise ValueError(f"{self.name} failed")
+        return {'value': X['value']}
+
+    def observe(self, output):
+        self.observed.append(output)
+
+    def close(self):
+        pass
+
+
+def test_replies_are_read_after_a_worker_error():
+    fanout = ParallelFanOut([EchoPipeline('bad', fail_on=1), EchoPipeline('good')], processes=2)
+    try:
+        assert fanout({'value': 0}) == {'bad': {'value': 0}, 'good': {'value': 0}}
+        with pytest.raises(RuntimeError, match='bad failed'):
+            fanout({'value': 1})
+        # The reply of the good worker to the failed message must not be taken for this one
+        assert fanout({'value': 2}) == {'bad': {'value': 2}, 'good': {'value': 2}}
+    finally:
+        fanout.close()
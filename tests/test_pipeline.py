@@ -0,0 +1,197 @@
+import copy
+import itertools
+import random
+import threading
+
+import pytest
+from river import linear_model, metrics, naive_bayes, preprocessing, tree
+from sklearn.metrics import confusion_matrix
+
+from beaver import pipeline as pipeline_module
+from beaver.buffers import RetentionPolicy
+from beaver.pipeline import Pipeline
+
+RETENTION = RetentionPolicy(snapshot_interval=0)
+
+
+@pytest.fixture
+def make_pipeline(tmp_path, monkeypatch):
+    # The checkpoints of the pipelines are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    pipelines = []
+
+    def make(model, model_name, metrics_list=None, name='p', retention=RETENTION, **kwargs):
+        pipeline = Pipeline(model=model, model_name=model_name, metrics_list=metrics_list, name=name, y='y',
+                            retention=retention, **kwargs)
+        pipelines.append(pipeline)
+        return pipeline
+
+    yield make
+    for pipeline in pipelines:
+        pipeline.checkpointer.close()
+
+
+def messages(n, seed=0):
+    rng = random.Random(seed)
+    for _ in range(n):
+        a, b = rng.gauss(0, 1), rng.gauss(0, 1)
+        yield {'a': a, 'b': b, 'y': a + 0.5 * b > 0}
+
+
+def logistic():
+    return preprocessing.StandardScaler() | linear_model.LogisticRegression()
+
+
+class NoProbaManyRegression(linear_model.LogisticRegression):
+    """A classifier with learn_many and predict_many but without predict_proba_many."""
+
+    @property
+    def predict_proba_many(self):
+        raise AttributeError('predict_proba_many')
+
+
+def test_mini_batch_predicts_the_batch_before_learning(make_pipeline):
+    pipeline = make_pipeline(logistic(), 'LogisticRegression', [metrics.Accuracy(), metrics.ROCAUC()])
+    assert pipeline._mini_batch
+    data = list(messages(60))
+    for start in range(0, len(data), 20):
+        batch = data[start:start + 20]
+        before = copy.deepcopy(pipeline.model)
+        outputs = pipeline.train_and_predict_batch(batch)
+
+        # One output per message, in the order of the messages
+        assert [(output['a'], output['y_true']) for output in outputs] == [(m['a'], m['y']) for m in batch]
+        for output, message in zip(outputs, batch):
+            x = {'a': message['a'], 'b': message['b']}
+            assert output['y_predicted'] == before.predict_one(x)
+            expected = before.predict_proba_one(x)
+            assert output['y_predicted_probabilities'] == pytest.approx({str(k): v for k, v in expected.items()})
+
+
+def test_batches_of_one_match_per_message_outputs(make_pipeline):
+    batched = make_pipeline(logistic(), 'LogisticRegression', [metrics.Accuracy()], name='batched', batch_size=1)
+    single = make_pipeline(logistic(), 'LogisticRegression', [metrics.Accuracy()], name='single')
+    for message in messages(200):
+        [output] = batched.train_and_predict_windowed(dict(message))
+        expected = single.train_and_predict(dict(message))
+        assert output['y_predicted'] == expected['y_predicted']
+        assert output['metrics'] == pytest.approx(expected['metrics'])
+
+
+def test_fallback_without_learn_many(make_pipeline):
+    batched = make_pipeline(tree.HoeffdingTreeClassifier(), 'HoeffdingTreeClassifier', [metrics.Accuracy()],
+                            name='batched')
+    single = make_pipeline(tree.HoeffdingTreeClassifier(), 'HoeffdingTreeClassifier', [metrics.Accuracy()],
+                           name='single')
+    assert not batched._mini_batch
+    data = list(messages(300))
+    outputs = []
+    for start in range(0, len(data), 32):
+        outputs += batched.train_and_predict_batch([dict(message) for message in data[start:start + 32]])
+    assert outputs == [single.train_and_predict(dict(message)) for message in data]
+
+
+def test_probabilistic_metric_needs_predict_proba_many(make_pipeline):
+    pipeline = make_pipeline(NoProbaManyRegression(), 'NoProbaManyRegression', [metrics.ROCAUC()])
+    assert not pipeline._mini_batch
+    outputs = pipeline.train_and_predict_batch([dict(message) for message in messages(10)])
+    assert all('y_predicted_probabilities' in output for output in outputs)
+    # Without a probabilistic metric predict_proba_many is not needed
+    assert make_pipeline(NoProbaManyRegression(), 'NoProbaManyRegression', [metrics.Accuracy()],
+                         name='q')._mini_batch
+
+
+def test_close_learns_a_partial_window(make_pipeline):
+    pipeline = make_pipeline(logistic(), 'LogisticRegression', [metrics.Accuracy()], batch_size=10)
+    for message in messages(7):
+        assert pipeline.train_and_predict_windowed(message) == []
+    assert pipeline.model['StandardScaler'].counts == {}
+
+    pipeline.close()
+    assert pipeline._window == []
+    assert dict(pipeline.model['StandardScaler'].counts) == {'a': 7, 'b': 7}
+    assert len(pipeline.snapshot().y_pred) == 7
+
+
+def test_confusion_matrix_matches_sklearn(make_pipeline):
+    pipeline = make_pipeline(naive_bayes.GaussianNB(), 'GaussianNB', [metrics.Accuracy()])
+    rng = random.Random(1)
+    y_true, y_pred = [], []
+    for i in range(400):
+        # Label 'c' only appears after 200 messages
+        label = rng.choice('abc' if i >= 200 else 'ab')
+        center = 'abc'.index(label) * 3
+        output = pipeline.train_and_predict({'a': rng.gauss(center, 1), 'b': rng.gauss(center, 1), 'y': label})
+        if output.get('y_predicted') is not None:
+            y_true.append(label)
+            y_pred.append(output['y_predicted'])
+
+    snapshot = pipeline.snapshot()
+    classes = list(snapshot.classes)
+    assert classes == ['a', 'b', 'c'] and 'c' in y_pred
+    counts = [[snapshot.confusion_matrix.get(t, {}).get(p, 0) for p in classes] for t in classes]
+    assert counts == confusion_matrix(y_true, y_pred, labels=classes).tolist()
+
+
+def test_snapshots_read_during_training_are_consistent(make_pipeline):
+    # Small buffers so they wrap around while they are read
+    retention = RetentionPolicy(recent_points=50, history_buckets=10, stats_points=100, snapshot_interval=0)
+    pipeline = make_pipeline(logistic(), 'LogisticRegression', [metrics.Accuracy(), metrics.LogLoss()],
+                             retention=retention)
+    snapshots = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            snapshots.append(pipeline.snapshot())
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for message in messages(1000):
+            pipeline.train_and_predict(message)
+    finally:
+        done.set()
+        reader.join()
+    snapshots.append(pipeline.snapshot())
+
+    assert len({snapshot.version for snapshot in snapshots}) > 10
+    assert [s.version for s in snapshots] == sorted(s.version for s in snapshots)
+    for snapshot in snapshots:
+        # Every message has a prediction and updates every value once
+        outputs = snapshot.version // 2
+        assert snapshot.version % 2 == 0
+        assert snapshot.y_true.total == snapshot.y_pred.total == outputs
+        assert len(snapshot.y_true.data) == len(snapshot.y_pred.data) == min(outputs, 100)
+        assert all(series.recent.total == outputs for series in snapshot.metrics.values())
+        assert all(len(series.x) == len(series.y) for series in snapshot.metrics.values())
+        assert sum(sum(row.values()) for row in (snapshot.confusion_matrix or {}).values()) == outputs
+    assert snapshots[-1].version == 2000
+
+
+def test_snapshot_is_published_every_interval(make_pipeline, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(pipeline_module.time, 'monotonic', lambda: now[0])
+    pipeline = make_pipeline(logistic(), 'LogisticRegression', [metrics.Accuracy()],
+                             retention=RetentionPolicy(snapshot_interval=1.0))
+    data = messages(30)
+
+    for message in itertools.islice(data, 10):
+        pipeline.train_and_predict(message)
+    now[0] += 0.5
+    assert pipeline.snapshot().version == 0
+
+    # The first message after the interval publishes the values
+    now[0] += 0.5
+    pipeline.train_and_predict(next(data))
+    assert pipeline.snapshot().version == 22
+    for message in itertools.islice(data, 5):
+        pipeline.train_and_predict(message)
+    now[0] += 0.9
+    assert pipeline.snapshot().version == 22
+
+    # Without new messages the reader copies the latest values itself
+    now[0] += 0.1
+    snapshot = pipeline.snapshot()
+    assert snapshot.version == 32 and snapshot.y_pred.total == 16
+    assert pipeline.snapshot() is pipeline.snapshot()
@@ -0,0 +1,48 @@
+import json
+
+import confluent_kafka
+import pytest
+
+from beaver import replay
+
+
+class FakeProducer:
+    """Delivers every message at once."""
+
+    def __init__(self, config):
+        self.pending = []
+
+    def produce(self, topic, value, key, on_delivery):
+        self.pending.append(on_delivery)
+
+    def poll(self, timeout=0):
+        for on_delivery in self.pending:
+            on_delivery(None, None)
+        self.pending.clear()
+
+    def flush(self):
+        self.poll()
+
+
+def test_json_report_is_alone_on_stdout(tmp_path, monkeypatch, capsys):
+    path = tmp_path / 'data.csv'
+    path.write_text('a,b\n' + ''.join(f'{i},{i * 2}\n' for i in range(50)))
+    monkeypatch.setattr(confluent_kafka, 'Producer', FakeProducer)
+
+    assert replay.main([str(path), '--topic', 'data', '--json', '--chunk-size', '10', '--progress', '1e-9']) == 0
+
+    out, err = capsys.readouterr()
+    assert json.loads(out)['delivered'] == 50
+    assert 'Replaying' in err
+
+
+def test_unknown_key_column(tmp_path, monkeypatch, capsys):
+    path = tmp_path / 'data.csv'
+    path.write_text('Customer Id,b\n1,2\n')
+    with pytest.raises(ValueError, match='no column customer, its columns are: customer_id, b'):
+        replay.replay(str(path), 'data', key_column='customer', producer=FakeProducer({}))
+
+    monkeypatch.setattr(confluent_kafka, 'Producer', FakeProducer)
+    assert replay.main([str(path), '--topic', 'data', '--key-column', 'customer']) == 1
+    assert 'no column customer' in capsys.readouterr().out
+    assert replay.main([str(path), '--topic', 'data', '--key-column', 'customer_id', '--json']) == 0
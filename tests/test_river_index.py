@@ -0,0 +1,56 @@
+import inspect
+from importlib import metadata
+
+import pytest
+from river import preprocessing
+
+from beaver import river_index
+from beaver.river_index import RiverIndex, load_river_index
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('BEAVER_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(river_index, '_loaded', {})
+    return tmp_path
+
+
+def test_index_knows_river_classes(cache):
+    index = load_river_index()
+    assert index.version == metadata.version('river')
+    assert index.has_class('linear_model', 'LogisticRegression')
+    assert not index.has_class('linear_model', 'Missing')
+    expected = inspect.signature(preprocessing.StandardScaler.__init__).parameters
+    assert list(index.parameters('preprocessing', 'StandardScaler')) == [name for name in expected if name != 'self']
+
+
+def test_json_round_trip():
+    index = RiverIndex('1.0', {'linear_model': {'Model': [('l2', 'float'), ('optimizer', None)]}})
+    loaded = RiverIndex.from_json(index.to_json())
+    assert loaded.version == '1.0'
+    assert loaded.parameters('linear_model', 'Model') == {'l2': 'float', 'optimizer': None}
+
+
+def test_index_is_built_once_per_version(cache, monkeypatch):
+    version = metadata.version('river')
+    load_river_index()
+    assert (cache / f'river-index-{version}.json').exists()
+
+    # A new process loads the cached index instead of importing River
+    monkeypatch.setattr(river_index, '_loaded', {})
+    monkeypatch.setattr(RiverIndex, 'build', classmethod(lambda cls, version: pytest.fail('rebuilt')))
+    assert load_river_index().has_class('tree', 'HoeffdingTreeClassifier')
+
+    # Another River version has an index of its own
+    monkeypatch.setattr(river_index, '_loaded', {})
+    monkeypatch.setattr(river_index.metadata, 'version', lambda name: '0.0.1')
+    monkeypatch.setattr(RiverIndex, 'build', classmethod(lambda cls, version: cls(version, {})))
+    assert load_river_index().version == '0.0.1'
+    assert (cache / 'river-index-0.0.1.json').exists()
+
+
+def test_unreadable_cache_is_rebuilt(cache):
+    path = cache / f"river-index-{metadata.version('river')}.json"
+    path.write_text('{"format": 0}')
+    assert load_river_index().has_module('linear_model')
+    assert RiverIndex.from_json(path.read_text()).has_module('linear_model')
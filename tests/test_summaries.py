@@ -0,0 +1,75 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from beaver.summaries import Histogram2D, QuantileSketch, ReservoirSample, ScatterSummary
+
+
+def test_histogram_coarsens_to_at_most_bins_cells():
+    histogram = Histogram2D(bins=10)
+    rng = random.Random(0)
+    pairs = [(rng.uniform(-1000, 1000), rng.uniform(0, 1)) for _ in range(2000)]
+    for x, y in pairs:
+        histogram.add(x, y)
+
+    snapshot = histogram.snapshot()
+    assert snapshot.z.shape[0] <= 10 and snapshot.z.shape[1] <= 10
+    assert snapshot.total == len(pairs)
+    # Every pair is in the cell of its values
+    width_x, width_y = histogram.width
+    for x, y in pairs[:100]:
+        column = int(np.searchsorted(snapshot.x - width_x / 2, x, side='right')) - 1
+        row = int(np.searchsorted(snapshot.y - width_y / 2, y, side='right')) - 1
+        assert snapshot.z[row, column] > 0
+
+
+def test_histogram_merges_neighbouring_cells():
+    histogram = Histogram2D(bins=2)
+    histogram.width = [1.0, 1.0]
+    for x in (0.5, 1.5, -0.5):
+        histogram.add(x, 0.5)
+    # Cells -1, 0 and 1 span 3 columns, so they were merged into (-1, 0) with width 2
+    assert histogram.width == [2.0, 1.0]
+    assert histogram.counts == {(-1, 0): 1, (0, 0): 2}
+
+
+def test_histogram_ignores_values_that_are_not_finite():
+    histogram = Histogram2D()
+    for x, y in ((math.nan, 1.0), (1.0, math.inf), (None, 1.0), (True, 1.0)):
+        histogram.add(x, y)
+    assert histogram.snapshot() is None
+
+
+def test_reservoir_sample_is_uniform():
+    hits = np.zeros(100)
+    for seed in range(300):
+        sample = ReservoirSample(10, seed)
+        for value in range(100):
+            sample.add(value, value)
+        x, _ = sample.snapshot()
+        hits[x.astype(np.int64)] += 1
+    # Every value has a 10% chance to be kept
+    assert hits.mean() == 30
+    assert hits[:50].sum() == pytest.approx(hits[50:].sum(), rel=0.15)
+
+
+def test_scatter_summary_describes_the_whole_stream():
+    summary = ScatterSummary(sample_points=5, bins=4, seed=0)
+    for value in range(100):
+        summary.add(value, value + 1)
+    summary.add(math.nan, 1.0)
+    snapshot = summary.snapshot()
+    assert snapshot.total == 100
+    assert len(snapshot.x) == 5
+    assert (snapshot.low, snapshot.high) == (0.0, 100.0)
+    assert snapshot.density.total == 100
+
+
+def test_quantile_sketch():
+    sketch = QuantileSketch((0.5,))
+    assert sketch.values() == {}
+    for value in range(1, 1001):
+        sketch.add(value)
+    assert sketch.values()[0.5] == pytest.approx(500, rel=0.05)
@@ -0,0 +1,71 @@
+import json
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+from river import cluster, linear_model, metrics, preprocessing
+
+from beaver.buffers import RetentionPolicy
+from beaver.pipeline import Pipeline
+from beaver.telemetry import RemotePipeline, summarize
+
+RETENTION = RetentionPolicy(recent_points=2000, history_buckets=100, stats_points=500, sample_points=100,
+                            snapshot_interval=0)
+
+
+@pytest.fixture
+def make_pipeline(tmp_path, monkeypatch):
+    # The checkpoints of the pipelines are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    pipelines = []
+
+    def make(model, model_name, metrics_list, y=None):
+        pipeline = Pipeline(model=model, model_name=model_name, metrics_list=metrics_list, name=model_name,
+                            y=y, retention=RETENTION)
+        pipelines.append(pipeline)
+        return pipeline
+
+    yield make
+    for pipeline in pipelines:
+        pipeline.checkpointer.close()
+
+
+def round_trip(pipeline, remote, cursor, max_points):
+    message, cursor = summarize(pipeline, cursor, max_points)
+    remote.apply(json.loads(json.dumps(message)))
+    return cursor
+
+
+def test_regressor_round_trip(make_pipeline):
+    pipeline = make_pipeline(preprocessing.StandardScaler() | linear_model.LinearRegression(), 'LinearRegression',
+                             [metrics.MAE()], y='y')
+    remote = RemotePipeline('app', pipeline.name, RETENTION)
+    rng = random.Random(0)
+    cursor = None
+    for _ in range(3):
+        for _ in range(700):
+            a, b = rng.random(), rng.random()
+            pipeline.train_and_predict({'a': a, 'b': b, 'y': 2 * a + b})
+        cursor = round_trip(pipeline, remote, cursor, max_points=50)
+
+    local, received = pipeline.snapshot(), remote.snapshot()
+    assert received.metrics['MAE'].values()[-1] == pytest.approx(local.metrics['MAE'].values()[-1])
+    # The sample of the application is received as is, not rebuilt from thinned pairs
+    np.testing.assert_array_equal(received.scatter.x, local.scatter.x)
+    np.testing.assert_array_equal(received.scatter.y, local.scatter.y)
+    assert received.scatter.total == local.scatter.total == 2100
+    assert received.scatter.density.total == local.scatter.density.total
+
+
+def test_clusterer_counts_are_not_thinned(make_pipeline):
+    pipeline = make_pipeline(cluster.KMeans(n_clusters=3, seed=1), 'KMeans', [])
+    remote = RemotePipeline('app', pipeline.name, RETENTION)
+    rng = random.Random(0)
+    for _ in range(400):
+        pipeline.train_and_predict({'a': rng.random(), 'b': rng.random()})
+    round_trip(pipeline, remote, None, max_points=20)
+
+    local_counts = Counter(pipeline.snapshot().y_pred.to_numpy().tolist())
+    assert remote.snapshot().cluster_counts == dict(local_counts)
+    assert sum(remote.snapshot().cluster_counts.values()) == 400
@@ -0,0 +1,45 @@
+import threading
+
+import dill
+from river import linear_model
+
+from beaver.workers import WORKER_COUNT_ENV, WORKER_INDEX_ENV, ModelAverager
+
+
+class LinearPipeline:
+
+    def __init__(self, name):
+        self.name = name
+        self.model_name = 'LinearRegression'
+        self.model = linear_model.LinearRegression()
+        self._model_lock = threading.Lock()
+
+    def _model_instance(self):
+        return self.model
+
+
+def test_updates_during_a_round_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setenv(WORKER_INDEX_ENV, '0')
+    monkeypatch.setenv(WORKER_COUNT_ENV, '2')
+    pipeline = LinearPipeline('linear')
+    pipeline.model._weights['a'] = 1.0
+    pipeline.model.intercept = 1.0
+    (tmp_path / 'linear.worker1.params').write_bytes(dill.dumps(({'a': 3.0, 'b': 2.0}, 3.0)))
+
+    averager = ModelAverager([pipeline], interval=60.0, directory=str(tmp_path))
+    peer_files = averager._peer_files
+
+    def learn_while_reading(name, own_path):
+        # The pipeline learns after its parameters were published
+        with pipeline._model_lock:
+            pipeline.model._weights['a'] += 0.5
+            pipeline.model.intercept += 0.5
+        return peer_files(name, own_path)
+
+    averager._peer_files = learn_while_reading
+    averager.average()
+
+    assert pipeline.model._weights['a'] == 2.0 + 0.5
+    assert pipeline.model._weights['b'] == 1.0
+    assert pipeline.model.intercept == 2.0 + 0.5
+    assert averager.rounds == 1